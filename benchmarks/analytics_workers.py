@@ -0,0 +1,75 @@
+"""Measure how the analytics scan scales with the number of worker processes.
+
+Usage:
+    poetry run python -m benchmarks.analytics_workers --notes 20000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database.models import Base, Note
+from src.services.analytics import AnalyticsService
+
+VOCABULARY = (
+    "project meeting budget design review release deploy customer feedback "
+    "roadmap sprint backlog database query latency cache index schema migration "
+    "summary report analysis metric dashboard alert incident postmortem"
+).split()
+
+
+def seed(session, notes: int, words_per_note: int) -> None:
+    rng = random.Random(42)
+    for offset in range(0, notes, 1000):
+        session.add_all(
+            Note(
+                title=f"Note {i}",
+                content=" ".join(rng.choices(VOCABULARY, k=words_per_note)) + ".",
+                user_id=1,
+            )
+            for i in range(offset, min(offset + 1000, notes))
+        )
+        session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=20000)
+    parser.add_argument("--words-per-note", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1]
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        seed(session, args.notes, args.words_per_note)
+
+        baseline = None
+        print(f"{'workers':>8} {'seconds':>10} {'notes/s':>12} {'speedup':>8}")
+        for workers in sorted(set(args.workers)):
+            service = AnalyticsService(
+                session, chunk_size=args.chunk_size, workers=workers
+            )
+            # Warm up the pool so process start-up is not part of the timing.
+            service.scan_notes_analytics()
+            started = time.perf_counter()
+            service.scan_notes_analytics()
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            print(
+                f"{workers:>8} {elapsed:>10.2f} {args.notes / elapsed:>12.0f} "
+                f"{baseline / elapsed:>7.2f}x"
+            )
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Compare notes/second of single-note creation and the bulk import path.
+
+Usage:
+    poetry run python -m benchmarks.bulk_import --notes 2000
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.database.models import Base
+from src.repository.notes import create_note, create_notes_bulk
+from src.schemas import NoteCreate
+from src.services.analytics_cache import analytics_cache
+
+VOCABULARY = (
+    "project meeting budget design review release deploy customer feedback "
+    "roadmap sprint backlog database query latency cache index schema migration"
+).split()
+
+
+def make_notes(count: int, words_per_note: int):
+    rng = random.Random(42)
+    return [
+        NoteCreate(
+            title=f"Note {i}",
+            content=" ".join(rng.choices(VOCABULARY, k=words_per_note)) + ".",
+        )
+        for i in range(count)
+    ]
+
+
+async def run(url: str, notes, batch_size: int):
+    engine = create_async_engine(url)
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async with Session() as db:
+        started = time.perf_counter()
+        for note in notes:
+            await create_note(note, 1, db)
+        single = time.perf_counter() - started
+
+    async with Session() as db:
+        started = time.perf_counter()
+        for offset in range(0, len(notes), batch_size):
+            await create_notes_bulk(notes[offset:offset + batch_size], 1, db)
+        bulk = time.perf_counter() - started
+
+    await engine.dispose()
+    return single, bulk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--words-per-note", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    notes = make_notes(args.notes, args.words_per_note)
+    with tempfile.TemporaryDirectory() as directory:
+        path = f"{directory}/bench.db"
+        Base.metadata.create_all(bind=create_engine(f"sqlite:///{path}"))
+        # Redis is not needed to measure the database write path.
+        with patch.object(analytics_cache, "redis_db", AsyncMock()):
+            single, bulk = asyncio.run(
+                run(f"sqlite+aiosqlite:///{path}", notes, args.batch_size)
+            )
+
+    print(f"{'path':>8} {'seconds':>10} {'notes/s':>12}")
+    print(f"{'single':>8} {single:>10.2f} {args.notes / single:>12.0f}")
+    print(f"{'bulk':>8} {bulk:>10.2f} {args.notes / bulk:>12.0f}")
+    print(f"bulk import is {single / bulk:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Compare stored bytes and encode/decode cost of the content codecs.
+
+Usage:
+    poetry run python -m benchmarks.content_compression --notes 2000
+"""
+import argparse
+import random
+import time
+
+from src.database.types import compress_text, decompress_text, zstandard
+
+SENTENCES = [
+    "We agreed to ship the new dashboard on Friday.",
+    "Anna's team will handle QA, and I'll write the release notes.",
+    "Don't forget to renew the SSL certificate before it expires!",
+    "The API returned a 500 error at 10:30; retries didn't help.",
+    "Root cause: the connection pool was exhausted (max 20 connections).",
+    "Shopping list: milk, eggs, bread... and coffee -- lots of coffee.",
+    '"Simplicity is prerequisite for reliability," he said.',
+    "We're going to rewrite the importer anyway, aren't we?",
+    "TODO: refactor notes.py and benchmark the tokenizer [high priority].",
+]
+
+
+def make_corpus(notes: int, max_sentences: int):
+    """Notes from one sentence up to `max_sentences`, mostly short ones."""
+    rng = random.Random(42)
+    return [
+        " ".join(
+            rng.choices(SENTENCES, k=int(rng.paretovariate(1.2)) % max_sentences + 1)
+        )
+        for _ in range(notes)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--max-sentences", type=int, default=400)
+    parser.add_argument("--threshold", type=int, default=1024)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.notes, args.max_sentences)
+    plain_bytes = sum(len(text.encode()) for text in corpus)
+    kilobytes = plain_bytes / 1024
+    codecs = ["none", "zlib"] + (["zstd"] if zstandard is not None else [])
+
+    print(f"{args.notes} notes, {plain_bytes} bytes of content")
+    print(
+        f"{'codec':>6} {'stored bytes':>14} {'saved':>8} "
+        f"{'encode us/KB':>14} {'decode us/KB':>14}"
+    )
+    for codec in codecs:
+        started = time.perf_counter()
+        stored = [compress_text(text, codec, args.threshold) for text in corpus]
+        encode = time.perf_counter() - started
+
+        started = time.perf_counter()
+        decoded = [decompress_text(value) for value in stored]
+        decode = time.perf_counter() - started
+        assert decoded == corpus
+
+        stored_bytes = sum(len(value.encode()) for value in stored)
+        print(
+            f"{codec:>6} {stored_bytes:>14} {1 - stored_bytes / plain_bytes:>8.1%} "
+            f"{encode / kilobytes * 1e6:>14.2f} {decode / kilobytes * 1e6:>14.2f}"
+        )
+    if zstandard is None:
+        print("zstd skipped: install zstandard to include it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compare notes/second of the analytics tokenizer backends.
+
+Usage:
+    poetry run python -m benchmarks.tokenizers --notes 5000
+"""
+import argparse
+import random
+import time
+from collections import Counter
+
+from src.services.tokenizers import TOKENIZERS
+
+SENTENCES = [
+    "We agreed to ship the new dashboard on Friday.",
+    "Anna's team will handle QA, and I'll write the release notes.",
+    "Don't forget to renew the SSL certificate before it expires!",
+    "The API returned a 500 error at 10:30; retries didn't help.",
+    "Root cause: the connection pool was exhausted (max 20 connections).",
+    "Shopping list: milk, eggs, bread... and coffee -- lots of coffee.",
+    '"Simplicity is prerequisite for reliability," he said.',
+    "We're going to rewrite the importer anyway, aren't we?",
+    "TODO: refactor notes.py and benchmark the tokenizer [high priority].",
+]
+
+
+def make_corpus(notes: int, sentences_per_note: int):
+    rng = random.Random(42)
+    return [
+        " ".join(rng.choices(SENTENCES, k=sentences_per_note)) for _ in range(notes)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=5000)
+    parser.add_argument("--sentences-per-note", type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.notes, args.sentences_per_note)
+    results = {}
+
+    print(f"{'backend':>8} {'seconds':>10} {'notes/s':>12}")
+    for name, tokenize in TOKENIZERS.items():
+        tokenize(corpus[0])  # Load stopwords and Punkt outside the timing.
+        counts = Counter()
+        started = time.perf_counter()
+        for text in corpus:
+            counts.update(tokenize(text))
+        elapsed = time.perf_counter() - started
+        results[name] = counts
+        print(f"{name:>8} {elapsed:>10.2f} {args.notes / elapsed:>12.0f}")
+
+    reference = results["nltk"]
+    for name, counts in results.items():
+        same = (
+            sum(counts.values()) == sum(reference.values())
+            and counts.most_common(10) == reference.most_common(10)
+        )
+        print(f"{name}: {'matches' if same else 'DIFFERS FROM'} nltk output")
+
+
+if __name__ == "__main__":
+    main()
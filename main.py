@@ -1,18 +1,30 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from src.routes import auth, users, notes
+from src.routes import auth, users, notes, internal
 from src.database.db import get_db
+from src.database.replicas import stick_to_primary_after_writes
+from src.services.analytics import shutdown_executors
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_executors()
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.middleware("http")(stick_to_primary_after_writes)
 
 
 app.include_router(auth.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
 app.include_router(notes.router, prefix="/api")
+app.include_router(internal.router, prefix="/api")
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -20,7 +20,10 @@ if config.config_file_name is not None:
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
-config.set_main_option("sqlalchemy.url", URI)
+# `alembic -x url=...` migrates another database, e.g. each shard in turn.
+config.set_main_option(
+    "sqlalchemy.url", context.get_x_argument(as_dictionary=True).get("url", URI)
+)
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
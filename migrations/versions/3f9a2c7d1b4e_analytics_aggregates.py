@@ -0,0 +1,64 @@
+"""analytics aggregates
+
+Revision ID: 3f9a2c7d1b4e
+Revises: 6e1c3103fbf9
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a2c7d1b4e'
+down_revision: Union[str, None] = '6e1c3103fbf9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notes', sa.Column('word_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('term_frequencies',
+    sa.Column('term', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('term')
+    )
+    op.create_index(op.f('ix_term_frequencies_count'), 'term_frequencies', ['count'], unique=False)
+    op.create_table('note_statistics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('note_count', sa.Integer(), nullable=False),
+    sa.Column('word_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Existing notes are counted by `python -m src.scripts.rebuild_analytics`.
+
+    # CREATE INDEX CONCURRENTLY does not block writes to notes, but cannot run
+    # inside a transaction. If it fails it leaves an INVALID index behind:
+    # drop it and run the migration again.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_notes_word_count'),
+            'notes',
+            ['word_count'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f('ix_notes_word_count'),
+            table_name='notes',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_table('note_statistics')
+    op.drop_index(op.f('ix_term_frequencies_count'), table_name='term_frequencies')
+    op.drop_table('term_frequencies')
+    op.drop_column('notes', 'word_count')
@@ -0,0 +1,44 @@
+"""analytics jobs
+
+Revision ID: 8b2d4e6f0a13
+Revises: 3f9a2c7d1b4e
+Create Date: 2026-10-18 11:40:05.624917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2d4e6f0a13'
+down_revision: Union[str, None] = '3f9a2c7d1b4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('analytics_jobs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('since', sa.DateTime(), nullable=True),
+    sa.Column('until', sa.DateTime(), nullable=True),
+    sa.Column('full_notes', sa.Boolean(), nullable=False),
+    sa.Column('processed_notes', sa.Integer(), nullable=False),
+    sa.Column('total_notes', sa.Integer(), nullable=True),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_analytics_jobs_status'), 'analytics_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_analytics_jobs_status'), table_name='analytics_jobs')
+    op.drop_table('analytics_jobs')
@@ -0,0 +1,59 @@
+"""notes full text search
+
+Revision ID: a3b5d7f9c1e2
+Revises: f1c8d3e5a7b2
+Create Date: 2026-10-18 18:47:03.652871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3b5d7f9c1e2'
+down_revision: Union[str, None] = 'f1c8d3e5a7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing notes are indexed afterwards with
+    # `python -m src.scripts.rebuild_search_index`.
+    if op.get_bind().dialect.name == 'sqlite':
+        op.add_column('notes', sa.Column('search_vector', sa.Text(), nullable=True))
+        op.execute(
+            "CREATE VIRTUAL TABLE notes_fts USING fts5("
+            "title, content, user_id UNINDEXED, tokenize='porter unicode61')"
+        )
+        return
+
+    op.add_column('notes', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notes_search_vector',
+            'notes',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS notes_fts")
+    else:
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                'ix_notes_search_vector',
+                table_name='notes',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    op.drop_column('notes', 'search_vector')
@@ -0,0 +1,52 @@
+"""notes shardable
+
+Revision ID: b6d8f0a2c4e7
+Revises: a3b5d7f9c1e2
+Create Date: 2026-10-18 19:58:21.408113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d8f0a2c4e7'
+down_revision: Union[str, None] = 'a3b5d7f9c1e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Names the unnamed SQLite foreign key so batch mode can drop it.
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Notes may live on another database than their user, so the foreign key
+    # goes. Shards then get their note id offsets with
+    # `python -m src.scripts.prepare_shards`.
+    if op.get_bind().dialect.name == 'sqlite':
+        # Rebuilds the table; AUTOINCREMENT makes SQLite honour the offset.
+        with op.batch_alter_table(
+            'notes',
+            recreate='always',
+            naming_convention=NAMING_CONVENTION,
+            table_kwargs={'sqlite_autoincrement': True},
+        ) as batch_op:
+            batch_op.drop_constraint('fk_notes_user_id_users', type_='foreignkey')
+        return
+
+    op.drop_constraint('notes_user_id_fkey', 'notes', type_='foreignkey')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('notes', recreate='always') as batch_op:
+            batch_op.create_foreign_key(
+                'fk_notes_user_id_users', 'users', ['user_id'], ['id']
+            )
+        return
+
+    op.create_foreign_key('notes_user_id_fkey', 'notes', 'users', ['user_id'], ['id'])
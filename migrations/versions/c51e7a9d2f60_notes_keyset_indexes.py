@@ -0,0 +1,59 @@
+"""notes keyset indexes
+
+Revision ID: c51e7a9d2f60
+Revises: 8b2d4e6f0a13
+Create Date: 2026-10-18 13:05:47.190352
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c51e7a9d2f60'
+down_revision: Union[str, None] = '8b2d4e6f0a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY does not block writes to notes, but cannot run
+    # inside a transaction. If it fails it leaves an INVALID index behind:
+    # drop it and run the migration again.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notes_user_id_updated_at_id',
+            'notes',
+            ['user_id', 'updated_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_notes_user_id_created_at_id',
+            'notes',
+            ['user_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_notes_user_id_created_at_id',
+            table_name='notes',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_notes_user_id_updated_at_id',
+            table_name='notes',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,50 @@
+"""notes soft delete
+
+Revision ID: c8e0a2b4d6f9
+Revises: b6d8f0a2c4e7
+Create Date: 2026-10-18 20:41:36.915204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e0a2b4d6f9'
+down_revision: Union[str, None] = 'b6d8f0a2c4e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A nullable column without a default is a catalog-only change.
+    op.add_column('notes', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    # Partial index: it only ever holds the notes waiting to be purged.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notes_deleted_at',
+            'notes',
+            ['deleted_at'],
+            unique=False,
+            postgresql_where=sa.text('deleted_at IS NOT NULL'),
+            sqlite_where=sa.text('deleted_at IS NOT NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Soft-deleted notes would reappear: purge them first with
+    # `python -m src.scripts.purge_deleted_notes --once`.
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_notes_deleted_at',
+            table_name='notes',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('notes', 'deleted_at')
@@ -0,0 +1,105 @@
+"""note version counter
+
+Revision ID: d7f3b8a1c2e9
+Revises: c51e7a9d2f60
+Create Date: 2026-10-18 14:21:33.508116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7f3b8a1c2e9'
+down_revision: Union[str, None] = 'c51e7a9d2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notes', sa.Column('current_version', sa.Integer(), server_default='0', nullable=False))
+    # Concurrent updates could previously store the same version number twice;
+    # renumber every note's versions in their existing order first.
+    if op.get_bind().dialect.name == 'sqlite':
+        # SQLite only has UPDATE ... FROM since 3.33; rank into a temporary
+        # table and use correlated subqueries instead.
+        op.execute(
+            """
+            CREATE TEMPORARY TABLE ranked_note_versions AS
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY note_id ORDER BY version_number, id
+            ) AS version_number
+            FROM note_versions
+            """
+        )
+        op.execute(
+            """
+            UPDATE note_versions SET version_number = (
+                SELECT ranked.version_number FROM ranked_note_versions AS ranked
+                WHERE ranked.id = note_versions.id
+            )
+            WHERE id IN (
+                SELECT ranked.id FROM ranked_note_versions AS ranked
+                JOIN note_versions AS stored ON stored.id = ranked.id
+                WHERE stored.version_number <> ranked.version_number
+            )
+            """
+        )
+        op.execute("DROP TABLE ranked_note_versions")
+        op.execute(
+            """
+            UPDATE notes SET current_version = (
+                SELECT MAX(version_number) FROM note_versions
+                WHERE note_versions.note_id = notes.id
+            )
+            WHERE id IN (SELECT note_id FROM note_versions)
+            """
+        )
+        # SQLite cannot add constraints in place; batch mode rebuilds the table.
+        with op.batch_alter_table('note_versions') as batch_op:
+            batch_op.create_unique_constraint(
+                'uq_note_versions_note_id_version_number', ['note_id', 'version_number']
+            )
+        return
+
+    op.execute(
+        """
+        UPDATE note_versions SET version_number = ranked.version_number
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY note_id ORDER BY version_number, id
+            ) AS version_number
+            FROM note_versions
+        ) AS ranked
+        WHERE note_versions.id = ranked.id
+          AND note_versions.version_number <> ranked.version_number
+        """
+    )
+    op.execute(
+        """
+        UPDATE notes SET current_version = latest.version_number
+        FROM (
+            SELECT note_id, MAX(version_number) AS version_number
+            FROM note_versions
+            GROUP BY note_id
+        ) AS latest
+        WHERE notes.id = latest.note_id
+        """
+    )
+    op.create_unique_constraint('uq_note_versions_note_id_version_number', 'note_versions', ['note_id', 'version_number'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('note_versions') as batch_op:
+            batch_op.drop_constraint('uq_note_versions_note_id_version_number', type_='unique')
+        with op.batch_alter_table('notes') as batch_op:
+            batch_op.drop_column('current_version')
+        return
+
+    op.drop_constraint('uq_note_versions_note_id_version_number', 'note_versions', type_='unique')
+    op.drop_column('notes', 'current_version')
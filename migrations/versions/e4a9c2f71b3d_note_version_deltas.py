@@ -0,0 +1,32 @@
+"""note version deltas
+
+Revision ID: e4a9c2f71b3d
+Revises: d7f3b8a1c2e9
+Create Date: 2026-10-18 16:05:12.840219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c2f71b3d'
+down_revision: Union[str, None] = 'd7f3b8a1c2e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing versions stay full snapshots (NULL); convert them afterwards
+    # with `python -m src.scripts.encode_versions`.
+    op.add_column('note_versions', sa.Column('snapshot_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Deltas cannot be read without the column; run
+    # `python -m src.scripts.encode_versions --mode full` before downgrading.
+    op.drop_column('note_versions', 'snapshot_version')
@@ -0,0 +1,45 @@
+"""notes user_id id index
+
+Revision ID: f1c8d3e5a7b2
+Revises: e4a9c2f71b3d
+Create Date: 2026-10-18 17:32:47.196305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c8d3e5a7b2'
+down_revision: Union[str, None] = 'e4a9c2f71b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY does not block writes to notes, but cannot run
+    # inside a transaction. If it fails it leaves an INVALID index behind:
+    # drop it and run the migration again.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notes_user_id_id',
+            'notes',
+            ['user_id', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_notes_user_id_id',
+            table_name='notes',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
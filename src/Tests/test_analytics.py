@@ -1,11 +1,15 @@
 from datetime import datetime
 
+import numpy as np
 import pytest
 from unittest.mock import MagicMock
 from sqlalchemy.orm import Session
-from src.services.analytics import AnalyticsService
-from src.schemas import NoteAnalytics
+from src.services import analytics
+from src.services.analytics import AnalyticsService, describe_distribution
+from src.schemas import NoteAnalytics, NoteCreate, NoteUpdate
+from src.database import models
 from src.database.models import Note
+from src.repository.notes import create_note, update_note, delete_note
 
 
 @pytest.fixture
@@ -20,9 +24,9 @@ def analytics_service(mock_db_session):
 
 def test_get_notes_analytics_empty(analytics_service):
 
-    analytics_service.db.query.return_value.all.return_value = []
+    analytics_service.db.execute.return_value.partitions.return_value = []
 
-    result = analytics_service.get_notes_analytics()
+    result = analytics_service.scan_notes_analytics()
 
     assert isinstance(result, NoteAnalytics)
     assert result.total_word_count == 0
@@ -50,9 +54,15 @@ def test_get_notes_analytics_with_notes(analytics_service):
         updated_at=datetime.now(),
         user_id=1
     )
-    analytics_service.db.query.return_value.all.return_value = [note1, note2]
+    analytics_service.db.execute.return_value.partitions.return_value = [
+        [(note1.id, note1.content), (note2.id, note2.content)]
+    ]
+    analytics_service.db.query.return_value.options.return_value.filter.return_value = [
+        note1,
+        note2,
+    ]
 
-    result = analytics_service.get_notes_analytics()
+    result = analytics_service.scan_notes_analytics()
     assert isinstance(result, NoteAnalytics)
     assert result.total_word_count > 0
     assert result.average_note_length > 0
@@ -83,5 +93,197 @@ def test_get_most_common_words(analytics_service):
     assert sorted(common_words) == sorted(expected_common)
 
 
+@pytest.fixture
+def clean_db(session):
+    models.Base.metadata.drop_all(bind=session.get_bind())
+    models.Base.metadata.create_all(bind=session.get_bind())
+
+
+@pytest.mark.asyncio
+async def test_aggregates_follow_note_writes(session, async_session, clean_db):
+    note = await create_note(
+        NoteCreate(title="First", content="Apples and oranges, apples again."),
+        user_id=1,
+        db=async_session,
+    )
+    await create_note(
+        NoteCreate(title="Second", content="Oranges are orange."), user_id=1, db=async_session
+    )
+    await update_note(note.id, NoteUpdate(content="Pears only."), db=async_session)
+
+    analytics_service = AnalyticsService(db=session)
+    result = analytics_service.get_notes_analytics()
+    scanned = analytics_service.scan_notes_analytics()
+    assert result.total_word_count == scanned.total_word_count == 3
+    assert dict(result.most_common_words) == {"oranges": 1, "orange": 1, "pears": 1}
+
+    await delete_note(note.id, db=async_session)
+
+    result = analytics_service.get_notes_analytics()
+    assert result.total_word_count == 2
+    assert result.average_note_length == 2.0
+    assert [n.title for n in result.longest_notes] == ["Second"]
+
+
+def test_scan_notes_analytics_streams_in_chunks(session, clean_db):
+    session.add_all(
+        Note(title=f"Note {i}", content=" ".join(["word"] * i), user_id=1)
+        for i in range(1, 8)
+    )
+    session.commit()
+
+    result = AnalyticsService(db=session, chunk_size=2).scan_notes_analytics()
+
+    assert result.total_word_count == 28
+    assert result.average_note_length == 4.0
+    assert result.most_common_words == [("word", 28)]
+    assert [n.title for n in result.longest_notes] == ["Note 7", "Note 6", "Note 5"]
+    assert [n.title for n in result.shortest_notes] == ["Note 1", "Note 2", "Note 3"]
+
+
+def test_scan_notes_analytics_with_process_pool(session, clean_db):
+    session.add_all(
+        Note(title=f"Note {i}", content=f"Shared words and note number{i}.", user_id=1)
+        for i in range(1, 10)
+    )
+    session.commit()
+
+    serial = AnalyticsService(db=session, chunk_size=2, workers=1)
+    parallel = AnalyticsService(db=session, chunk_size=2, workers=2)
+
+    expected = serial.scan_notes_analytics()
+    result = parallel.scan_notes_analytics()
+
+    assert result.total_word_count == expected.total_word_count == 36
+    assert result.most_common_words == expected.most_common_words
+    assert [n.id for n in result.longest_notes] == [n.id for n in expected.longest_notes]
+
+
+def test_worker_processes_are_spawned_and_shut_down():
+    executor = analytics._get_executor(2)
+    assert analytics._get_executor(2) is executor
+    assert executor._mp_context.get_start_method() == "spawn"
+
+    analytics.shutdown_executors()
+
+    assert analytics._get_executor(2) is not executor
+    analytics.shutdown_executors()
+
+
+def test_rebuild_aggregates(session, clean_db):
+    session.add_all(
+        [
+            Note(title="Old", content="Legacy note about legacy data.", user_id=1),
+            Note(title="Older", content="Another legacy record.", user_id=1),
+        ]
+    )
+    session.commit()
+
+    analytics_service = AnalyticsService(db=session)
+    assert analytics_service.get_notes_analytics().total_word_count == 0
+
+    assert analytics_service.rebuild_aggregates() == 2
+
+    result = analytics_service.get_notes_analytics()
+    scanned = analytics_service.scan_notes_analytics()
+    assert result.total_word_count == scanned.total_word_count
+    assert dict(result.most_common_words) == dict(scanned.most_common_words)
+    assert result.most_common_words[0] == ("legacy", 3)
+
+
+def test_get_notes_analytics_filters_by_user_and_window(session, clean_db):
+    session.add_all(
+        [
+            Note(
+                title="Mine old",
+                content="Quarterly budget review.",
+                user_id=1,
+                updated_at=datetime(2024, 1, 10),
+            ),
+            Note(
+                title="Mine new",
+                content="Budget approved for launch.",
+                user_id=1,
+                updated_at=datetime(2024, 3, 10),
+            ),
+            Note(
+                title="Theirs",
+                content="Unrelated budget chatter.",
+                user_id=2,
+                updated_at=datetime(2024, 3, 12),
+            ),
+        ]
+    )
+    session.commit()
+
+    analytics_service = AnalyticsService(db=session)
+
+    result = analytics_service.get_notes_analytics(user_id=1)
+    assert result.total_word_count == 6
+    assert {n.title for n in result.longest_notes} == {"Mine old", "Mine new"}
+
+    result = analytics_service.get_notes_analytics(
+        since=datetime(2024, 3, 1), until=datetime(2024, 4, 1)
+    )
+    assert result.total_word_count == 6
+    assert result.most_common_words[0] == ("budget", 2)
+
+    result = analytics_service.get_notes_analytics(
+        user_id=1, since=datetime(2024, 3, 1)
+    )
+    assert [n.title for n in result.longest_notes] == ["Mine new"]
+
+
+def test_describe_distribution():
+    distribution = describe_distribution(np.arange(1, 101), bins=4)
+
+    assert distribution.count == 100
+    assert distribution.mean == 50.5
+    assert distribution.p50 == 50.5
+    assert distribution.p90 == pytest.approx(90.1)
+    assert distribution.p99 == pytest.approx(99.01)
+    assert distribution.max == 100
+    assert [bucket.count for bucket in distribution.histogram] == [25, 25, 25, 25]
+    assert distribution.histogram[0].lower == 1.0
+    assert distribution.histogram[-1].upper == 100.0
+    assert describe_distribution(np.empty(0)) is None
+
+
+@pytest.mark.asyncio
+async def test_get_notes_analytics_distributions(
+    session, async_session, clean_db
+):
+    notes = [
+        await create_note(
+            NoteCreate(title=f"Note {i}", content=" ".join(["word"] * i)),
+            user_id=1,
+            db=async_session,
+        )
+        for i in range(1, 11)
+    ]
+    await update_note(notes[0].id, NoteUpdate(content="Café"), db=async_session)
+
+    analytics_service = AnalyticsService(db=session, chunk_size=3)
+    assert analytics_service.get_notes_analytics().word_count_distribution is None
+
+    aggregated = analytics_service.get_notes_analytics(distributions=True)
+    scanned = analytics_service.get_notes_analytics(user_id=1, distributions=True)
+
+    for result in (aggregated, scanned):
+        assert result.word_count_distribution.count == 10
+        assert result.word_count_distribution.p50 == 5.5
+        assert result.word_count_distribution.max == 10
+        assert result.note_bytes_distribution.count == 10
+        assert result.note_bytes_distribution.max == len(" ".join(["word"] * 10))
+        assert result.version_bytes_distribution.count == 11
+        assert sum(b.count for b in result.version_bytes_distribution.histogram) == 11
+
+    notes_bytes = sorted(
+        len(n.content.encode()) for n in session.query(Note).all()
+    )
+    assert scanned.note_bytes_distribution.p50 == np.percentile(notes_bytes, 50)
+    assert min(notes_bytes) == 5  # "Café" is 4 characters but 5 bytes
+
+
 if __name__ == "__main__":
     pytest.main()
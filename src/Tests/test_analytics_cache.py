@@ -0,0 +1,96 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from src.schemas import NoteAnalytics, NoteCreate
+from src.repository.notes import create_note
+from src.services.analytics_cache import AnalyticsCache, analytics_cache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis_client = FakeRedis()
+    monkeypatch.setattr(analytics_cache, "redis_db", redis_client)
+    return redis_client
+
+
+def make_analytics(total_word_count):
+    return NoteAnalytics(
+        total_word_count=total_word_count,
+        average_note_length=float(total_word_count),
+        most_common_words=[("word", total_word_count)],
+        longest_notes=[],
+        shortest_notes=[],
+    )
+
+
+@pytest.mark.asyncio
+async def test_key_depends_on_query_parameters():
+    cache = AnalyticsCache(FakeRedis(), ttl=60)
+
+    keys = {
+        await cache.key_for(),
+        await cache.key_for(user_id=1),
+        await cache.key_for(user_id=1, since=datetime(2024, 1, 1)),
+        await cache.key_for(user_id=1, until=datetime(2024, 1, 1)),
+        await cache.key_for(user_id=1, full_notes=True),
+    }
+
+    assert len(keys) == 5
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_user_and_global_entries():
+    cache = AnalyticsCache(FakeRedis(), ttl=60)
+    user_key = await cache.key_for(user_id=1)
+    other_key = await cache.key_for(user_id=2)
+    global_key = await cache.key_for()
+    for key in (user_key, other_key, global_key):
+        await cache.set(key, make_analytics(3))
+
+    await cache.invalidate(1)
+
+    assert await cache.get(await cache.key_for(user_id=1)) is None
+    assert await cache.get(await cache.key_for()) is None
+    assert await cache.get(await cache.key_for(user_id=2)) == make_analytics(3)
+
+
+@pytest.mark.asyncio
+async def test_stats_route_serves_repeat_hits_from_cache(
+    client, async_session, user, fake_redis
+):
+    await create_note(
+        NoteCreate(title="Cached", content="Cache me twice."), user_id=user["id"], db=async_session
+    )
+    params = {"user_id": user["id"]}
+
+    first = client.get("api/notes/analytics/stats", params=params)
+    assert first.status_code == 200
+
+    with patch("src.routes.notes.AnalyticsService") as service:
+        second = client.get("api/notes/analytics/stats", params=params)
+    service.assert_not_called()
+    assert second.json() == first.json()
+
+    await create_note(
+        NoteCreate(title="Fresh", content="New words arrive."), user_id=user["id"], db=async_session
+    )
+
+    third = client.get("api/notes/analytics/stats", params=params)
+    assert third.json()["total_word_count"] > first.json()["total_word_count"]
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from src.database import models
+from src.schemas import NoteCreate
+from src.repository.notes import create_note
+
+
+@pytest.fixture
+def clean_db(session):
+    models.Base.metadata.drop_all(bind=session.get_bind())
+    models.Base.metadata.create_all(bind=session.get_bind())
+
+
+@pytest.mark.asyncio
+async def test_analytics_job_runs_in_background(
+    client, async_session, user, clean_db
+):
+    for content in ("Alpha beta gamma.", "Beta gamma.", "Gamma."):
+        await create_note(
+            NoteCreate(title="Job note", content=content), user_id=user["id"], db=async_session
+        )
+
+    response = client.post(
+        "api/notes/analytics/jobs", params={"user_id": user["id"]}
+    )
+
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+
+    response = client.get(f"api/notes/analytics/jobs/{job_id}")
+
+    assert response.status_code == 200
+    job = response.json()
+    assert job["status"] == "done"
+    assert job["processed_notes"] == job["total_notes"] == 3
+    assert job["result"]["total_word_count"] == 6
+    assert job["result"]["most_common_words"][0] == ["gamma", 3]
+    assert job["finished_at"] is not None
+
+
+def test_analytics_job_is_shared_while_running(client, session, clean_db):
+    with patch("src.routes.notes.run_analytics_job") as run_job:
+        first = client.post("api/notes/analytics/jobs").json()
+        second = client.post("api/notes/analytics/jobs").json()
+        other = client.post("api/notes/analytics/jobs", params={"user_id": 2}).json()
+
+    assert first["id"] == second["id"]
+    assert first["status"] == "pending"
+    assert other["id"] != first["id"]
+    assert run_job.call_count == 2
+
+
+def test_stale_analytics_job_is_not_shared(client, session, clean_db):
+    with patch("src.routes.notes.run_analytics_job"):
+        first = client.post("api/notes/analytics/jobs").json()
+        # The worker running it died long ago.
+        session.get(models.AnalyticsJob, first["id"]).created_at = (
+            datetime.utcnow() - timedelta(days=1)
+        )
+        session.commit()
+        second = client.post("api/notes/analytics/jobs").json()
+
+    assert second["id"] != first["id"]
+
+
+@pytest.mark.parametrize("method", ["count_notes", "get_notes_analytics"])
+def test_analytics_job_records_failure(client, session, clean_db, method):
+    with patch(
+        f"src.services.analytics_jobs.AnalyticsService.{method}",
+        side_effect=RuntimeError("boom"),
+    ):
+        job_id = client.post("api/notes/analytics/jobs").json()["id"]
+
+    job = client.get(f"api/notes/analytics/jobs/{job_id}").json()
+
+    assert job["status"] == "failed"
+    assert job["error"] == "boom"
+    assert job["result"] is None
+
+
+def test_get_missing_analytics_job(client):
+    response = client.get("api/notes/analytics/jobs/missing")
+
+    assert response.status_code == 404
@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import Text, select, type_coerce
+
+from src.database import models
+from src.database.types import MARKER, compress_text, decompress_text
+from src.repository.notes import create_note, get_note, update_note
+from src.schemas import NoteCreate, NoteUpdate
+from src.services.content_compression import recompress_content
+
+LONG_TEXT = "The quarterly report is due on Friday. " * 100
+
+
+@pytest.fixture(autouse=True)
+def clean_db(session):
+    models.Base.metadata.drop_all(bind=session.get_bind())
+    models.Base.metadata.create_all(bind=session.get_bind())
+
+
+def stored_content(session, model):
+    session.expire_all()
+    return session.scalars(
+        select(type_coerce(model.content, Text)).order_by(model.id)
+    ).all()
+
+
+@pytest.mark.parametrize("codec", ["none", "zlib", "zstd"])
+def test_round_trip(codec):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    for text in ["", "short", LONG_TEXT, MARKER + "starts with the marker", "ü" * 2000]:
+        assert decompress_text(compress_text(text, codec)) == text
+
+
+def test_only_large_compressible_text_is_compressed():
+    assert compress_text("short", "zlib") == "short"
+    assert compress_text(LONG_TEXT, "zlib").startswith(MARKER + "z")
+    assert len(compress_text(LONG_TEXT, "zlib")) < len(LONG_TEXT) / 10
+    assert compress_text(LONG_TEXT, "none") == LONG_TEXT
+    # Plain text that looks compressed is escaped rather than misread.
+    assert decompress_text(compress_text(MARKER + "z", "zlib")) == MARKER + "z"
+
+
+@pytest.mark.asyncio
+async def test_notes_and_versions_are_stored_compressed(session, async_session, user):
+    note = await create_note(
+        NoteCreate(title="Report", content=LONG_TEXT), user["id"], async_session
+    )
+    await update_note(
+        note.id, NoteUpdate(content=LONG_TEXT + "Signed."), async_session
+    )
+
+    [note_content] = stored_content(session, models.Note)
+    assert note_content.startswith(MARKER)
+    assert len(note_content) < len(LONG_TEXT) / 10
+    # The second version is a small delta and stays plain.
+    first, second = stored_content(session, models.NoteVersion)
+    assert first.startswith(MARKER)
+    assert not second.startswith(MARKER)
+
+    note = await get_note(note.id, async_session)
+    assert note.content == LONG_TEXT + "Signed."
+    assert [v.content for v in note.versions] == [LONG_TEXT, LONG_TEXT + "Signed."]
+
+
+def test_recompress_existing_rows_in_batches(session, user):
+    # Rows written before compression existed hold plain text.
+    for i in range(3):
+        session.execute(
+            models.Note.__table__.insert().values(
+                title=f"Note {i}", content=type_coerce(LONG_TEXT, Text), user_id=user["id"]
+            )
+        )
+    session.commit()
+    assert stored_content(session, models.Note) == [LONG_TEXT] * 3
+
+    stats = recompress_content(session, "zlib", batch_size=2)
+
+    assert stats["rows"] == stats["rewritten"] == 3
+    assert stats["bytes_after"] < stats["bytes_before"] / 10
+    assert all(value.startswith(MARKER) for value in stored_content(session, models.Note))
+    assert [note.content for note in session.scalars(select(models.Note))] == [
+        LONG_TEXT
+    ] * 3
+    assert recompress_content(session, "zlib")["rewritten"] == 0
+
+    recompress_content(session, "none")
+    assert stored_content(session, models.Note) == [LONG_TEXT] * 3
@@ -0,0 +1,17 @@
+import pytest
+
+from src.services.note_import import iter_ndjson_items
+
+
+async def chunked(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_iter_ndjson_items_joins_lines_split_across_chunks():
+    chunks = chunked(b'{"title": "a"', b', "content": "b"}\n\n{"ti', b'tle": "c"}')
+
+    lines = [line async for line in iter_ndjson_items(chunks)]
+
+    assert lines == [b'{"title": "a", "content": "b"}', b'{"title": "c"}']
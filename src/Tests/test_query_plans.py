@@ -0,0 +1,176 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from src.database import models
+from src.repository import analytics_jobs as analytics_jobs_repository
+from src.repository import notes as notes_repository
+from src.repository import search as search_repository
+from src.repository import users as users_repository
+from src.schemas import NoteUpdate
+
+TABLES = ("notes", "note_versions", "users", "analytics_jobs")
+
+
+@pytest.fixture(autouse=True)
+def seeded_db(session, user):
+    models.Base.metadata.drop_all(bind=session.get_bind())
+    models.Base.metadata.create_all(bind=session.get_bind())
+    start = datetime(2024, 1, 1)
+    for user_id in (user["id"], 2):
+        for i in range(20):
+            note = models.Note(
+                title=f"Note {i}",
+                content="Content",
+                user_id=user_id,
+                created_at=start + timedelta(minutes=i),
+                updated_at=start + timedelta(minutes=i),
+                current_version=3,
+            )
+            note.versions = [
+                models.NoteVersion(version_number=n, content=f"Version {n}")
+                for n in range(1, 4)
+            ]
+            session.add(note)
+    session.commit()
+
+
+@contextmanager
+def captured_queries(async_session):
+    queries = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            queries.append((statement, parameters))
+
+    engine = async_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def query_plans(session, queries):
+    """The `EXPLAIN QUERY PLAN` steps of each captured query."""
+    connection = session.connection()
+    plans = [
+        (
+            statement,
+            [
+                row[-1]
+                for row in connection.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters
+                )
+            ],
+        )
+        for statement, parameters in queries
+    ]
+    session.rollback()
+    return plans
+
+
+def is_full_scan(step):
+    return any(
+        step == f"SCAN {table}" or step.startswith(f"SCAN {table} ")
+        for table in TABLES
+    )
+
+
+def full_scans(session, queries):
+    return [
+        (statement, step)
+        for statement, plan in query_plans(session, queries)
+        for step in plan
+        if is_full_scan(step)
+    ]
+
+
+async def delete_and_purge(db):
+    await notes_repository.delete_note(1, db)
+    await notes_repository.purge_deleted_notes(db, 2)
+    await notes_repository.purge_deleted_notes(db, 2)
+
+
+HOT_PATHS = {
+    "get_note": lambda db, user_id: notes_repository.get_note(1, db),
+    "get_note_for_update": lambda db, user_id: notes_repository.get_note(
+        1, db, for_update=True
+    ),
+    "note_exists": lambda db, user_id: notes_repository.note_exists(1, db),
+    "get_user_notes": lambda db, user_id: notes_repository.get_user_notes(
+        user_id, db, include_versions=True
+    ),
+    "get_user_notes_page": lambda db, user_id: notes_repository.get_user_notes_page(
+        user_id, db, 5, include_versions=True, versions_limit=2
+    ),
+    "get_note_versions": lambda db, user_id: notes_repository.get_note_versions(1, db),
+    "get_note_versions_page": lambda db, user_id: notes_repository.get_note_versions_page(
+        1, db, 2
+    ),
+    "get_latest_version_number": (
+        lambda db, user_id: notes_repository.get_latest_version_number(1, db)
+    ),
+    "get_version_snapshots": lambda db, user_id: (
+        notes_repository.get_version_snapshots(1, [2, 3], db)
+    ),
+    "load_version_spans": lambda db, user_id: notes_repository.load_version_spans(
+        1, [(1, 3)], db
+    ),
+    "update_note": lambda db, user_id: notes_repository.update_note(
+        1, NoteUpdate(content="New content"), db
+    ),
+    "delete_and_purge": lambda db, user_id: delete_and_purge(db),
+    "search_notes": lambda db, user_id: search_repository.search_notes(
+        user_id, "content", db
+    ),
+    "get_user_by_email": lambda db, user_id: users_repository.get_user_by_email(
+        "ex@ex.com", db
+    ),
+    "get_user_by_name": lambda db, user_id: users_repository.get_user_by_name(
+        "ex", db
+    ),
+    "get_active_job": lambda db, user_id: analytics_jobs_repository.get_active_job(
+        user_id, None, None, False, db
+    ),
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", HOT_PATHS)
+async def test_hot_path_uses_indexes(name, session, async_session, user):
+    with captured_queries(async_session) as queries:
+        await HOT_PATHS[name](async_session, user["id"])
+
+    assert queries
+    assert full_scans(session, queries) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_by", ["updated_at", "created_at"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+async def test_user_notes_pages_use_indexes(
+    sort_by, order, session, async_session, user
+):
+    _, cursor = await notes_repository.get_user_notes_page(
+        user["id"], async_session, 5, sort_by=sort_by, order=order
+    )
+    with captured_queries(async_session) as queries:
+        await notes_repository.get_user_notes_page(
+            user["id"], async_session, 5, cursor, sort_by, order
+        )
+
+    assert full_scans(session, queries) == []
+
+
+@pytest.mark.asyncio
+async def test_stream_user_notes_reads_index_in_order(session, async_session, user):
+    with captured_queries(async_session) as queries:
+        async for _ in notes_repository.stream_user_notes(user["id"], async_session, 5):
+            pass
+
+    # Sorting the notes first would delay the first chunk of an export.
+    [(_, plan)] = query_plans(session, queries)
+    assert plan == ["SEARCH notes USING INDEX ix_notes_user_id_id (user_id=?)"]
@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from src.database import models, replicas
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch, session):
+    """A second SQLite database standing in for a replica of test.db."""
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}", poolclass=NullPool
+    )
+    models.Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(replicas, "ReplicaSessions", [sessionmaker(bind=engine)])
+    monkeypatch.setattr(
+        replicas,
+        "AsyncReplicaSessions",
+        [async_sessionmaker(bind=async_engine, expire_on_commit=False)],
+    )
+
+    models.Base.metadata.drop_all(bind=session.get_bind())
+    models.Base.metadata.create_all(bind=session.get_bind())
+    # The same notes on both sides; the titles tell which one served a read.
+    replica_session = sessionmaker(bind=engine)()
+    for db, title in [(session, "On primary"), (replica_session, "On replica")]:
+        db.add(models.Note(id=1, title=title, content="Replicated words.", user_id=1))
+        db.add(models.Note(id=2, title=title, content="Deleted soon.", user_id=1))
+        db.commit()
+    replica_session.close()
+
+    yield
+    engine.dispose()
+
+
+def test_reads_are_served_by_the_replica(client, replica):
+    client.cookies.clear()
+
+    assert client.get("api/notes/1").json()["title"] == "On replica"
+    page = client.get("api/notes/user/1").json()
+    assert {note["title"] for note in page["items"]} == {"On replica"}
+    analytics = client.get("api/notes/analytics/stats", params={"user_id": 1}).json()
+    assert analytics["longest_notes"][0]["title"] == "On replica"
+
+
+def test_reads_stick_to_the_primary_after_a_write(client, replica):
+    client.cookies.clear()
+
+    response = client.delete("api/notes/2")
+
+    assert response.status_code == 200
+    assert replicas.STICKY_COOKIE in response.cookies
+    assert client.get("api/notes/1").json()["title"] == "On primary"
+
+    client.cookies.clear()
+    assert client.get("api/notes/1").json()["title"] == "On replica"
+
+
+def test_failed_writes_do_not_stick(client, replica):
+    client.cookies.clear()
+
+    response = client.delete("api/notes/999")
+
+    assert response.status_code == 404
+    assert replicas.STICKY_COOKIE not in response.cookies
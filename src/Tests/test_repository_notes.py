@@ -1,17 +1,34 @@
+import asyncio
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
 import pytest
+from sqlalchemy import event, func, select, update
+from sqlalchemy.exc import IntegrityError
 
+from src.conf.config import settings
 from src.database import models
+from src.repository import notes as notes_repository
 from src.repository.notes import (
     create_note,
+    create_notes_bulk,
     get_note,
+    get_note_versions_page,
     get_user_notes,
+    get_user_notes_page,
+    load_versions,
+    stream_user_notes,
     update_note,
     delete_note,
     create_version,
     get_latest_version_number,
-    get_note_versions
+    get_note_versions,
+    note_exists,
+    purge_deleted_notes,
 )
 from src.schemas import NoteCreate, NoteUpdate
+from src.services import note_purge
 
 
 @pytest.fixture(autouse=True)
@@ -21,9 +38,9 @@ def clean_db(session):
 
 
 @pytest.mark.asyncio
-async def test_create_note(session, user):
+async def test_create_note(async_session, user):
     note_data = NoteCreate(title="Test Note", content="This is a test note.")
-    note = await create_note(note_data, user_id=user['id'], db=session)
+    note = await create_note(note_data, user_id=user['id'], db=async_session)
 
     assert note.title == note_data.title
     assert note.content == note_data.content
@@ -31,83 +48,478 @@ async def test_create_note(session, user):
 
 
 @pytest.mark.asyncio
-async def test_get_note(session):
+async def test_get_note(async_session):
     note_data = NoteCreate(title="Test Note", content="This is a test note.")
-    note = await create_note(note_data, user_id=1, db=session)
+    note = await create_note(note_data, user_id=1, db=async_session)
 
-    retrieved_note = await get_note(note.id, db=session)
+    retrieved_note = await get_note(note.id, db=async_session)
     assert retrieved_note is not None
     assert retrieved_note.id == note.id
     assert retrieved_note.title == note_data.title
 
 
 @pytest.mark.asyncio
-async def test_get_user_notes(session, user):
+async def test_get_user_notes(async_session, user):
     note_data1 = NoteCreate(title="Test Note 1", content="Content 1")
     note_data2 = NoteCreate(title="Test Note 2", content="Content 2")
-    await create_note(note_data1, user_id=user['id'], db=session)
-    await create_note(note_data2, user_id=user['id'], db=session)
+    await create_note(note_data1, user_id=user['id'], db=async_session)
+    await create_note(note_data2, user_id=user['id'], db=async_session)
 
-    notes = await get_user_notes(user['id'], db=session)
+    notes = await get_user_notes(user['id'], db=async_session)
     assert len(notes) == 2
 
 
 @pytest.mark.asyncio
-async def test_update_note(session):
+async def test_update_note(async_session):
     note_data = NoteCreate(title="Test Note", content="This is a test note.")
-    note = await create_note(note_data, user_id=1, db=session)
+    note = await create_note(note_data, user_id=1, db=async_session)
 
     update_data = NoteUpdate(title="Updated Test Note", content="Updated content.")
-    updated_note = await update_note(note.id, update_data, db=session)
+    updated_note = await update_note(note.id, update_data, db=async_session)
 
     assert updated_note.title == update_data.title
     assert updated_note.content == update_data.content
 
 
 @pytest.mark.asyncio
-async def test_delete_note(session):
+async def test_delete_note(async_session):
     note_data = NoteCreate(title="Test Note", content="This is a test note.")
-    note = await create_note(note_data, user_id=1, db=session)
+    note = await create_note(note_data, user_id=1, db=async_session)
 
-    result = await delete_note(note.id, db=session)
+    result = await delete_note(note.id, db=async_session)
     assert result is True
 
-    deleted_note = await get_note(note.id, db=session)
+    deleted_note = await get_note(note.id, db=async_session)
     assert deleted_note is None
+    assert await delete_note(note.id, db=async_session) is False
 
 
 @pytest.mark.asyncio
-async def test_create_version(session):
+async def test_deleted_note_is_hidden_until_purged(session, async_session, user):
+    note = await create_note(
+        NoteCreate(title="Doomed", content="Version 1"), user["id"], async_session
+    )
+    kept = await create_note(
+        NoteCreate(title="Kept", content="Stays"), user["id"], async_session
+    )
+    for i in range(2, 6):
+        await update_note(note.id, NoteUpdate(content=f"Version {i}"), async_session)
+
+    await delete_note(note.id, async_session)
+
+    assert not await note_exists(note.id, async_session)
+    assert await get_latest_version_number(note.id, async_session) == 0
+    assert [n.id for n in await get_user_notes(user["id"], async_session)] == [kept.id]
+    page, _ = await get_user_notes_page(user["id"], async_session)
+    assert [n.id for n in page] == [kept.id]
+    streamed = [
+        n.id
+        async for chunk in stream_user_notes(user["id"], async_session, 10)
+        for n in chunk
+    ]
+    assert streamed == [kept.id]
+    # Nothing is removed until the purge.
+    assert session.get(models.Note, note.id).deleted_at is not None
+
+    assert await purge_deleted_notes(async_session, batch_size=2) == (2, 0)
+    assert await purge_deleted_notes(async_session, batch_size=2) == (2, 0)
+    assert await purge_deleted_notes(async_session, batch_size=2) == (1, 0)
+    assert await purge_deleted_notes(async_session, batch_size=2) == (0, 1)
+    assert await purge_deleted_notes(async_session, batch_size=2) == (0, 0)
+
+    session.expire_all()
+    assert session.get(models.Note, note.id) is None
+    assert session.scalars(select(models.NoteVersion.note_id)).all() == [kept.id]
+
+
+@pytest.mark.asyncio
+async def test_purge_service_drains_in_throttled_batches(
+    async_session_factory, async_session, user, monkeypatch
+):
+    pauses = []
+
+    async def sleep(seconds):
+        pauses.append(seconds)
+
+    monkeypatch.setattr(note_purge.asyncio, "sleep", sleep)
+    for i in range(3):
+        note = await create_note(
+            NoteCreate(title=f"Note {i}", content="Gone"), user["id"], async_session
+        )
+        await delete_note(note.id, async_session)
+
+    purged = await note_purge.purge_deleted_notes(
+        async_session_factory, batch_size=2, pause=0.25
+    )
+
+    assert purged == (3, 3)
+    assert pauses == [0.25] * 4
+
+
+@pytest.mark.asyncio
+async def test_create_version(async_session):
     note_data = NoteCreate(title="Test Note", content="This is a test note.")
-    note = await create_note(note_data, user_id=1, db=session)
+    note = await create_note(note_data, user_id=1, db=async_session)
+
+    version = await create_version(note.id, "New content", db=async_session)
+    await async_session.commit()
 
-    version = await create_version(note.id, note.content, 1, db=session)
     assert version.note_id == note.id
-    assert version.content == note.content
-    assert version.version_number == 1
+    assert version.content == "New content"
+    assert version.version_number == 2
 
 
 @pytest.mark.asyncio
-async def test_get_latest_version_number(session):
+async def test_get_latest_version_number(async_session):
     note_data = NoteCreate(title="Test Note", content="This is a test note.")
-    note = await create_note(note_data, user_id=1, db=session)
+    note = await create_note(note_data, user_id=1, db=async_session)
 
-    await create_version(note.id, note.content, 1, db=session)
-    latest_version_number = await get_latest_version_number(note.id, db=session)
+    assert await get_latest_version_number(note.id, db=async_session) == 1
 
-    assert latest_version_number == 1
+    await create_version(note.id, "New content", db=async_session)
+    await async_session.commit()
+
+    assert await get_latest_version_number(note.id, db=async_session) == 2
 
 
 @pytest.mark.asyncio
-async def test_get_note_versions(session):
+async def test_get_note_versions(async_session):
     note_data = NoteCreate(title="Test Note", content="This is a test note.")
-    note = await create_note(note_data, user_id=1, db=session)
+    note = await create_note(note_data, user_id=1, db=async_session)
 
-    await create_version(note.id, "New content", 2, db=session)
-    await create_version(note.id, "Updated content", 3, db=session)
+    await update_note(note.id, NoteUpdate(content="New content"), db=async_session)
+    await update_note(note.id, NoteUpdate(content="Updated content"), db=async_session)
 
-    versions = await get_note_versions(note.id, db=session)
+    versions = await get_note_versions(note.id, db=async_session)
     assert len(versions) == 3
     assert versions[0].version_number == 1
     assert versions[1].version_number == 2
-    assert versions[2].version_number == 3
\ No newline at end of file
+    assert versions[2].version_number == 3
+
+
+@pytest.mark.asyncio
+async def test_get_user_notes_page(session, async_session, user):
+    started = datetime(2024, 1, 1)
+    session.add_all(
+        models.Note(
+            title=f"Note {i}",
+            content="Content",
+            user_id=user["id"],
+            created_at=started + timedelta(days=i),
+            # Two notes share every timestamp, so the id breaks the tie.
+            updated_at=started + timedelta(hours=i // 2),
+        )
+        for i in range(7)
+    )
+    session.add(models.Note(title="Other", content="Content", user_id=2))
+    session.commit()
+
+    titles = []
+    cursor = None
+    while True:
+        notes, cursor = await get_user_notes_page(
+            user["id"], async_session, limit=3, cursor=cursor
+        )
+        titles.append([note.title for note in notes])
+        if cursor is None:
+            break
+
+    assert titles == [
+        ["Note 6", "Note 5", "Note 4"],
+        ["Note 3", "Note 2", "Note 1"],
+        ["Note 0"],
+    ]
+
+    notes, cursor = await get_user_notes_page(
+        user["id"], async_session, limit=4, sort_by="created_at", order="asc"
+    )
+    assert [note.title for note in notes] == ["Note 0", "Note 1", "Note 2", "Note 3"]
+    notes, cursor = await get_user_notes_page(
+        user["id"], async_session, 4, cursor, sort_by="created_at", order="asc"
+    )
+    assert [note.title for note in notes] == ["Note 4", "Note 5", "Note 6"]
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_user_notes_page_with_server_timestamps(session, async_session, user):
+    for i in range(6):
+        await create_note(
+            NoteCreate(title=f"Note {i}", content="Content"), user["id"], async_session
+        )
+    # One statement, so every note gets the same server-side timestamp.
+    session.execute(update(models.Note).values(created_at=func.now(), updated_at=func.now()))
+    session.commit()
+
+    for order, expected in [("desc", [6, 5, 4, 3, 2, 1]), ("asc", [1, 2, 3, 4, 5, 6])]:
+        ids = []
+        cursor = None
+        while True:
+            notes, cursor = await get_user_notes_page(
+                user["id"], async_session, limit=2, cursor=cursor, order=order
+            )
+            ids.extend(note.id for note in notes)
+            if cursor is None or len(ids) > 6:
+                break
+        assert ids == expected
+
+
+@pytest.mark.asyncio
+async def test_get_user_notes_page_rejects_foreign_cursor(async_session, user):
+    for i in range(2):
+        await create_note(
+            NoteCreate(title=f"Note {i}", content="Content"), user["id"], async_session
+        )
+    _, cursor = await get_user_notes_page(user["id"], async_session, limit=1)
+
+    with pytest.raises(ValueError):
+        await get_user_notes_page(user["id"], async_session, cursor=cursor, order="asc")
+    with pytest.raises(ValueError):
+        await get_user_notes_page(user["id"], async_session, cursor="not-a-cursor")
+
+
+
+@pytest.mark.asyncio
+async def test_create_notes_bulk(async_session, user):
+    notes = [
+        NoteCreate(title=f"Note {i}", content=f"Bulk content {i}.") for i in range(4)
+    ]
+
+    note_ids = await create_notes_bulk(notes, user["id"], async_session)
+
+    assert len(note_ids) == 4
+    for note_id, note_data in zip(note_ids, notes):
+        note = await get_note(note_id, db=async_session)
+        assert note.title == note_data.title
+        assert note.word_count == 3
+        assert [version.content for version in note.versions] == [note_data.content]
+        assert await get_latest_version_number(note_id, db=async_session) == 1
+
+
+@pytest.fixture
+def tokenizer_threads(monkeypatch):
+    """Threads that tokenized note content while the fixture was active."""
+    threads = []
+    tokenize = notes_repository.tokenize_and_clean
+
+    def record(content):
+        threads.append(threading.get_ident())
+        return tokenize(content)
+
+    monkeypatch.setattr(notes_repository, "tokenize_and_clean", record)
+    return threads
+
+
+@pytest.mark.asyncio
+async def test_create_notes_bulk_tokenizes_off_the_event_loop(
+    async_session, user, tokenizer_threads
+):
+    notes = [NoteCreate(title=f"Note {i}", content="Bulk content.") for i in range(3)]
+
+    await create_notes_bulk(notes, user["id"], async_session)
+
+    assert len(tokenizer_threads) == 3
+    assert threading.get_ident() not in tokenizer_threads
+
+
+@pytest.mark.asyncio
+async def test_note_writes_tokenize_off_the_event_loop(
+    async_session, user, tokenizer_threads
+):
+    note = await create_note(
+        NoteCreate(title="Note", content="Some content."), user["id"], async_session
+    )
+    await update_note(note.id, NoteUpdate(content="Other content."), async_session)
+    await delete_note(note.id, async_session)
+
+    # Create, the old and new content of the update, and delete.
+    assert len(tokenizer_threads) == 4
+    assert threading.get_ident() not in tokenizer_threads
+
+
+@pytest.mark.asyncio
+async def test_concurrent_updates_get_distinct_versions(
+    async_session, async_session_factory
+):
+    note = await create_note(
+        NoteCreate(title="Test Note", content="Original."), user_id=1, db=async_session
+    )
+
+    async def update(content):
+        async with async_session_factory() as db:
+            await update_note(note.id, NoteUpdate(content=content), db=db)
+
+    await asyncio.gather(*(update(f"Edit {i}.") for i in range(5)))
+
+    versions = await get_note_versions(note.id, db=async_session)
+    assert [version.version_number for version in versions] == [1, 2, 3, 4, 5, 6]
+    assert await get_latest_version_number(note.id, db=async_session) == 6
+
+
+@pytest.mark.asyncio
+async def test_duplicate_version_number_is_rejected(session, async_session):
+    note = await create_note(
+        NoteCreate(title="Test Note", content="Original."), user_id=1, db=async_session
+    )
+
+    session.add(models.NoteVersion(note_id=note.id, version_number=1, content="Dup"))
+    with pytest.raises(IntegrityError):
+        session.commit()
+    session.rollback()
+
+
+@contextmanager
+def count_queries(async_session):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = async_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.mark.asyncio
+async def test_term_counts_are_upserted_in_sorted_order(async_session, user):
+    terms = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO term_frequencies"):
+            terms.extend(p for p in parameters if isinstance(p, str))
+
+    engine = async_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        await create_note(
+            NoteCreate(title="Words", content="zebra apple mango banana"),
+            user["id"],
+            async_session,
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert terms == sorted(terms) == ["apple", "banana", "mango", "zebra"]
+
+
+def seed_notes_with_versions(session, user_id, notes, versions_per_note):
+    for i in range(notes):
+        note = models.Note(title=f"Note {i}", content="Content", user_id=user_id)
+        note.versions = [
+            models.NoteVersion(version_number=n, content=f"Version {n}")
+            for n in range(1, versions_per_note + 1)
+        ]
+        session.add(note)
+    session.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("notes", [2, 12])
+async def test_listing_notes_with_versions_uses_constant_queries(
+    session, async_session, user, notes
+):
+    seed_notes_with_versions(session, user["id"], notes, versions_per_note=3)
+
+    with count_queries(async_session) as statements:
+        page, _ = await get_user_notes_page(user["id"], async_session, limit=50)
+    assert len(statements) == 1
+    assert all(note.versions == [] for note in page)
+
+    async_session.expunge_all()
+    with count_queries(async_session) as statements:
+        page, _ = await get_user_notes_page(
+            user["id"], async_session, limit=50, include_versions=True
+        )
+    assert len(statements) == 2
+    assert len(page) == notes
+    assert all(len(note.versions) == 3 for note in page)
+
+
+@pytest.mark.asyncio
+async def test_load_versions_keeps_latest(session, async_session, user):
+    seed_notes_with_versions(session, user["id"], 2, versions_per_note=4)
+    notes = await get_user_notes(user["id"], async_session)
+
+    await load_versions(notes, async_session, latest=2)
+
+    for note in notes:
+        assert [version.version_number for version in note.versions] == [3, 4]
+
+
+@pytest.mark.asyncio
+async def test_stream_user_notes_in_chunks(session, async_session, user):
+    seed_notes_with_versions(session, user["id"], 5, versions_per_note=1)
+
+    chunks = [
+        [note.title for note in notes]
+        async for notes in stream_user_notes(user["id"], async_session, chunk_size=2)
+    ]
+
+    assert chunks == [["Note 0", "Note 1"], ["Note 2", "Note 3"], ["Note 4"]]
+    assert len(async_session.identity_map) == 0
+
+
+@pytest.mark.asyncio
+async def test_versions_are_stored_as_deltas(async_session, user, monkeypatch):
+    monkeypatch.setattr(settings, "version_storage", "delta")
+    monkeypatch.setattr(settings, "version_snapshot_interval", 3)
+    content = "Some words that stay the same across every edit. " * 10
+    note = await create_note(
+        NoteCreate(title="Note", content=content + "v1"), user["id"], async_session
+    )
+    for n in range(2, 6):
+        note = await update_note(
+            note.id, NoteUpdate(content=content + f"v{n}"), async_session
+        )
+    expected = [content + f"v{n}" for n in range(1, 6)]
+
+    assert [version.content for version in note.versions] == expected
+    async_session.expunge_all()
+    stored = (
+        await async_session.execute(
+            select(models.NoteVersion.snapshot_version).order_by(
+                models.NoteVersion.version_number
+            )
+        )
+    ).scalars().all()
+    assert stored == [None, 1, 1, None, 4]
+
+    versions = await get_note_versions(note.id, async_session)
+    assert [version.content for version in versions] == expected
+
+    async_session.expunge_all()
+    notes = await get_user_notes(user["id"], async_session)
+    await load_versions(notes, async_session, latest=1)
+    assert [version.content for version in notes[0].versions] == expected[-1:]
+
+
+@pytest.mark.asyncio
+async def test_note_versions_page_reads_back_to_snapshot(
+    async_session, user, monkeypatch
+):
+    monkeypatch.setattr(settings, "version_storage", "delta")
+    monkeypatch.setattr(settings, "version_snapshot_interval", 4)
+    content = "Some words that stay the same across every edit. " * 10
+    note = await create_note(
+        NoteCreate(title="Note", content=content + "v1"), user["id"], async_session
+    )
+    for n in range(2, 8):
+        await update_note(note.id, NoteUpdate(content=content + f"v{n}"), async_session)
+    async_session.expunge_all()
+
+    with count_queries(async_session) as statements:
+        versions, next_cursor = await get_note_versions_page(
+            note.id, async_session, limit=2
+        )
+
+    assert len(statements) == 2
+    assert [version.content for version in versions] == [content + "v7", content + "v6"]
+
+    versions, next_cursor = await get_note_versions_page(
+        note.id, async_session, limit=10, cursor=next_cursor
+    )
+    assert [version.version_number for version in versions] == [5, 4, 3, 2, 1]
+    assert next_cursor is None
@@ -0,0 +1,60 @@
+import pytest
+
+from src.database import models
+from src.repository.notes import create_note, delete_note, update_note
+from src.repository.search import search_notes
+from src.schemas import NoteCreate, NoteUpdate
+
+
+@pytest.fixture(autouse=True)
+def clean_db(session):
+    models.Base.metadata.drop_all(bind=session.get_bind())
+    models.Base.metadata.create_all(bind=session.get_bind())
+
+
+async def titles(user_id, query, db):
+    results, _ = await search_notes(user_id, query, db)
+    return [result.title for result in results]
+
+
+@pytest.mark.asyncio
+async def test_search_is_scoped_to_the_user(async_session, user):
+    for title, user_id in [("Mine", user["id"]), ("Theirs", 2)]:
+        await create_note(
+            NoteCreate(title=title, content="Shared topic."), user_id, async_session
+        )
+
+    assert await titles(user["id"], "topic", async_session) == ["Mine"]
+    assert await titles(2, "topic", async_session) == ["Theirs"]
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_writes(async_session, user):
+    note = await create_note(
+        NoteCreate(title="Draft", content="Original wording."), user["id"], async_session
+    )
+
+    await update_note(note.id, NoteUpdate(content="Revised wording."), async_session)
+
+    assert await titles(user["id"], "original", async_session) == []
+    assert await titles(user["id"], "revised", async_session) == ["Draft"]
+
+    await update_note(note.id, NoteUpdate(title="Final"), async_session)
+    assert await titles(user["id"], "final", async_session) == ["Final"]
+
+    await delete_note(note.id, async_session)
+    assert await titles(user["id"], "revised", async_session) == []
+
+
+@pytest.mark.asyncio
+async def test_search_requires_every_word_and_ignores_syntax(async_session, user):
+    await create_note(
+        NoteCreate(title="Trip", content="Pack the tent and the stove."),
+        user["id"],
+        async_session,
+    )
+
+    assert await titles(user["id"], "tent stove", async_session) == ["Trip"]
+    assert await titles(user["id"], "tent kayak", async_session) == []
+    assert await titles(user["id"], '"tent" OR (stove', async_session) == []
+    assert await titles(user["id"], "***", async_session) == []
@@ -11,12 +11,12 @@ def clean_db(session):
 
 
 @pytest.mark.asyncio
-async def test_create_user(session):
+async def test_create_user(async_session):
     user_data = UserCreate(
         username="testuser", email="test@example.com", password="password123"
     )
 
-    created_user = await create_user(user_data, db=session)
+    created_user = await create_user(user_data, db=async_session)
 
     assert created_user.username == user_data.username
     assert created_user.email == user_data.email
@@ -26,55 +26,55 @@ async def test_create_user(session):
 
 
 @pytest.mark.asyncio
-async def test_get_user_by_email(session):
+async def test_get_user_by_email(async_session):
     user_data = UserCreate(
         username="testuser", email="test@example.com", password="password123"
     )
-    await create_user(user_data, db=session)
+    await create_user(user_data, db=async_session)
 
-    user = await get_user_by_email("test@example.com", db=session)
+    user = await get_user_by_email("test@example.com", db=async_session)
 
     assert user is not None
     assert user.email == "test@example.com"
 
 
 @pytest.mark.asyncio
-async def test_get_user_by_id(session):
+async def test_get_user_by_id(async_session):
     user_data = UserCreate(
         username="testuser", email="test@example.com", password="password123"
     )
-    created_user = await create_user(user_data, db=session)
+    created_user = await create_user(user_data, db=async_session)
 
-    user = await get_user_by_id(created_user.id, db=session)
+    user = await get_user_by_id(created_user.id, db=async_session)
 
     assert user is not None
     assert user.id == created_user.id
 
 
 @pytest.mark.asyncio
-async def test_get_user_by_name(session):
+async def test_get_user_by_name(async_session):
 
     user_data = UserCreate(
         username="testuser", email="test@example.com", password="password123"
     )
-    await create_user(user_data, db=session)
+    await create_user(user_data, db=async_session)
 
-    user = await get_user_by_name("testuser", db=session)
+    user = await get_user_by_name("testuser", db=async_session)
 
     assert user is not None
     assert user.username == "testuser"
 
 
 @pytest.mark.asyncio
-async def test_update_token(session):
+async def test_update_token(async_session):
 
     user_data = UserCreate(
         username="testuser", email="test@example.com", password="password123"
     )
-    user = await create_user(user_data, db=session)
+    user = await create_user(user_data, db=async_session)
 
     new_token = "new_refresh_token"
-    await update_token(user, new_token, db=session)
+    await update_token(user, new_token, db=async_session)
 
-    updated_user = await get_user_by_id(user.id, db=session)
+    updated_user = await get_user_by_id(user.id, db=async_session)
     assert updated_user.refresh_token == new_token
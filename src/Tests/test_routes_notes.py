@@ -1,10 +1,12 @@
+import json
+from datetime import datetime
 from unittest.mock import patch
 
 import pytest
 
 from src.database import models
 from src.schemas import NoteCreate, NoteUpdate
-from src.repository.notes import create_note
+from src.repository.notes import create_note, update_note
 from src.services.auth import auth_service
 
 
@@ -51,9 +53,9 @@ async def test_create_note(client, token):
 
 
 @pytest.mark.asyncio
-async def test_get_note(client, session, user):
+async def test_get_note(client, async_session, user):
     note_data = NoteCreate(title="Test Note", content="This is a test note.")
-    note = await create_note(note_data, user_id=user["id"], db=session)
+    note = await create_note(note_data, user_id=user["id"], db=async_session)
 
     response = client.get(f"api/notes/{note.id}")
 
@@ -64,9 +66,9 @@ async def test_get_note(client, session, user):
 
 
 @pytest.mark.asyncio
-async def test_update_note(client, session, user):
+async def test_update_note(client, async_session, user):
     note_data = NoteCreate(title="Test Note", content="This is a test note.")
-    note = await create_note(note_data, user_id=user["id"], db=session)
+    note = await create_note(note_data, user_id=user["id"], db=async_session)
 
     update_data = NoteUpdate(title="Updated Test Note", content="Updated content.")
     response = client.put(f"api/notes/{note.id}", json=update_data.model_dump())
@@ -77,11 +79,29 @@ async def test_update_note(client, session, user):
     assert updated_note["content"] == update_data.content
 
 
+@pytest.mark.asyncio
+async def test_update_missing_note_skips_summary(client, async_session, user):
+    note = await create_note(
+        NoteCreate(title="Test Note", content="This is a test note."),
+        user_id=user["id"],
+        db=async_session,
+    )
+    client.delete(f"api/notes/{note.id}")
+    update_data = NoteUpdate(content="Updated content.").model_dump()
+
+    with patch("src.routes.notes.ai_service.generate_summary") as generate_summary:
+        for note_id in (note.id, note.id + 1):
+            response = client.put(f"api/notes/{note_id}", json=update_data)
+            assert response.status_code == 404
+
+    generate_summary.assert_not_called()
+
+
 # @pytest.mark.skip("failed as warning")
 @pytest.mark.asyncio
-async def test_delete_note(client, session, user):
+async def test_delete_note(client, async_session, user):
     note_data = NoteCreate(title="Test Note", content="This is a test note.")
-    note = await create_note(note_data, user_id=user["id"], db=session)
+    note = await create_note(note_data, user_id=user["id"], db=async_session)
 
     response = client.delete(f"api/notes/{note.id}")
 
@@ -90,8 +110,265 @@ async def test_delete_note(client, session, user):
 
     response = client.get(f"/notes/{note.id}")
     assert response.status_code == 404
+    for path in ["", "/versions", "/versions/1/diff/1"]:
+        assert client.get(f"api/notes/{note.id}{path}").status_code == 404
+    assert client.delete(f"api/notes/{note.id}").status_code == 404
 
 # @pytest.mark.skip("failed as warning")
+@pytest.mark.asyncio
+async def test_get_user_notes_paginates(client, session, user):
+    session.add_all(
+        models.Note(
+            title=f"Note {i}",
+            content="Content",
+            user_id=user["id"],
+            updated_at=datetime(2024, 1, 1 + i),
+        )
+        for i in range(3)
+    )
+    session.commit()
+
+    response = client.get(
+        f"api/notes/user/{user['id']}", params={"limit": 2, "order": "asc"}
+    )
+
+    assert response.status_code == 200
+    page = response.json()
+    assert [note["title"] for note in page["items"]] == ["Note 0", "Note 1"]
+
+    response = client.get(
+        f"api/notes/user/{user['id']}",
+        params={"limit": 2, "order": "asc", "cursor": page["next_cursor"]},
+    )
+
+    page = response.json()
+    assert [note["title"] for note in page["items"]] == ["Note 2"]
+    assert page["next_cursor"] is None
+
+    response = client.get(f"api/notes/user/{user['id']}", params={"cursor": "bogus"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_user_notes_includes_versions_on_request(client, async_session, user):
+    note = await create_note(
+        NoteCreate(title="Test Note", content="First."), user["id"], async_session
+    )
+    await update_note(note.id, NoteUpdate(content="Second."), async_session)
+    await update_note(note.id, NoteUpdate(content="Third."), async_session)
+
+    response = client.get(f"api/notes/user/{user['id']}")
+    assert response.json()["items"][0]["versions"] == []
+
+    response = client.get(
+        f"api/notes/user/{user['id']}",
+        params={"include_versions": True, "versions_limit": 2},
+    )
+    versions = response.json()["items"][0]["versions"]
+    assert [version["content"] for version in versions] == ["Second.", "Third."]
+
+
+@pytest.mark.asyncio
+async def test_get_note_versions_is_paginated_latest_first(client, async_session, user):
+    note = await create_note(
+        NoteCreate(title="Test Note", content="Version 1."), user["id"], async_session
+    )
+    for n in range(2, 6):
+        await update_note(note.id, NoteUpdate(content=f"Version {n}."), async_session)
+
+    response = client.get(f"api/notes/{note.id}/versions", params={"limit": 3})
+
+    assert response.status_code == 200
+    page = response.json()
+    assert [v["content"] for v in page["items"]] == [
+        "Version 5.",
+        "Version 4.",
+        "Version 3.",
+    ]
+
+    response = client.get(
+        f"api/notes/{note.id}/versions",
+        params={"limit": 3, "cursor": page["next_cursor"]},
+    )
+
+    page = response.json()
+    assert [v["version_number"] for v in page["items"]] == [2, 1]
+    assert page["next_cursor"] is None
+
+    assert client.get("api/notes/999/versions").status_code == 404
+    response = client.get(f"api/notes/{note.id}/versions", params={"cursor": "bogus"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_diff_note_versions(
+    client, async_session, user, mock_version_diff_cache_redis
+):
+    note = await create_note(
+        NoteCreate(title="Test Note", content="Line one\nLine two\n"),
+        user["id"],
+        async_session,
+    )
+    await update_note(
+        note.id, NoteUpdate(content="Line one\nLine 2\nLine three\n"), async_session
+    )
+
+    response = client.get(f"api/notes/{note.id}/versions/1/diff/2")
+
+    assert response.status_code == 200
+    diff = response.json()
+    assert "changes" not in diff
+    assert diff["unified"].splitlines()[2:] == [
+        "@@ -1,2 +1,3 @@",
+        " Line one",
+        "-Line two",
+        "+Line 2",
+        "+Line three",
+    ]
+    mock_version_diff_cache_redis.setex.assert_called_once()
+
+    response = client.get(
+        f"api/notes/{note.id}/versions/1/diff/2", params={"format": "structured"}
+    )
+
+    assert response.json()["changes"] == [
+        {
+            "op": "replace",
+            "old_start": 1,
+            "old_end": 2,
+            "new_start": 1,
+            "new_end": 3,
+            "old_lines": ["Line two"],
+            "new_lines": ["Line 2", "Line three"],
+        }
+    ]
+
+    response = client.get(f"api/notes/{note.id}/versions/1/diff/3")
+    assert response.status_code == 404
+
+
+def test_search_notes_ranks_and_highlights(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    notes = [
+        {"title": "Groceries", "content": "Buy apples, pears and more apples."},
+        {"title": "Apples", "content": "Varieties of apples worth planting."},
+        {"title": "Work", "content": "Quarterly planning meeting."},
+    ]
+    client.post("api/notes/bulk", json=notes, headers=headers)
+
+    response = client.get(
+        "api/notes/search", params={"q": "apples", "limit": 1}, headers=headers
+    )
+
+    assert response.status_code == 200
+    page = response.json()
+    [result] = page["items"]
+    assert result["title"] == "Apples"
+    assert "<mark>apples</mark>" in result["snippet"]
+
+    response = client.get(
+        "api/notes/search",
+        params={"q": "apples", "limit": 1, "cursor": page["next_cursor"]},
+        headers=headers,
+    )
+
+    page = response.json()
+    assert [result["title"] for result in page["items"]] == ["Groceries"]
+    assert page["next_cursor"] is None
+
+    response = client.get("api/notes/search", params={"q": "meeting"}, headers=headers)
+    assert [result["title"] for result in response.json()["items"]] == ["Work"]
+    assert client.get("api/notes/search", params={"q": "apples"}).status_code == 401
+
+
+def test_bulk_create_notes_from_json_array(
+    client, token, session, mock_summary_queue_redis
+):
+    notes = [
+        {"title": "First", "content": "Imported apples."},
+        {"title": "Missing content"},
+        {"title": "Second", "content": "Imported pears."},
+    ]
+
+    response = client.post(
+        "api/notes/bulk", json=notes, headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 2
+    assert result["failed"] == 1
+    assert [item["index"] for item in result["items"]] == [0, 1, 2]
+    assert result["items"][1]["error"] == "content: Field required"
+
+    ids = [result["items"][0]["id"], result["items"][2]["id"]]
+    stored = session.query(models.Note).filter(models.Note.id.in_(ids)).all()
+    assert sorted(note.title for note in stored) == ["First", "Second"]
+    assert all(note.current_version == 1 for note in stored)
+    assert all(len(note.versions) == 1 for note in stored)
+    mock_summary_queue_redis.lpush.assert_awaited_once_with(
+        "notes:summary_queue", *ids
+    )
+
+
+def test_bulk_create_notes_from_ndjson(client, token, session):
+    body = "\n".join(
+        json.dumps({"title": f"Note {i}", "content": f"Streamed note {i}."})
+        for i in range(5)
+    ) + "\nnot json\n"
+
+    response = client.post(
+        "api/notes/bulk",
+        content=body,
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/x-ndjson",
+        },
+    )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 5
+    assert result["failed"] == 1
+    assert result["items"][5]["index"] == 5
+    assert result["items"][5]["error"].startswith("item: Invalid JSON")
+
+
+def test_bulk_create_notes_rejects_non_array(client, token):
+    response = client.post(
+        "api/notes/bulk",
+        json={"title": "Not a list"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_export_notes_streams_ndjson(client, async_session, user):
+    first = await create_note(
+        NoteCreate(title="First", content="One."), user["id"], async_session
+    )
+    await update_note(first.id, NoteUpdate(content="Two."), async_session)
+    await create_note(NoteCreate(title="Second", content="Three."), user["id"], async_session)
+    await create_note(NoteCreate(title="Other", content="Four."), 2, async_session)
+
+    response = client.get(f"api/notes/user/{user['id']}/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    notes = [json.loads(line) for line in response.text.splitlines()]
+    assert [note["title"] for note in notes] == ["First", "Second"]
+    assert all(note["versions"] == [] for note in notes)
+
+    response = client.get(
+        f"api/notes/user/{user['id']}/export", params={"include_versions": True}
+    )
+
+    notes = [json.loads(line) for line in response.text.splitlines()]
+    assert [len(note["versions"]) for note in notes] == [2, 1]
+
+
 @pytest.mark.asyncio
 async def test_get_notes_analytics(client):
     response = client.get("api/notes/analytics/stats")
@@ -101,3 +378,34 @@ async def test_get_notes_analytics(client):
     assert "total_word_count" in analytics_data
     assert "average_note_length" in analytics_data
     assert "most_common_words" in analytics_data
+
+
+@pytest.mark.asyncio
+async def test_get_notes_analytics_summarizes_notes(client, async_session, user):
+    note = await create_note(
+        NoteCreate(title="Test Note", content="This is a test note."),
+        user_id=user["id"],
+        db=async_session,
+    )
+    for i in range(3):
+        await update_note(note.id, NoteUpdate(content=f"Revision {i} of the note."), db=async_session)
+
+    response = client.get("api/notes/analytics/stats")
+
+    assert response.status_code == 200
+    longest = response.json()["longest_notes"]
+    assert longest == [
+        {
+            "id": note.id,
+            "title": "Test Note",
+            "word_count": 3,
+            "updated_at": longest[0]["updated_at"],
+        }
+    ]
+
+    response = client.get("api/notes/analytics/stats", params={"full_notes": True})
+
+    assert response.status_code == 200
+    longest = response.json()["longest_notes"]
+    assert longest[0]["content"] == "Revision 2 of the note."
+    assert len(longest[0]["versions"]) == 4
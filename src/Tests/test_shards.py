@@ -0,0 +1,201 @@
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from pydantic import ValidationError
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from src.conf.config import Settings
+from src.database import models, shards
+from src.database.shards import SHARD_NOTE_ID_SPAN, ShardRouter, prepare_shard
+from src.repository.notes import create_note
+from src.schemas import NoteCreate
+from src.services.analytics import AnalyticsService
+from src.services.auth import auth_service
+
+# Several notes per user on three shards; "delta" is frequent everywhere but
+# never first on a shard, so only an exact merge ranks it correctly.
+NOTES = {
+    0: ["alpha alpha alpha delta", "alpha beta delta"],
+    1: ["beta beta beta delta", "beta gamma delta epsilon"],
+    2: ["gamma gamma gamma delta", "gamma alpha delta"],
+    3: ["alpha alpha zeta", "epsilon epsilon epsilon epsilon"],
+    4: ["beta zeta zeta", "eta theta iota kappa lambda"],
+    5: ["gamma gamma", "mu nu xi omicron"],
+}
+
+
+@pytest.fixture
+def shard_router(tmp_path, monkeypatch, session):
+    """Three SQLite databases standing in for the note shards."""
+    engines = []
+    async_engines = []
+    for shard in range(3):
+        path = tmp_path / f"shard_{shard}.db"
+        engine = create_engine(
+            f"sqlite:///{path}", connect_args={"check_same_thread": False}
+        )
+        models.Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            prepare_shard(connection, shard)
+        engines.append(engine)
+        async_engines.append(
+            create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+        )
+    router = ShardRouter(
+        [
+            async_sessionmaker(bind=engine, expire_on_commit=False)
+            for engine in async_engines
+        ],
+        [sessionmaker(bind=engine) for engine in engines],
+    )
+    monkeypatch.setattr(shards, "sharded_router", router)
+
+    models.Base.metadata.drop_all(bind=session.get_bind())
+    models.Base.metadata.create_all(bind=session.get_bind())
+    yield router
+    for engine in engines:
+        engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def sharded_notes(shard_router, async_session):
+    """NOTES on their users' shards, and all of them on the primary as well."""
+    for user_id, contents in NOTES.items():
+        async with shard_router.for_user(user_id)() as db:
+            for i, content in enumerate(contents):
+                note = NoteCreate(title=f"Note {i} of {user_id}", content=content)
+                await create_note(note, user_id, db)
+                await create_note(note, user_id, async_session)
+
+
+@pytest.fixture(autouse=True)
+def mock_redis_db():
+    with patch.object(auth_service, "redis_db") as redis_mock:
+        redis_mock.get.return_value = None
+        yield redis_mock
+
+
+@pytest.fixture
+def token(client, user, shard_router):
+    client.post("/api/auth/signup", json=user)
+    response = client.post(
+        "/api/auth/login",
+        data={"username": user["email"], "password": user["password"]},
+    )
+    return response.json()["access_token"]
+
+
+def test_router_maps_users_and_notes_to_shards():
+    router = ShardRouter([object()] * 3, [object()] * 3)
+
+    assert [router.shard_for_user(user_id) for user_id in range(4)] == [0, 1, 2, 0]
+    assert router.shard_for_note(5) == 0
+    assert router.shard_for_note(2 * SHARD_NOTE_ID_SPAN + 5) == 2
+    assert router.shard_for_note(3 * SHARD_NOTE_ID_SPAN) is None
+    assert ShardRouter([object()], [object()]).shard_for_note(10**10) == 0
+
+
+@pytest.mark.asyncio
+async def test_shard_refuses_note_ids_past_its_range(shard_router, session):
+    with shard_router.sync_sessions[1]() as db:
+        db.execute(
+            text("UPDATE sqlite_sequence SET seq = :last WHERE name = 'notes'"),
+            {"last": 2 * SHARD_NOTE_ID_SPAN - 2},
+        )
+        db.commit()
+    async with shard_router.sessions[1]() as db:
+        note = await create_note(NoteCreate(title="Last", content="Fits."), 1, db)
+        assert shard_router.shard_for_note(note.id) == 1
+        with pytest.raises(IntegrityError):
+            await create_note(NoteCreate(title="Next", content="Overflows."), 1, db)
+
+
+def test_replicas_and_shards_cannot_be_combined():
+    with pytest.raises(ValidationError):
+        Settings(
+            sqlalchemy_replica_urls=["sqlite:///replica.db"],
+            sqlalchemy_shard_urls=["sqlite:///shard.db"],
+        )
+
+
+def test_notes_are_written_and_read_on_the_users_shard(
+    client, token, user, shard_router
+):
+    headers = {"Authorization": f"Bearer {token}"}
+    client.cookies.clear()
+
+    response = client.post(
+        "api/notes/bulk",
+        json=[{"title": "Sharded", "content": "Stored on one shard."}],
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    shard = shard_router.shard_for_user(user["id"])
+    stored = []
+    for index, session_factory in enumerate(shard_router.sync_sessions):
+        with session_factory() as db:
+            ids = db.scalars(select(models.Note.id)).all()
+        if index == shard:
+            stored = ids
+        else:
+            assert ids == []
+    [note_id] = stored
+    assert shard_router.shard_for_note(note_id) == shard
+
+    assert client.get(f"api/notes/{note_id}").json()["title"] == "Sharded"
+    page = client.get(f"api/notes/user/{user['id']}").json()
+    assert [note["id"] for note in page["items"]] == [note_id]
+    search = client.get("api/notes/search", params={"q": "shard"}, headers=headers)
+    assert [result["id"] for result in search.json()["items"]] == [note_id]
+    versions = client.get(f"api/notes/{note_id}/versions").json()
+    assert [version["version_number"] for version in versions["items"]] == [1]
+
+    assert client.delete(f"api/notes/{note_id}").status_code == 200
+    assert client.get(f"api/notes/{note_id}").status_code == 404
+    assert client.get(f"api/notes/{3 * SHARD_NOTE_ID_SPAN}").status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_global_analytics_merge_shards_exactly(client, session, sharded_notes):
+    expected = AnalyticsService(session).get_notes_analytics(distributions=True)
+
+    response = client.get("api/notes/analytics/stats", params={"distributions": True})
+
+    assert response.status_code == 200
+    analytics = response.json()
+    assert analytics["total_word_count"] == expected.total_word_count
+    assert analytics["average_note_length"] == expected.average_note_length
+    assert analytics["most_common_words"] == [
+        list(term) for term in expected.most_common_words
+    ]
+    # Ties are broken by note id, and ids differ between the two layouts.
+    for ranking, sign in [("longest_notes", -1), ("shortest_notes", 1)]:
+        notes = analytics[ranking]
+        assert [note["word_count"] for note in notes] == [
+            note.word_count for note in getattr(expected, ranking)
+        ]
+        keys = [(sign * note["word_count"], note["id"]) for note in notes]
+        assert keys == sorted(keys)
+    assert (
+        analytics["note_bytes_distribution"]
+        == expected.note_bytes_distribution.model_dump()
+    )
+
+
+@pytest.mark.asyncio
+async def test_user_analytics_scan_only_the_users_shard(client, sharded_notes):
+    response = client.get("api/notes/analytics/stats", params={"user_id": 1})
+
+    analytics = response.json()
+    assert analytics["total_word_count"] == 8
+    assert analytics["most_common_words"][0] == ["beta", 4]
+    assert {note["title"] for note in analytics["longest_notes"]} == {
+        "Note 0 of 1",
+        "Note 1 of 1",
+    }
@@ -0,0 +1,74 @@
+import os
+from collections import Counter
+
+import nltk
+import pytest
+
+from src.conf.config import settings
+from src.services.tokenizers import (
+    get_stop_words,
+    init_nltk_data,
+    nltk_tokenize_and_clean,
+    regex_tokenize_and_clean,
+    tokenize_and_clean,
+)
+
+
+REFERENCE_CORPUS = [
+    "Meeting notes: we agreed to ship the new dashboard on Friday. "
+    "Anna's team will handle QA, and I'll write the release notes.",
+    "Don't forget to renew the SSL certificate! It expires on 2025-04-01, "
+    "and last year we couldn't log in for 3 hours because of it.",
+    "Shopping list: milk, eggs (a dozen), bread... and coffee -- lots of coffee.",
+    "The API returned a 500 error at 10:30; retries didn't help. "
+    "Root cause: the connection pool was exhausted (max 20 connections).",
+    '"Simplicity is prerequisite for reliability," he said. We\'re going to '
+    "rewrite the importer anyway, aren't we?",
+    "Ideas for the blog post:\n1. Why we moved to Postgres.\n2. How we cache "
+    "analytics in Redis.\n3. What we learned about e-mail deliverability.",
+    "She cannot attend, so we're gonna record the session and share it "
+    "with everyone who wasn't there.",
+    "TODO: refactor notes.py, add tests for the versions endpoint, and "
+    "benchmark the tokenizer [high priority].",
+    "Visited the café in São Paulo; the naïve pricing model was a surprise. "
+    "Total: $12.50 for two espressos!",
+    "Project 'Atlas' status -- green. Budget: 95% spent; timeline: on track? "
+    "Yes. Risks: the vendor's SDK, the team's availability in August.",
+]
+
+
+@pytest.mark.parametrize("text", REFERENCE_CORPUS)
+def test_regex_tokenizer_matches_nltk_per_note(text):
+    assert regex_tokenize_and_clean(text) == nltk_tokenize_and_clean(text)
+
+
+def test_regex_tokenizer_matches_nltk_on_corpus():
+    nltk_counts = Counter()
+    regex_counts = Counter()
+    for text in REFERENCE_CORPUS:
+        nltk_counts.update(nltk_tokenize_and_clean(text))
+        regex_counts.update(regex_tokenize_and_clean(text))
+
+    assert sum(regex_counts.values()) == sum(nltk_counts.values())
+    assert regex_counts.most_common(10) == nltk_counts.most_common(10)
+
+
+def test_tokenize_and_clean_selects_backend():
+    text = "We can't stop, we won't stop."
+
+    assert tokenize_and_clean(text, "regex") == regex_tokenize_and_clean(text)
+    assert tokenize_and_clean(text, "nltk") == ["ca", "stop", "wo", "stop"]
+
+
+def test_stop_words_are_built_once_and_frozen():
+    stop_words = get_stop_words()
+
+    assert isinstance(stop_words, frozenset)
+    assert "the" in stop_words
+    assert get_stop_words() is stop_words
+
+
+def test_init_nltk_data_uses_local_directory():
+    init_nltk_data()
+
+    assert os.path.abspath(settings.nltk_data_dir) in nltk.data.path
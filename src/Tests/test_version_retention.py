@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from src.conf.config import settings
+from src.database import models
+from src.repository.notes import create_note, get_note_versions_page, update_note
+from src.schemas import NoteCreate, NoteUpdate
+from src.services.version_retention import compact_history, retained_versions
+
+NOW = datetime(2024, 6, 30, 12)
+
+
+@pytest.fixture(autouse=True)
+def clean_db(session):
+    models.Base.metadata.drop_all(bind=session.get_bind())
+    models.Base.metadata.create_all(bind=session.get_bind())
+
+
+def test_retained_versions_thin_out_with_age():
+    versions = [
+        (1, NOW - timedelta(days=200)),  # Too old.
+        (2, NOW - timedelta(days=60, hours=5)),  # Same ISO week as 3.
+        (3, NOW - timedelta(days=59)),
+        (4, NOW - timedelta(days=10, hours=3)),  # Same day as 5.
+        (5, NOW - timedelta(days=10, hours=1)),
+        (6, NOW - timedelta(days=3)),
+        (7, NOW - timedelta(hours=2)),
+        (8, NOW - timedelta(hours=1)),
+    ]
+
+    assert retained_versions(
+        versions, NOW, keep_all_days=7, daily_days=30, weekly_days=90, max_versions=10
+    ) == {3, 5, 6, 7, 8}
+    assert retained_versions(
+        versions, NOW, keep_all_days=7, daily_days=30, weekly_days=90, max_versions=2
+    ) == {7, 8}
+
+
+def test_latest_version_is_always_kept():
+    assert retained_versions(
+        [(1, NOW - timedelta(days=1000))], NOW, 1, 1, 1, 1
+    ) == {1}
+
+
+@pytest.mark.asyncio
+async def test_compaction_keeps_a_coherent_history(
+    session, async_session, user, monkeypatch
+):
+    monkeypatch.setattr(settings, "version_storage", "delta")
+    monkeypatch.setattr(settings, "version_snapshot_interval", 10)
+    monkeypatch.setattr(settings, "version_keep_all_days", 7)
+    monkeypatch.setattr(settings, "version_keep_daily_days", 30)
+    monkeypatch.setattr(settings, "version_keep_weekly_days", 365)
+    monkeypatch.setattr(settings, "version_max_per_note", 100)
+    base = "The quick brown fox jumps over the lazy dog.\n" * 20
+    contents = [base.replace("lazy", f"sleepy {i}", 1) for i in range(12)]
+    note = await create_note(
+        NoteCreate(title="History", content=contents[0]), user["id"], async_session
+    )
+    for content in contents[1:]:
+        await update_note(note.id, NoteUpdate(content=content), async_session)
+    # Versions 1-10 were written twice a day, 20 to 16 days ago; 11 and 12 today.
+    for version in session.scalars(select(models.NoteVersion)):
+        if version.version_number <= 10:
+            days, hours = divmod(version.version_number - 1, 2)
+            version.created_at = NOW - timedelta(days=20 - days, hours=10 - hours)
+        else:
+            version.created_at = NOW - timedelta(hours=1)
+    session.commit()
+    assert session.scalar(
+        select(models.NoteVersion.snapshot_version).where(
+            models.NoteVersion.version_number == 3
+        )
+    ) == 1
+
+    stats = compact_history(session, now=NOW, batch_size=1)
+
+    # One checkpoint per day for versions 1-10: the second of each pair.
+    kept = [2, 4, 6, 8, 10, 11, 12]
+    assert stats["compacted"] == 1
+    assert stats["deleted"] == 5
+    assert stats["rewritten"] > 0
+    assert stats["bytes_reclaimed"] > 0
+    versions, _ = await get_note_versions_page(note.id, async_session, 100)
+    assert [v.version_number for v in versions] == kept[::-1]
+    assert [v.content for v in versions] == [contents[n - 1] for n in kept[::-1]]
+
+    # New versions still number on and decode against the compacted history.
+    await update_note(note.id, NoteUpdate(content=base), async_session)
+    page, cursor = await get_note_versions_page(note.id, async_session, 3)
+    assert [v.version_number for v in page] == [13, 12, 11]
+    assert page[0].content == base
+    page, _ = await get_note_versions_page(note.id, async_session, 3, cursor)
+    assert [(v.version_number, v.content) for v in page] == [
+        (n, contents[n - 1]) for n in [10, 8, 6]
+    ]
+
+    assert compact_history(session, now=NOW)["deleted"] == 0
@@ -0,0 +1,108 @@
+import pytest
+from sqlalchemy import select
+
+from src.database import models
+from src.services.version_storage import (
+    apply_delta,
+    convert_history,
+    decode_versions,
+    encode_delta,
+    encode_version,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_db(session):
+    models.Base.metadata.drop_all(bind=session.get_bind())
+    models.Base.metadata.create_all(bind=session.get_bind())
+
+
+def history(edits):
+    content = "The quick brown fox jumps over the lazy dog.\n" * 20
+    contents = [content]
+    for i in range(edits):
+        content = content.replace("lazy", f"sleepy {i}", 1)
+        contents.append(content)
+    return contents
+
+
+@pytest.mark.parametrize(
+    "previous, content",
+    [
+        ("one two three", "one 2 three four"),
+        ("  leading and trailing  \n", "leading\n\nand trailing"),
+        ("", "new text"),
+        ("old text", ""),
+    ],
+)
+def test_delta_round_trip(previous, content):
+    assert apply_delta(previous, encode_delta(previous, content)) == content
+
+
+def test_encode_version_takes_snapshots_every_interval():
+    contents = history(6)
+    previous = snapshot_version = None
+    stored = []
+    for number, content in enumerate(contents, start=1):
+        encoded, new_snapshot = encode_version(
+            previous, content, number, snapshot_version, mode="delta", interval=3
+        )
+        stored.append(new_snapshot)
+        previous = content
+        snapshot_version = new_snapshot or number
+
+    assert stored == [None, 1, 1, None, 4, 4, None]
+
+
+def test_encode_version_full_mode_stores_content():
+    assert encode_version("a b", "a c", 2, 1, mode="full") == ("a c", None)
+
+
+def test_decode_versions_is_idempotent():
+    contents = history(3)
+    versions = [models.NoteVersion(version_number=1, content=contents[0])]
+    for number, content in enumerate(contents[1:], start=2):
+        versions.append(
+            models.NoteVersion(
+                version_number=number,
+                content=encode_delta(contents[number - 2], content),
+                snapshot_version=1,
+            )
+        )
+
+    decode_versions(versions)
+    decode_versions(versions)
+
+    assert [version.content for version in versions] == contents
+
+
+def test_convert_history_round_trip(session, user):
+    contents = history(12)
+    note = models.Note(title="Note", content=contents[-1], user_id=user["id"])
+    note.versions = [
+        models.NoteVersion(version_number=n, content=content)
+        for n, content in enumerate(contents, start=1)
+    ]
+    session.add(note)
+    session.commit()
+
+    stats = convert_history(session, mode="delta", interval=5)
+
+    assert stats["notes"] == 1
+    assert stats["versions"] == len(contents)
+    assert stats["bytes_after"] < stats["bytes_before"] / 3
+    stored = session.execute(
+        select(models.NoteVersion.snapshot_version).order_by(
+            models.NoteVersion.version_number
+        )
+    ).scalars().all()
+    assert stored == [None, 1, 1, 1, 1, None, 6, 6, 6, 6, None, 11, 11]
+
+    stats = convert_history(session, mode="full")
+
+    assert stats["rewritten"] == 10
+    versions = session.scalars(
+        select(models.NoteVersion).order_by(models.NoteVersion.version_number)
+    ).all()
+    assert [version.content for version in versions] == contents
+    assert all(version.snapshot_version is None for version in versions)
@@ -1,12 +1,25 @@
+from unittest.mock import AsyncMock, patch
+
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from main import app
 
 from src.database.models import Base
-from src.database.db import get_db
+from src.database.db import (
+    get_async_db,
+    get_async_session_factory,
+    get_db,
+    get_session_factory,
+)
+from src.services.analytics_cache import analytics_cache
+from src.services.summary_queue import summary_queue
+from src.services.version_diff_cache import version_diff_cache
 
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -16,6 +29,32 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Every test runs in its own event loop, so async connections are not pooled.
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_analytics_cache_redis():
+    with patch.object(analytics_cache, "redis_db", AsyncMock()) as redis_mock:
+        redis_mock.get.return_value = None
+        yield redis_mock
+
+
+@pytest.fixture(autouse=True)
+def mock_version_diff_cache_redis():
+    with patch.object(version_diff_cache, "redis_db", AsyncMock()) as redis_mock:
+        redis_mock.get.return_value = None
+        yield redis_mock
+
+
+@pytest.fixture(autouse=True)
+def mock_summary_queue_redis():
+    with patch.object(summary_queue, "redis_db", AsyncMock()) as redis_mock:
+        yield redis_mock
+
 
 @pytest.fixture(scope="module")
 def session():
@@ -30,6 +69,17 @@ def session():
         db.close()
 
 
+@pytest.fixture
+def async_session_factory(session):
+    return TestingAsyncSessionLocal
+
+
+@pytest_asyncio.fixture
+async def async_session(session):
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 @pytest.fixture(scope="module")
 def client(session):
 
@@ -39,7 +89,16 @@ def client(session):
         finally:
             session.close()
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
+    app.dependency_overrides[get_async_session_factory] = (
+        lambda: TestingAsyncSessionLocal
+    )
 
     yield TestClient(app)
 
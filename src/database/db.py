@@ -1,15 +1,17 @@
 from fastapi import HTTPException, status
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 
 
 import redis.asyncio as redis
 from src.conf.config import settings
+from src.database.pool import InstrumentedAsyncAdaptedQueuePool, engine_options
 
 URI = settings.sqlalchemy_database_url
 
-engine = create_engine(URI, echo=True)
+engine = create_engine(URI, **engine_options())
 DBSession = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 
@@ -24,4 +26,45 @@ def get_db():
         db.close()
 
 
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_url(url):
+    """The same database as `url`, reached through an asyncio driver."""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+async_engine = create_async_engine(
+    get_async_url(URI), **engine_options(InstrumentedAsyncAdaptedQueuePool)
+)
+AsyncDBSession = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+async def get_async_db():
+    async with AsyncDBSession() as db:
+        try:
+            yield db
+        except SQLAlchemyError as err:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)
+            )
+
+
+def get_session_factory():
+    """Sessions for work that outlives the request, e.g. background tasks."""
+    return DBSession
+
+
+def get_async_session_factory():
+    """Async sessions for work that outlives the dependency, e.g. streaming."""
+    return AsyncDBSession
+
+
 redis_db = redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0)
@@ -0,0 +1,21 @@
+from sqlalchemy import Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class octet_length(FunctionElement):
+    """Size of a text column in bytes, computed by the database."""
+
+    type = Integer()
+    inherit_cache = True
+    name = "octet_length"
+
+
+@compiles(octet_length)
+def _compile_octet_length(element, compiler, **kw):
+    return f"octet_length({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(octet_length, "sqlite")
+def _compile_octet_length_sqlite(element, compiler, **kw):
+    return f"length(CAST({compiler.process(element.clauses, **kw)} AS BLOB))"
@@ -1,14 +1,25 @@
+import uuid
+
 from sqlalchemy import (
+    DDL,
+    Boolean,
     Column,
+    Index,
+    UniqueConstraint,
     Integer,
     String,
     Text,
     ForeignKey,
     DateTime,
+    event,
+    text,
 )
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship, declarative_base
 from sqlalchemy.sql import func
 
+from src.database.types import CompressedText
+
 
 Base = declarative_base()
 
@@ -22,30 +33,122 @@ class User(Base):
     created_at = Column(DateTime, server_default=func.now())
     refresh_token = Column(String(255), nullable=True)
     
-    notes = relationship("Note", back_populates="user")
+    notes = relationship(
+        "Note", back_populates="user", primaryjoin="User.id == foreign(Note.user_id)"
+    )
 
 
 class Note(Base):
     __tablename__ = "notes"
+    # Fetch server-generated timestamps on flush; an async session cannot
+    # lazy-load them later while the note is being serialized.
+    __mapper_args__ = {"eager_defaults": True}
+    # Keyset pagination of a user's notes (see notes_repository.get_user_notes_page)
+    # and the export, which streams them in id order.
+    __table_args__ = (
+        Index("ix_notes_user_id_updated_at_id", "user_id", "updated_at", "id"),
+        Index("ix_notes_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_notes_user_id_id", "user_id", "id"),
+        # Only soft-deleted notes, for the purger (see notes_repository.purge_deleted_notes).
+        Index(
+            "ix_notes_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
+        Index(
+            "ix_notes_search_vector", "search_vector", postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+        # Lets each shard start its ids at its own offset (see database.shards).
+        {"sqlite_autoincrement": True},
+    )
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
-    content = Column(Text, nullable=False)
+    content = Column(CompressedText, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
-    user_id = Column(Integer, ForeignKey("users.id"))
+    # No foreign key: with sharding, notes and users live in different databases.
+    user_id = Column(Integer)
+    word_count = Column(Integer, nullable=False, default=0, server_default="0", index=True)
+    current_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Set by notes_repository.delete_note; the note is hidden from every read
+    # and purged in the background.
+    deleted_at = Column(DateTime, nullable=True)
     
-    user = relationship("User", back_populates="notes")
+    user = relationship(
+        "User", back_populates="notes", primaryjoin="foreign(Note.user_id) == User.id"
+    )
     versions = relationship("NoteVersion", back_populates="note", order_by="NoteVersion.version_number")
     ai_summary = Column(Text, nullable=True)
+    # Full-text index on Postgres, written by search_repository.index_notes.
+    # SQLite keeps its index in the notes_fts table instead.
+    search_vector = deferred(Column(TSVECTOR().with_variant(Text(), "sqlite")))
+
+
+event.listen(
+    Note.__table__,
+    "after_create",
+    DDL(
+        "CREATE VIRTUAL TABLE notes_fts USING fts5("
+        "title, content, user_id UNINDEXED, tokenize='porter unicode61')"
+    ).execute_if(dialect="sqlite"),
+)
+event.listen(
+    Note.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS notes_fts").execute_if(dialect="sqlite"),
+)
 
 
 class NoteVersion(Base):
     __tablename__ = "note_versions"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        UniqueConstraint(
+            "note_id", "version_number", name="uq_note_versions_note_id_version_number"
+        ),
+    )
     id = Column(Integer, primary_key=True, index=True)
     note_id = Column(Integer, ForeignKey("notes.id"))
     version_number = Column(Integer, nullable=False)
-    content = Column(Text, nullable=False)
+    # Full text for snapshots; for deltas (see services.version_storage), the
+    # edits from the previous version and the snapshot the chain starts from.
+    content = Column(CompressedText, nullable=False)
+    snapshot_version = Column(Integer, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     
     note = relationship("Note", back_populates="versions")
 
+
+class TermFrequency(Base):
+    __tablename__ = "term_frequencies"
+    term = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0, index=True)
+
+
+class NoteStatistics(Base):
+    __tablename__ = "note_statistics"
+    id = Column(Integer, primary_key=True)
+    note_count = Column(Integer, nullable=False, default=0)
+    word_count = Column(Integer, nullable=False, default=0)
+
+
+class AnalyticsJob(Base):
+    __tablename__ = "analytics_jobs"
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    status = Column(String(20), nullable=False, default=PENDING, index=True)
+    user_id = Column(Integer, nullable=True)
+    since = Column(DateTime, nullable=True)
+    until = Column(DateTime, nullable=True)
+    full_notes = Column(Boolean, nullable=False, default=False)
+    processed_notes = Column(Integer, nullable=False, default=0)
+    total_notes = Column(Integer, nullable=True)
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,115 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from src.conf.config import settings
+
+ECHO_LEVELS = {None: False, "INFO": True, "DEBUG": "debug"}
+
+
+class PoolMetrics:
+    """Checkout counters of one pool; updated from many threads at once."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        self.checkins = 0
+
+    def record_checkout(self, wait: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_checkin(self, hold: float) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.hold_total += hold
+            self.hold_max = max(self.hold_max, hold)
+
+
+class InstrumentedPoolMixin:
+    """Times how long callers wait for a connection and how long they keep it.
+
+    The wait covers queueing for a free connection, opening a new one and the
+    pre-ping; a checkout that runs past `pool_timeout` counts as a timeout.
+    Metrics survive `recreate()`, which the engine calls on `dispose()`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        if "_dispatch" not in kwargs:
+            event.listen(self, "checkout", self._on_checkout)
+            event.listen(self, "checkin", self._on_checkin)
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            self.metrics.record_checkin(time.perf_counter() - checked_out_at)
+
+    def stats(self) -> dict:
+        metrics = self.metrics
+        with metrics._lock:
+            return {
+                "pool_size": self.size(),
+                "checked_out": self.checkedout(),
+                "overflow": max(self.overflow(), 0),
+                "max_overflow": self._max_overflow,
+                "checkouts": metrics.checkouts,
+                "timeouts": metrics.timeouts,
+                "avg_wait_ms": metrics.wait_total / (metrics.checkouts or 1) * 1000,
+                "max_wait_ms": metrics.wait_max * 1000,
+                "avg_hold_ms": metrics.hold_total / (metrics.checkins or 1) * 1000,
+                "max_hold_ms": metrics.hold_max * 1000,
+            }
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(poolclass=InstrumentedQueuePool) -> dict:
+    """Keyword arguments for `create_engine`/`create_async_engine` from settings."""
+    return {
+        "echo": ECHO_LEVELS[settings.db_log_level],
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
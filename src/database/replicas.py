@@ -0,0 +1,107 @@
+import random
+import time
+
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import create_engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.conf.config import settings
+from src.database.db import (
+    get_async_session_factory,
+    get_async_url,
+    get_session_factory,
+)
+from src.database.pool import InstrumentedAsyncAdaptedQueuePool, engine_options
+
+# Set on responses to writes; while it is valid, reads go to the primary so
+# a client always sees its own writes despite replication lag.
+STICKY_COOKIE = "db_read_primary_until"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+replica_engines = [
+    create_engine(url, **engine_options()) for url in settings.sqlalchemy_replica_urls
+]
+async_replica_engines = [
+    create_async_engine(
+        get_async_url(url), **engine_options(InstrumentedAsyncAdaptedQueuePool)
+    )
+    for url in settings.sqlalchemy_replica_urls
+]
+ReplicaSessions = [
+    sessionmaker(bind=replica_engine, autoflush=False, autocommit=False)
+    for replica_engine in replica_engines
+]
+AsyncReplicaSessions = [
+    async_sessionmaker(bind=replica_engine, autoflush=False, expire_on_commit=False)
+    for replica_engine in async_replica_engines
+]
+
+
+def reads_from_primary(request: Request) -> bool:
+    """Whether reads for this request must see the latest writes."""
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def get_read_session_factory(
+    request: Request, primary: sessionmaker = Depends(get_session_factory)
+) -> sessionmaker:
+    """Sessions on a random replica, or on the primary if there is none or
+    the client has written recently."""
+    if not ReplicaSessions or reads_from_primary(request):
+        return primary
+    return random.choice(ReplicaSessions)
+
+
+def get_async_read_session_factory(
+    request: Request,
+    primary: async_sessionmaker = Depends(get_async_session_factory),
+) -> async_sessionmaker:
+    if not AsyncReplicaSessions or reads_from_primary(request):
+        return primary
+    return random.choice(AsyncReplicaSessions)
+
+
+def get_read_db(session_factory: sessionmaker = Depends(get_read_session_factory)):
+    db = session_factory()
+    try:
+        yield db
+    except SQLAlchemyError as err:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+    finally:
+        db.close()
+
+
+async def get_async_read_db(
+    session_factory: async_sessionmaker = Depends(get_async_read_session_factory),
+):
+    async with session_factory() as db:
+        try:
+            yield db
+        except SQLAlchemyError as err:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)
+            )
+
+
+async def stick_to_primary_after_writes(request: Request, call_next):
+    """Middleware sending a client's reads to the primary after its writes."""
+    response = await call_next(request)
+    if (
+        (ReplicaSessions or AsyncReplicaSessions)
+        and request.method in WRITE_METHODS
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            STICKY_COOKIE,
+            str(time.time() + settings.replica_sticky_seconds),
+            max_age=settings.replica_sticky_seconds,
+            httponly=True,
+        )
+    return response
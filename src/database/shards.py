@@ -0,0 +1,195 @@
+from contextlib import asynccontextmanager
+from typing import List, Optional, Sequence
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.conf.config import settings
+from src.database.db import (
+    AsyncDBSession,
+    DBSession,
+    get_async_session_factory,
+    get_async_url,
+    get_session_factory,
+)
+from src.database.pool import InstrumentedAsyncAdaptedQueuePool, engine_options
+from src.database.replicas import (
+    get_async_read_session_factory,
+    get_read_session_factory,
+)
+
+# Shard k hands out note ids in [k * SPAN, (k + 1) * SPAN), so the shard of a
+# note can be told from its id. 2**27 keeps 16 shards within a 32-bit id.
+SHARD_NOTE_ID_SPAN = 2**27
+
+
+class ShardRouter:
+    """Maps users and notes to the database that holds them.
+
+    A user's notes and their versions live on shard `user_id % N`. Users,
+    authentication and analytics jobs stay on the primary database.
+    """
+
+    def __init__(
+        self, sessions: Sequence[async_sessionmaker], sync_sessions: Sequence[sessionmaker]
+    ):
+        self.sessions = list(sessions)
+        self.sync_sessions = list(sync_sessions)
+
+    def shard_for_user(self, user_id: int) -> int:
+        return user_id % len(self.sessions)
+
+    def shard_for_note(self, note_id: int) -> Optional[int]:
+        if len(self.sessions) == 1:
+            return 0
+        shard = note_id // SHARD_NOTE_ID_SPAN
+        return shard if 0 <= shard < len(self.sessions) else None
+
+    def for_user(self, user_id: int) -> async_sessionmaker:
+        return self.sessions[self.shard_for_user(user_id)]
+
+    def sync_for_user(self, user_id: int) -> sessionmaker:
+        return self.sync_sessions[self.shard_for_user(user_id)]
+
+    def for_note(self, note_id: int) -> Optional[async_sessionmaker]:
+        shard = self.shard_for_note(note_id)
+        return None if shard is None else self.sessions[shard]
+
+
+def prepare_shard(connection: Connection, shard: int) -> None:
+    """Start the shard's note ids at its offset, unless they already are past it.
+
+    Ids past the shard's range would be routed to the next shard, so inserting
+    one fails instead.
+    """
+    first_id = shard * SHARD_NOTE_ID_SPAN
+    end_id = first_id + SHARD_NOTE_ID_SPAN
+    if connection.dialect.name == "postgresql":
+        connection.execute(
+            text(
+                "SELECT setval(pg_get_serial_sequence('notes', 'id'), "
+                "GREATEST(:first_id, (SELECT COALESCE(MAX(id), 0) FROM notes)) + 1, "
+                "false)"
+            ),
+            {"first_id": first_id},
+        )
+        connection.execute(
+            text("ALTER TABLE notes DROP CONSTRAINT IF EXISTS ck_notes_shard_id_range")
+        )
+        connection.execute(
+            text(
+                "ALTER TABLE notes ADD CONSTRAINT ck_notes_shard_id_range "
+                f"CHECK (id < {end_id})"
+            )
+        )
+    else:
+        connection.execute(
+            text("DELETE FROM sqlite_sequence WHERE name = 'notes' AND seq < :first_id"),
+            {"first_id": first_id},
+        )
+        connection.execute(
+            text(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT 'notes', :first_id "
+                "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'notes')"
+            ),
+            {"first_id": first_id},
+        )
+        # SQLite cannot add a check constraint to an existing table.
+        connection.execute(text("DROP TRIGGER IF EXISTS notes_shard_id_range"))
+        connection.execute(
+            text(
+                "CREATE TRIGGER notes_shard_id_range AFTER INSERT ON notes "
+                f"WHEN NEW.id >= {end_id} "
+                "BEGIN SELECT RAISE(ABORT, 'note id outside the shard range'); END"
+            )
+        )
+
+
+shard_engines = [
+    create_async_engine(
+        get_async_url(url), **engine_options(InstrumentedAsyncAdaptedQueuePool)
+    )
+    for url in settings.sqlalchemy_shard_urls
+]
+sync_shard_engines = [
+    create_engine(url, **engine_options()) for url in settings.sqlalchemy_shard_urls
+]
+sharded_router: Optional[ShardRouter] = (
+    ShardRouter(
+        [
+            async_sessionmaker(bind=shard_engine, autoflush=False, expire_on_commit=False)
+            for shard_engine in shard_engines
+        ],
+        [
+            sessionmaker(bind=shard_engine, autoflush=False, autocommit=False)
+            for shard_engine in sync_shard_engines
+        ],
+    )
+    if settings.sqlalchemy_shard_urls
+    else None
+)
+
+
+def get_default_router() -> ShardRouter:
+    """The configured shards, or the primary database as the only shard."""
+    return sharded_router or ShardRouter([AsyncDBSession], [DBSession])
+
+
+def get_shard_router(
+    primary: async_sessionmaker = Depends(get_async_session_factory),
+    sync_primary: sessionmaker = Depends(get_session_factory),
+) -> ShardRouter:
+    return sharded_router or ShardRouter([primary], [sync_primary])
+
+
+def get_read_shard_router(
+    primary: async_sessionmaker = Depends(get_async_read_session_factory),
+    sync_primary: sessionmaker = Depends(get_read_session_factory),
+) -> ShardRouter:
+    """Like `get_shard_router`; without shards, reads may go to a replica."""
+    return sharded_router or ShardRouter([primary], [sync_primary])
+
+
+@asynccontextmanager
+async def shard_session(session_factory: Optional[async_sessionmaker]):
+    """A request's session on one shard; an unknown shard is a missing note."""
+    if session_factory is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    async with session_factory() as db:
+        try:
+            yield db
+        except SQLAlchemyError as err:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)
+            )
+
+
+async def get_note_db(note_id: int, router: ShardRouter = Depends(get_shard_router)):
+    async with shard_session(router.for_note(note_id)) as db:
+        yield db
+
+
+async def get_note_read_db(
+    note_id: int, router: ShardRouter = Depends(get_read_shard_router)
+):
+    async with shard_session(router.for_note(note_id)) as db:
+        yield db
+
+
+async def get_user_read_db(
+    user_id: int, router: ShardRouter = Depends(get_read_shard_router)
+):
+    async with shard_session(router.for_user(user_id)) as db:
+        yield db
+
+
+def sync_sessions_for(router: ShardRouter, user_id: Optional[int]) -> List[sessionmaker]:
+    """The shards to scan: the user's own, or all of them."""
+    if user_id is not None:
+        return [router.sync_for_user(user_id)]
+    return router.sync_sessions
@@ -0,0 +1,82 @@
+import base64
+import zlib
+from typing import Optional
+
+from sqlalchemy import Text
+from sqlalchemy.types import TypeDecorator
+
+from src.conf.config import settings
+
+try:
+    import zstandard
+except ImportError:  # Optional: without it, content is compressed with zlib.
+    zstandard = None
+
+# Compressed values start with MARKER and a codec letter, followed by the
+# base64 of the compressed UTF-8 text. Anything else is plain text, so rows
+# written before compression was enabled stay readable as they are. The
+# marker is a private-use character; plain text that happens to start with
+# it is stored with the "raw" codec.
+MARKER = "\ue000"
+RAW = "r"
+ZLIB = "z"
+ZSTD = "s"
+CODECS = {"none": RAW, "zlib": ZLIB, "zstd": ZSTD}
+
+
+def compress_text(
+    text: str, codec: Optional[str] = None, threshold: Optional[int] = None
+) -> str:
+    """The stored form of `text`: compressed if it is at least `threshold`
+    bytes long and compression makes it smaller, plain otherwise."""
+    codec = CODECS[codec or settings.content_compression]
+    threshold = settings.content_compression_threshold if threshold is None else threshold
+    data = text.encode()
+    if codec != RAW and len(data) >= threshold:
+        if codec == ZSTD and zstandard is None:
+            codec = ZLIB
+        if codec == ZSTD:
+            compressed = zstandard.ZstdCompressor(level=3).compress(data)
+        else:
+            compressed = zlib.compress(data, 6)
+        stored = MARKER + codec + base64.b64encode(compressed).decode()
+        if len(stored.encode()) < len(data):
+            return stored
+    if text.startswith(MARKER):
+        return MARKER + RAW + text
+    return text
+
+
+def decompress_text(stored: str) -> str:
+    """Inverse of `compress_text`, for any codec and for plain text."""
+    if not stored.startswith(MARKER):
+        return stored
+    codec, payload = stored[1:2], stored[2:]
+    if codec == RAW:
+        return payload
+    data = base64.b64decode(payload)
+    if codec == ZLIB:
+        return zlib.decompress(data).decode()
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed content")
+        return zstandard.ZstdDecompressor().decompress(data).decode()
+    raise ValueError(f"Unknown content codec {codec!r}")
+
+
+class CompressedText(TypeDecorator):
+    """Text compressed on write and decompressed on read (see `compress_text`).
+
+    The column stays `TEXT`, so plain and compressed rows can coexist and
+    existing rows are converted in the background. SQL expressions on the
+    column, such as `octet_length`, see the stored form.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else decompress_text(value)
@@ -0,0 +1,62 @@
+from collections import Counter
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import NoteStatistics, TermFrequency
+
+STATISTICS_ROW_ID = 1
+
+_UPSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+def _upsert(db: AsyncSession):
+    return _UPSERTS[db.bind.dialect.name]
+
+
+async def apply_note_delta(
+    term_delta: Counter, note_delta: int, db: AsyncSession
+) -> None:
+    """Add a signed term delta to the global aggregates without committing.
+
+    Counts are incremented in SQL so concurrent writers never overwrite each
+    other, and terms that drop to zero are removed from the table. Terms are
+    upserted in sorted order so that concurrent writers take the row locks
+    in the same order and cannot deadlock each other.
+    """
+    terms = {term: count for term, count in sorted(term_delta.items()) if count}
+    insert = _upsert(db)
+
+    if terms:
+        stmt = insert(TermFrequency).values(
+            [{"term": term, "count": count} for term, count in terms.items()]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TermFrequency.term],
+            set_={"count": TermFrequency.count + stmt.excluded["count"]},
+        )
+        await db.execute(stmt)
+        await db.execute(
+            delete(TermFrequency).where(
+                TermFrequency.term.in_(list(terms)), TermFrequency.count <= 0
+            )
+        )
+
+    word_delta = sum(terms.values())
+    if word_delta or note_delta:
+        stmt = insert(NoteStatistics).values(
+            id=STATISTICS_ROW_ID, note_count=note_delta, word_count=word_delta
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[NoteStatistics.id],
+            set_={
+                "note_count": NoteStatistics.note_count + note_delta,
+                "word_count": NoteStatistics.word_count + word_delta,
+            },
+        )
+        await db.execute(stmt)
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import settings
+from src.database.models import AnalyticsJob
+
+
+async def get_job(job_id: str, db: AsyncSession) -> AnalyticsJob | None:
+    return await db.get(AnalyticsJob, job_id)
+
+
+async def get_active_job(
+    user_id: Optional[int],
+    since: Optional[datetime],
+    until: Optional[datetime],
+    full_notes: bool,
+    db: AsyncSession,
+) -> AnalyticsJob | None:
+    """A pending or running job for the same parameters, if there is one.
+
+    Jobs started more than `ANALYTICS_JOB_TIMEOUT` seconds ago are ignored,
+    so a job whose worker died does not stand in for new ones forever.
+    """
+    started_after = datetime.utcnow() - timedelta(seconds=settings.analytics_job_timeout)
+    jobs = await db.scalars(
+        select(AnalyticsJob)
+        .where(
+            AnalyticsJob.status.in_([AnalyticsJob.PENDING, AnalyticsJob.RUNNING]),
+            AnalyticsJob.user_id.is_(None)
+            if user_id is None
+            else AnalyticsJob.user_id == user_id,
+            AnalyticsJob.since.is_(None) if since is None else AnalyticsJob.since == since,
+            AnalyticsJob.until.is_(None) if until is None else AnalyticsJob.until == until,
+            AnalyticsJob.full_notes == full_notes,
+            AnalyticsJob.created_at > started_after,
+        )
+        .order_by(AnalyticsJob.created_at.desc())
+    )
+    return jobs.first()
+
+
+async def create_job(
+    user_id: Optional[int],
+    since: Optional[datetime],
+    until: Optional[datetime],
+    full_notes: bool,
+    db: AsyncSession,
+) -> AnalyticsJob:
+    job = AnalyticsJob(
+        user_id=user_id, since=since, until=until, full_notes=full_notes
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
@@ -1,88 +1,602 @@
-from typing import Type
+import base64
+import json
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
 
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import DateTime, delete, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from src.database.models import Note, NoteVersion
+from src.database.types import compress_text
+from src.repository import analytics as analytics_repository
+from src.repository import search as search_repository
 from src.schemas import NoteCreate, NoteUpdate
+from src.services.analytics_cache import analytics_cache
+from src.services.tokenizers import tokenize_and_clean
+from src.services.version_storage import decode_versions, encode_version
 
+# Soft-deleted notes (see `delete_note`) are left out of every read.
+NOT_DELETED = Note.deleted_at.is_(None)
 
-async def create_note(note: NoteCreate, user_id: int, db: Session) -> Note:
+
+def _count_terms(contents: Sequence[str]) -> Tuple[Counter, List[int]]:
+    """Term counts over all of `contents` and the word count of each.
+
+    Tokenizing is CPU-bound, so async callers run this in the threadpool
+    to keep the event loop free for other requests.
+    """
+    term_counts = Counter()
+    word_counts = []
+    for content in contents:
+        words = tokenize_and_clean(content)
+        term_counts.update(words)
+        word_counts.append(len(words))
+    return term_counts, word_counts
+
+
+async def create_note(
+    note: NoteCreate,
+    user_id: int,
+    db: AsyncSession,
+    ai_summary: Optional[str] = None,
+) -> Note:
+    term_counts, [word_count] = await run_in_threadpool(_count_terms, [note.content])
     db_note = Note(
         title=note.title,
         content=note.content,
-        user_id=user_id
+        user_id=user_id,
+        word_count=word_count,
+        ai_summary=ai_summary,
+        current_version=1,
+        # Initial version, inserted in the same flush as the note
+        versions=[NoteVersion(version_number=1, content=note.content)],
     )
     db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
-    
-    # Create initial version
-    await create_version(db_note.id, note.content, 1, db)
+    await db.flush()
+    await search_repository.index_notes(
+        [(db_note.id, user_id, note.title, note.content)], db
+    )
+    await analytics_repository.apply_note_delta(term_counts, 1, db)
+    await db.commit()
+    await analytics_cache.invalidate(user_id)
     return db_note
 
 
-async def get_note(note_id: int, db: Session) -> Note | None:
-    return db.query(Note).filter(Note.id == note_id).first()
+async def create_notes_bulk(
+    notes: Sequence[NoteCreate], user_id: int, db: AsyncSession
+) -> List[int]:
+    """Insert a batch of notes with their first versions in one transaction.
+
+    Notes are written with multi-row INSERT ... RETURNING statements and
+    their versions with COPY on asyncpg (executemany elsewhere). Returns the
+    new note ids in input order. Notes are tokenized in the threadpool
+    first, so a large batch does not stall the event loop. The caller is responsible for summaries and
+    for invalidating the analytics cache.
+    """
+    term_delta, word_counts = await run_in_threadpool(
+        _count_terms, [note.content for note in notes]
+    )
+    rows = [
+        {
+            "title": note.title,
+            "content": note.content,
+            "user_id": user_id,
+            "word_count": word_count,
+            "current_version": 1,
+        }
+        for note, word_count in zip(notes, word_counts)
+    ]
+
+    note_ids = (
+        await db.scalars(
+            insert(Note).returning(Note.id, sort_by_parameter_order=True), rows
+        )
+    ).all()
+    await _insert_versions(
+        [
+            (note_id, 1, note.content)
+            for note_id, note in zip(note_ids, notes)
+        ],
+        db,
+    )
+    await search_repository.index_notes(
+        [
+            (note_id, user_id, note.title, note.content)
+            for note_id, note in zip(note_ids, notes)
+        ],
+        db,
+    )
+    await analytics_repository.apply_note_delta(term_delta, len(notes), db)
+    await db.commit()
+    return list(note_ids)
+
+
+async def _insert_versions(
+    versions: Sequence[Tuple[int, int, str]], db: AsyncSession
+) -> None:
+    columns = ("note_id", "version_number", "content")
+    if db.bind.dialect.driver == "asyncpg":
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        # COPY bypasses the column types, so compress the content here.
+        await raw_connection.driver_connection.copy_records_to_table(
+            NoteVersion.__tablename__,
+            records=[
+                (note_id, version_number, compress_text(content))
+                for note_id, version_number, content in versions
+            ],
+            columns=columns,
+        )
+    else:
+        await db.execute(
+            insert(NoteVersion), [dict(zip(columns, version)) for version in versions]
+        )
+
+
+async def get_note(
+    note_id: int, db: AsyncSession, for_update: bool = False
+) -> Note | None:
+    query = (
+        select(Note)
+        .where(Note.id == note_id, NOT_DELETED)
+        .options(selectinload(Note.versions))
+        .execution_options(populate_existing=True)
+    )
+    if for_update:
+        query = query.with_for_update(of=Note)
+    note = (await db.scalars(query)).first()
+    if note is not None:
+        decode_versions(note.versions)
+    return note
+
 
+async def note_exists(note_id: int, db: AsyncSession) -> bool:
+    return (
+        await db.scalar(select(Note.id).where(Note.id == note_id, NOT_DELETED))
+        is not None
+    )
 
-async def get_user_notes(user_id: int, db: Session) -> list[Type[Note]]:
-    return db.query(Note).filter(Note.user_id == user_id).all()
+
+async def get_user_notes(
+    user_id: int, db: AsyncSession, include_versions: bool = False
+) -> Sequence[Note]:
+    notes = await db.scalars(
+        select(Note)
+        .where(Note.user_id == user_id, NOT_DELETED)
+        .options(noload(Note.versions))
+    )
+    notes = notes.all()
+    if include_versions:
+        await load_versions(notes, db)
+    return notes
 
 
-async def update_note(note_id: int, note_update: NoteUpdate, db: Session) -> Note | None:
-    db_note = await get_note(note_id, db)
+async def stream_user_notes(
+    user_id: int, db: AsyncSession, chunk_size: int
+) -> AsyncIterator[Sequence[Note]]:
+    """Yield a user's notes in id order, `chunk_size` at a time.
+
+    Rows come from a server-side cursor, and each chunk is expunged once the
+    caller is done with it, so memory does not grow with the number of notes.
+    """
+    result = await db.stream_scalars(
+        select(Note)
+        .where(Note.user_id == user_id, NOT_DELETED)
+        .order_by(Note.id)
+        .options(noload(Note.versions))
+        .execution_options(yield_per=chunk_size)
+    )
+    async for notes in result.partitions():
+        yield notes
+        for note in notes:
+            db.expunge(note)
+
+
+async def load_versions(
+    notes: Sequence[Note], db: AsyncSession, latest: Optional[int] = None
+) -> None:
+    """Fill `versions` of every note with a single query.
+
+    With `latest`, only the newest `latest` versions of each note are kept,
+    ranked per note by a window function in the database. Older versions are
+    read back to the snapshot the oldest kept one is encoded against, and
+    dropped once the deltas are decoded.
+    """
+    note_ids = [note.id for note in notes]
+    if not note_ids:
+        return
+
+    query = select(NoteVersion).where(NoteVersion.note_id.in_(note_ids))
+    if latest is not None:
+        ranked = (
+            select(
+                NoteVersion.note_id,
+                func.coalesce(
+                    NoteVersion.snapshot_version, NoteVersion.version_number
+                ).label("snapshot_version"),
+                func.row_number()
+                .over(
+                    partition_by=NoteVersion.note_id,
+                    order_by=NoteVersion.version_number.desc(),
+                )
+                .label("rank"),
+            )
+            .where(NoteVersion.note_id.in_(note_ids))
+            .subquery()
+        )
+        start = (
+            select(
+                ranked.c.note_id,
+                func.min(ranked.c.snapshot_version).label("version_number"),
+            )
+            .where(ranked.c.rank <= latest)
+            .group_by(ranked.c.note_id)
+            .subquery()
+        )
+        query = select(NoteVersion).join(
+            start,
+            (NoteVersion.note_id == start.c.note_id)
+            & (NoteVersion.version_number >= start.c.version_number),
+        )
+
+    versions = defaultdict(list)
+    for version in await db.scalars(
+        query.order_by(NoteVersion.note_id, NoteVersion.version_number)
+    ):
+        versions[version.note_id].append(version)
+    for note in notes:
+        note_versions = versions[note.id]
+        decode_versions(note_versions)
+        if latest is not None:
+            note_versions = note_versions[-latest:]
+        set_committed_value(note, "versions", note_versions)
+
+
+SORT_COLUMNS = {
+    "updated_at": Note.updated_at,
+    "created_at": Note.created_at,
+}
+# Canonical form of a timestamp on SQLite, whether stored with or without
+# fractional seconds.
+SQLITE_TIMESTAMP = "%Y-%m-%d %H:%M:%f"
+
+
+def encode_cursor(sort_by: str, order: str, value: datetime, note_id: int) -> str:
+    payload = json.dumps(
+        {"sort_by": sort_by, "order": order, "value": value.isoformat(), "id": note_id}
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str) -> Tuple[datetime, int]:
+    """Position encoded by `encode_cursor`.
+
+    Raises ValueError if the cursor is malformed or belongs to another sort.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if (payload["sort_by"], payload["order"]) != (sort_by, order):
+            raise ValueError("Cursor was issued for a different sort order")
+        return datetime.fromisoformat(payload["value"]), int(payload["id"])
+    except (KeyError, TypeError) as e:
+        raise ValueError("Malformed cursor") from e
+
+
+async def get_user_notes_page(
+    user_id: int,
+    db: AsyncSession,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort_by: str = "updated_at",
+    order: str = "desc",
+    include_versions: bool = False,
+    versions_limit: Optional[int] = None,
+) -> Tuple[Sequence[Note], Optional[str]]:
+    """One page of a user's notes and the cursor of the next page, if any.
+
+    Pages are keyed on `(sort column, id)` rather than an offset, so the
+    composite index is seeked straight to the cursor however deep it is.
+    SQLite stores server-default timestamps without the microseconds that
+    bound values carry, so there both sides are compared as the same
+    millisecond string (which gives up the index seek).
+    Versions are left out unless `include_versions` is set, in which case
+    they are loaded for the whole page at once (see `load_versions`).
+    """
+    column = SORT_COLUMNS[sort_by]
+    if db.bind.dialect.name == "sqlite":
+        column = func.strftime(SQLITE_TIMESTAMP, column)
+    key = tuple_(column, Note.id)
+    query = (
+        select(Note)
+        .where(Note.user_id == user_id, NOT_DELETED)
+        .options(noload(Note.versions))
+    )
+    if cursor is not None:
+        value, note_id = decode_cursor(cursor, sort_by, order)
+        if db.bind.dialect.name == "sqlite":
+            value = func.strftime(SQLITE_TIMESTAMP, literal(value, DateTime))
+        position = tuple_(value, note_id)
+        query = query.where(key < position if order == "desc" else key > position)
+    if order == "desc":
+        query = query.order_by(column.desc(), Note.id.desc())
+    else:
+        query = query.order_by(column, Note.id)
+
+    notes = (await db.scalars(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(notes) > limit:
+        notes = notes[:limit]
+        next_cursor = encode_cursor(
+            sort_by, order, getattr(notes[-1], sort_by), notes[-1].id
+        )
+    if include_versions:
+        await load_versions(notes, db, versions_limit)
+    return notes, next_cursor
+
+
+async def update_note(
+    note_id: int,
+    note_update: NoteUpdate,
+    db: AsyncSession,
+    ai_summary: Optional[str] = None,
+) -> Note | None:
+    # Lock the row so the term delta is computed against the content that is
+    # actually being replaced.
+    db_note = await get_note(note_id, db, for_update=True)
     if not db_note:
         return None
 
     if note_update.content is not None:
-        latest_version = await get_latest_version_number(note_id, db)
-        await create_version(note_id, note_update.content, latest_version + 1, db)
+        old_terms, _ = await run_in_threadpool(_count_terms, [db_note.content])
+        term_delta, [word_count] = await run_in_threadpool(
+            _count_terms, [note_update.content]
+        )
+        term_delta.subtract(old_terms)
+        await analytics_repository.apply_note_delta(term_delta, 0, db)
+        db_note.word_count = word_count
 
-    for field, value in note_update.model_dump(exclude_unset=True).items():
+        version = await create_version(
+            note_id, note_update.content, db, previous_content=db_note.content
+        )
+        db_note.versions.append(version)
+        set_committed_value(db_note, "current_version", version.version_number)
+
+    changes = note_update.model_dump(exclude_unset=True)
+    for field, value in changes.items():
         setattr(db_note, field, value)
+    if "title" in changes or "content" in changes:
+        await search_repository.index_notes(
+            [(db_note.id, db_note.user_id, db_note.title, db_note.content)], db
+        )
+    if ai_summary is not None:
+        db_note.ai_summary = ai_summary
 
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
+    if note_update.content is not None:
+        decode_versions(db_note.versions)
+    await analytics_cache.invalidate(db_note.user_id)
     return db_note
 
 
-async def delete_note(note_id: int, db: Session) -> bool:
-    db_note = await get_note(note_id, db)
-    if not db_note:
+async def delete_note(note_id: int, db: AsyncSession) -> bool:
+    """Soft-delete a note: a single-row update, however long its history.
+
+    The note drops out of reads, search and the analytics aggregates at once;
+    the row and its versions are removed later by `purge_deleted_notes`.
+    """
+    deleted = (
+        await db.execute(
+            update(Note)
+            .where(Note.id == note_id, NOT_DELETED)
+            .values(deleted_at=func.now())
+            .returning(Note.user_id, Note.content)
+            .execution_options(synchronize_session=False)
+        )
+    ).first()
+    if deleted is None:
         return False
-    
-    db.delete(db_note)
-    db.commit()
+
+    old_terms, _ = await run_in_threadpool(_count_terms, [deleted.content])
+    term_delta = Counter()
+    term_delta.subtract(old_terms)
+    await analytics_repository.apply_note_delta(term_delta, -1, db)
+    await search_repository.remove_notes([note_id], db)
+    await db.commit()
+    await analytics_cache.invalidate(deleted.user_id)
     return True
 
 
-async def create_version(note_id: int, content: str, version_number: int, db: Session) -> NoteVersion:
+async def purge_deleted_notes(db: AsyncSession, batch_size: int) -> Tuple[int, int]:
+    """Remove one batch of soft-deleted notes' data, in its own transaction.
+
+    Versions go first, at most `batch_size` per call, so no transaction holds
+    locks on a long history; notes are deleted once they have none left.
+    Returns the number of versions and of notes deleted, both 0 when there
+    is nothing left to purge.
+    """
+    note_ids = (
+        await db.scalars(
+            select(Note.id)
+            .where(Note.deleted_at.is_not(None))
+            .order_by(Note.deleted_at)
+            .limit(batch_size)
+        )
+    ).all()
+    if not note_ids:
+        return 0, 0
+
+    version_ids = (
+        await db.scalars(
+            select(NoteVersion.id)
+            .where(NoteVersion.note_id.in_(note_ids))
+            .limit(batch_size)
+        )
+    ).all()
+    if version_ids:
+        await db.execute(delete(NoteVersion).where(NoteVersion.id.in_(version_ids)))
+        await db.commit()
+        return len(version_ids), 0
+
+    await db.execute(
+        delete(Note).where(Note.id.in_(note_ids), Note.deleted_at.is_not(None))
+    )
+    await db.commit()
+    return 0, len(note_ids)
+
+
+async def create_version(
+    note_id: int,
+    content: str,
+    db: AsyncSession,
+    previous_content: Optional[str] = None,
+) -> NoteVersion:
+    """Add the next version of a note without committing.
+
+    The number comes from incrementing `notes.current_version` in SQL, so
+    concurrent writers each get their own number (and the unique
+    `(note_id, version_number)` constraint backs that up). Given the content
+    of the latest version, the new one may be stored as a delta against it
+    (see `version_storage.encode_version`); until it is decoded again, the
+    returned version then holds the delta.
+    """
+    version_number = await db.scalar(
+        update(Note)
+        .where(Note.id == note_id)
+        .values(current_version=Note.current_version + 1)
+        .returning(Note.current_version)
+        .execution_options(synchronize_session=False)
+    )
+    snapshot_version = None
+    if previous_content is not None:
+        snapshot_version = await db.scalar(
+            select(
+                func.coalesce(NoteVersion.snapshot_version, NoteVersion.version_number)
+            )
+            .where(
+                NoteVersion.note_id == note_id,
+                NoteVersion.version_number < version_number,
+            )
+            .order_by(NoteVersion.version_number.desc())
+            .limit(1)
+        )
+    stored_content, snapshot_version = encode_version(
+        previous_content, content, version_number, snapshot_version
+    )
     version = NoteVersion(
         note_id=note_id,
-        content=content,
-        version_number=version_number
+        content=stored_content,
+        version_number=version_number,
+        snapshot_version=snapshot_version,
     )
     db.add(version)
-    db.commit()
-    db.refresh(version)
     return version
 
 
-async def get_latest_version_number(note_id: int, db: Session) -> int:
-    latest_version = (
-        db.query(NoteVersion)
-        .filter(NoteVersion.note_id == note_id)
-        .order_by(desc(NoteVersion.version_number))
-        .first()
+async def get_latest_version_number(note_id: int, db: AsyncSession) -> int:
+    latest_version = await db.scalar(
+        select(Note.current_version).where(Note.id == note_id, NOT_DELETED)
     )
-    return latest_version.version_number if latest_version else 0
+    return latest_version or 0
 
 
-async def get_note_versions(note_id: int, db: Session) -> list[Type[NoteVersion]]:
-    return (
-        db.query(NoteVersion)
-        .filter(NoteVersion.note_id == note_id)
+async def get_note_versions(note_id: int, db: AsyncSession) -> Sequence[NoteVersion]:
+    versions = await db.scalars(
+        select(NoteVersion)
+        .where(NoteVersion.note_id == note_id)
         .order_by(NoteVersion.version_number)
-        .all()
-    )
\ No newline at end of file
+    )
+    versions = versions.all()
+    decode_versions(versions)
+    return versions
+
+
+# Number of the snapshot each version's delta chain starts from.
+SNAPSHOT_OF = func.coalesce(NoteVersion.snapshot_version, NoteVersion.version_number)
+
+
+def encode_version_cursor(version_number: int) -> str:
+    payload = json.dumps({"version": version_number})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_version_cursor(cursor: str) -> int:
+    """Version number encoded by `encode_version_cursor`.
+
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["version"])
+    except (KeyError, TypeError) as e:
+        raise ValueError("Malformed cursor") from e
+
+
+async def get_version_snapshots(
+    note_id: int, version_numbers: Iterable[int], db: AsyncSession
+) -> Dict[int, int]:
+    """Map each existing version of `version_numbers` to its snapshot."""
+    rows = await db.execute(
+        select(NoteVersion.version_number, SNAPSHOT_OF).where(
+            NoteVersion.note_id == note_id,
+            NoteVersion.version_number.in_(list(version_numbers)),
+        )
+    )
+    return dict(rows.all())
+
+
+async def load_version_spans(
+    note_id: int, spans: Iterable[Tuple[int, int]], db: AsyncSession
+) -> Dict[int, NoteVersion]:
+    """Decoded versions of a note inside the inclusive `(first, last)` spans.
+
+    Every span must start at a snapshot, see `get_version_snapshots`.
+    """
+    versions = (
+        await db.scalars(
+            select(NoteVersion)
+            .where(
+                NoteVersion.note_id == note_id,
+                or_(
+                    *(
+                        NoteVersion.version_number.between(first, last)
+                        for first, last in spans
+                    )
+                ),
+            )
+            .order_by(NoteVersion.version_number)
+        )
+    ).all()
+    decode_versions(versions)
+    return {version.version_number: version for version in versions}
+
+
+async def get_note_versions_page(
+    note_id: int, db: AsyncSession, limit: int = 20, cursor: Optional[str] = None
+) -> Tuple[List[NoteVersion], Optional[str]]:
+    """One page of a note's versions, newest first, and the next page's cursor.
+
+    The page is picked from the `(note_id, version_number)` index; only its
+    versions and the older ones back to their snapshot are read in full.
+    """
+    query = (
+        select(NoteVersion.version_number, SNAPSHOT_OF)
+        .where(NoteVersion.note_id == note_id)
+        .order_by(NoteVersion.version_number.desc())
+    )
+    if cursor is not None:
+        query = query.where(NoteVersion.version_number < decode_version_cursor(cursor))
+
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_version_cursor(rows[-1].version_number)
+    if not rows:
+        return [], next_cursor
+
+    first = min(snapshot for _, snapshot in rows)
+    versions = await load_version_spans(note_id, [(first, rows[0].version_number)], db)
+    return [versions[version_number] for version_number, _ in rows], next_cursor
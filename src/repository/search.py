@@ -0,0 +1,226 @@
+import base64
+import json
+import re
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    Integer,
+    Text,
+    bindparam,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    literal_column,
+    select,
+    table,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import settings
+from src.database.models import Note
+
+SNIPPET_START = "<mark>"
+SNIPPET_STOP = "</mark>"
+SNIPPET_WORDS = 16
+
+# SQLite's full-text index, created next to the notes table (see models).
+notes_fts = table(
+    "notes_fts",
+    column("rowid"),
+    column("title"),
+    column("content"),
+    column("user_id"),
+)
+
+SearchDocument = Tuple[int, int, str, str]
+
+
+class SearchHit(NamedTuple):
+    id: int
+    title: str
+    updated_at: datetime
+    rank: float
+    snippet: str
+
+
+def _pg_config():
+    return cast(settings.search_language, REGCONFIG)
+
+
+def _pg_search_vector(title, content):
+    config = _pg_config()
+    return func.setweight(func.to_tsvector(config, title), "A").op("||")(
+        func.setweight(func.to_tsvector(config, content), "B")
+    )
+
+
+async def index_notes(documents: Sequence[SearchDocument], db: AsyncSession) -> None:
+    """Write `(id, user_id, title, content)` of notes to the full-text index.
+
+    Runs in the caller's transaction, without committing.
+    """
+    if not documents:
+        return
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(
+            update(Note.__table__)
+            .where(Note.__table__.c.id == bindparam("note_id"))
+            .values(
+                search_vector=_pg_search_vector(
+                    bindparam("search_title"), bindparam("search_content")
+                )
+            ),
+            [
+                {"note_id": note_id, "search_title": title, "search_content": content}
+                for note_id, _, title, content in documents
+            ],
+        )
+    else:
+        await remove_notes([document[0] for document in documents], db)
+        await db.execute(
+            insert(notes_fts),
+            [
+                {"rowid": note_id, "user_id": user_id, "title": title, "content": content}
+                for note_id, user_id, title, content in documents
+            ],
+        )
+
+
+async def remove_notes(note_ids: Iterable[int], db: AsyncSession) -> None:
+    """Drop notes from the full-text index (on Postgres it lives on the row)."""
+    if db.bind.dialect.name != "postgresql":
+        await db.execute(
+            delete(notes_fts).where(notes_fts.c.rowid.in_(list(note_ids)))
+        )
+
+
+def encode_search_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode()
+
+
+def decode_search_cursor(cursor: str) -> int:
+    """Offset encoded by `encode_search_cursor`.
+
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["offset"])
+    except (KeyError, TypeError) as e:
+        raise ValueError("Malformed cursor") from e
+
+
+def _fts5_query(query: str) -> str:
+    """Every word of `query` as a quoted FTS5 string, so all must match."""
+    return " ".join(
+        '"' + word.replace('"', '""') + '"' for word in re.findall(r"\w+", query)
+    )
+
+
+def _pg_search(user_id: int, query: str):
+    tsquery = func.websearch_to_tsquery(_pg_config(), query)
+    search_vector = Note.__table__.c.search_vector
+    # The content is stored compressed (see database.types), so the snippet is
+    # highlighted afterwards, by `_pg_headlines`, from the decompressed text.
+    return select(
+        Note.id,
+        Note.title,
+        Note.updated_at,
+        func.ts_rank_cd(search_vector, tsquery).label("rank"),
+        Note.content.label("snippet"),
+    ).where(
+        Note.user_id == user_id,
+        Note.deleted_at.is_(None),
+        search_vector.op("@@")(tsquery),
+    )
+
+
+async def _pg_headlines(
+    contents: Sequence[str], query: str, db: AsyncSession
+) -> List[str]:
+    """Highlight `query` in each of `contents` with a single statement."""
+    config = _pg_config()
+    options = (
+        f"StartSel={SNIPPET_START}, StopSel={SNIPPET_STOP}, "
+        f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}"
+    )
+    documents = values(
+        column("position", Integer), column("content", Text), name="documents"
+    ).data(list(enumerate(contents)))
+    headlines = await db.execute(
+        select(
+            func.ts_headline(
+                config,
+                documents.c.content,
+                func.websearch_to_tsquery(config, query),
+                options,
+            )
+        ).order_by(documents.c.position)
+    )
+    return headlines.scalars().all()
+
+
+def _sqlite_search(user_id: int, query: str):
+    fts = literal_column("notes_fts")
+    return (
+        select(
+            Note.id,
+            Note.title,
+            Note.updated_at,
+            # bm25 is lower for better matches; titles weigh ten times more.
+            (-func.bm25(fts, 10.0, 1.0)).label("rank"),
+            func.snippet(
+                fts, 1, SNIPPET_START, SNIPPET_STOP, "…", SNIPPET_WORDS
+            ).label("snippet"),
+        )
+        .join(notes_fts, notes_fts.c.rowid == Note.id)
+        .where(
+            fts.op("MATCH")(_fts5_query(query)),
+            notes_fts.c.user_id == user_id,
+            Note.deleted_at.is_(None),
+        )
+    )
+
+
+async def search_notes(
+    user_id: int,
+    query: str,
+    db: AsyncSession,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Tuple[List[SearchHit], Optional[str]]:
+    """One page of a user's notes matching `query`, best first.
+
+    Hits hold `id`, `title`, `updated_at`, `rank` (higher is better) and a
+    `snippet` of the content with the matches highlighted.
+    """
+    postgresql = db.bind.dialect.name == "postgresql"
+    if postgresql:
+        search = _pg_search(user_id, query)
+    else:
+        if not _fts5_query(query):
+            return [], None
+        search = _sqlite_search(user_id, query)
+
+    offset = decode_search_cursor(cursor) if cursor is not None else 0
+    rows = (
+        await db.execute(
+            search.order_by(literal_column("rank").desc(), Note.id.desc())
+            .limit(limit + 1)
+            .offset(offset)
+        )
+    ).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(offset + limit)
+    hits = [SearchHit(*row) for row in rows]
+    if postgresql and hits:
+        snippets = await _pg_headlines([hit.snippet for hit in hits], query, db)
+        hits = [hit._replace(snippet=snippet) for hit, snippet in zip(hits, snippets)]
+    return hits, next_cursor
@@ -1,39 +1,43 @@
-from typing import Type
-from sqlalchemy.orm import Session
+from typing import Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from src.database import models
 from src import schemas
 
 
-async def get_users(db: Session) -> list[Type[models.User]]:
-    users = db.query(models.User).all()
-    return users
+async def get_users(db: AsyncSession) -> Sequence[models.User]:
+    users = await db.scalars(select(models.User))
+    return users.all()
 
 
-async def get_user_by_email(email: str, db: Session) -> models.User | None:
-    return db.query(models.User).filter_by(email=email).first()
+async def get_user_by_email(email: str, db: AsyncSession) -> models.User | None:
+    users = await db.scalars(select(models.User).filter_by(email=email))
+    return users.first()
 
 
-async def get_user_by_id(user_id: int, db: Session) -> models.User | None:
-    return db.query(models.User).filter_by(id=user_id).first()
+async def get_user_by_id(user_id: int, db: AsyncSession) -> models.User | None:
+    users = await db.scalars(select(models.User).filter_by(id=user_id))
+    return users.first()
 
 
-async def get_user_by_name(user_name: str, db: Session) -> models.User | None:
-    return db.query(models.User).filter_by(username=user_name).first()
+async def get_user_by_name(user_name: str, db: AsyncSession) -> models.User | None:
+    users = await db.scalars(select(models.User).filter_by(username=user_name))
+    return users.first()
 
 
-async def create_user(body: schemas.UserCreate, db: Session) -> models.User:
+async def create_user(body: schemas.UserCreate, db: AsyncSession) -> models.User:
     new_user = models.User(
         username=body.username, email=body.email, password=body.password
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 
-async def update_token(user: models.User, refresh_token, db: Session) -> None:
+async def update_token(user: models.User, refresh_token, db: AsyncSession) -> None:
     user.refresh_token = refresh_token
-    db.commit()
-    db.refresh(user)
-
-
+    await db.commit()
+    await db.refresh(user)
@@ -11,9 +11,9 @@ from fastapi.security import (
     HTTPBearer,
     OAuth2PasswordRequestForm,
 )
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
+from src.database.db import get_async_db
 from src import schemas
 from src.repository import users as repository_users
 from src.conf import messages
@@ -27,7 +27,9 @@ security = HTTPBearer()
 @router.post(
     "/signup", response_model=schemas.User, status_code=status.HTTP_201_CREATED
 )
-async def signup(body: schemas.UserCreate, db: Session = Depends(get_db)):
+async def signup(
+    body: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)
+):
     exist_user = await repository_users.get_user_by_email(body.email, db)
     if exist_user:
         raise HTTPException(
@@ -40,7 +42,8 @@ async def signup(body: schemas.UserCreate, db: Session = Depends(get_db)):
 
 @router.post("/login", response_model=schemas.TokenModel)
 async def login(
-    body: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    body: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     user = await repository_users.get_user_by_email(body.username, db)
     if user is None:
@@ -71,7 +74,7 @@ async def logout(token: str = Depends(auth_service.oauth2_scheme)) -> JSONRespon
 @router.get("/refresh_token", response_model=schemas.TokenModel)
 async def refresh_token(
     credentials: HTTPAuthorizationCredentials = Security(security),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     token = credentials.credentials
     email = await auth_service.decode_refresh_token(token)
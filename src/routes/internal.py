@@ -0,0 +1,34 @@
+from typing import Dict
+
+from fastapi import APIRouter, Depends
+
+from src.database.db import async_engine, engine
+from src.database.replicas import async_replica_engines, replica_engines
+from src.database.shards import shard_engines, sync_shard_engines
+from src.schemas import PoolStats
+from src.services.auth import auth_service
+
+# Hidden from the docs, but still reachable; only logged-in users get answers.
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(auth_service.get_current_user)],
+)
+
+
+@router.get("/db-pool", response_model=Dict[str, PoolStats])
+async def get_db_pool_stats():
+    stats = {
+        "sync": engine.pool.stats(),
+        "async": async_engine.sync_engine.pool.stats(),
+    }
+    for i, replica_engine in enumerate(replica_engines):
+        stats[f"replica_{i}_sync"] = replica_engine.pool.stats()
+    for i, replica_engine in enumerate(async_replica_engines):
+        stats[f"replica_{i}_async"] = replica_engine.sync_engine.pool.stats()
+    for i, shard_engine in enumerate(sync_shard_engines):
+        stats[f"shard_{i}_sync"] = shard_engine.pool.stats()
+    for i, shard_engine in enumerate(shard_engines):
+        stats[f"shard_{i}_async"] = shard_engine.sync_engine.pool.stats()
+    return stats
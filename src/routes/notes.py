@@ -1,13 +1,53 @@
-from typing import List
+from datetime import datetime
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 
-from src.database.db import get_db
+from src.database.db import get_async_db, get_session_factory
+from src.database.shards import (
+    ShardRouter,
+    get_note_db,
+    get_note_read_db,
+    get_read_shard_router,
+    get_shard_router,
+    get_user_read_db,
+    shard_session,
+    sync_sessions_for,
+)
+from src.repository import analytics_jobs as analytics_jobs_repository
 from src.repository import notes as notes_repository
+from src.repository import search as search_repository
 from src.services.analytics import AnalyticsService
+from src.services.analytics_cache import analytics_cache
+from src.services.analytics_jobs import run_analytics_job
+from src.services.note_export import export_user_notes
+from src.services.note_import import import_notes, iter_json_items, iter_ndjson_items
+from src.services.version_diff import diff_versions
 from src.services import ai as ai_service
-from src.schemas import Note, NoteCreate, NoteUpdate, NoteAnalytics, NoteVersion
+from src.schemas import (
+    AnalyticsJob,
+    BulkImportResult,
+    Note,
+    NoteCreate,
+    NoteUpdate,
+    NoteAnalytics,
+    NotePage,
+    NoteVersionPage,
+    SearchPage,
+    VersionDiff,
+)
 from src.services.auth import auth_service
 from src.database import models
 
@@ -17,64 +57,254 @@ router = APIRouter(prefix="/notes", tags=["notes"])
 gemini_model = ai_service.setup_gemini()
 
 
-@router.post("/", response_model=Note)
-async def create_note(note: NoteCreate, current_user: models.User = Depends(auth_service.get_current_user), db: Session = Depends(get_db)):
-    db_note = await notes_repository.create_note(note, current_user.id, db)
+async def get_current_user_db(
+    current_user: models.User = Depends(auth_service.get_current_user),
+    router: ShardRouter = Depends(get_shard_router),
+):
+    """A session on the shard holding the current user's notes."""
+    async with shard_session(router.for_user(current_user.id)) as db:
+        yield db
+
+
+async def get_current_user_read_db(
+    current_user: models.User = Depends(auth_service.get_current_user),
+    router: ShardRouter = Depends(get_read_shard_router),
+):
+    async with shard_session(router.for_user(current_user.id)) as db:
+        yield db
 
+
+@router.post("/", response_model=Note)
+async def create_note(note: NoteCreate, current_user: models.User = Depends(auth_service.get_current_user), db: AsyncSession = Depends(get_current_user_db)):
+    # Summarize first so the note is written in a single short transaction.
     summary = await ai_service.generate_summary(note.content, model=gemini_model)
-    if summary:
-        db_note.ai_summary = summary
-        db.commit()
+    return await notes_repository.create_note(note, current_user.id, db, summary)
+
+
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_create_notes(
+    request: Request,
+    current_user: models.User = Depends(auth_service.get_current_user),
+    db: AsyncSession = Depends(get_current_user_db),
+):
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        items = iter_ndjson_items(request.stream())
+    else:
+        try:
+            payload = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body is not valid JSON")
+        if not isinstance(payload, list):
+            raise HTTPException(
+                status_code=400, detail="Expected a JSON array of notes"
+            )
+        items = iter_json_items(payload)
+    return await import_notes(items, current_user.id, db)
+
 
-    return db_note
+@router.get("/search", response_model=SearchPage)
+async def search_notes(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: models.User = Depends(auth_service.get_current_user),
+    db: AsyncSession = Depends(get_current_user_read_db),
+):
+    try:
+        results, next_cursor = await search_repository.search_notes(
+            current_user.id, q, db, limit, cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return SearchPage(items=results, next_cursor=next_cursor)
 
 
 @router.get("/{note_id}", response_model=Note)
-async def get_note(note_id: int, db: Session = Depends(get_db)):
+async def get_note(note_id: int, db: AsyncSession = Depends(get_note_read_db)):
     note = await notes_repository.get_note(note_id, db)
     if note is None:
         raise HTTPException(status_code=404, detail="Note not found")
     return note
 
 
-@router.get("/user/{user_id}", response_model=List[Note])
-async def get_user_notes(user_id: int, db: Session = Depends(get_db)):
-    return await notes_repository.get_user_notes(user_id, db)
+@router.get("/user/{user_id}", response_model=NotePage)
+async def get_user_notes(
+    user_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    sort_by: Literal["updated_at", "created_at"] = "updated_at",
+    order: Literal["asc", "desc"] = "desc",
+    include_versions: bool = False,
+    versions_limit: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_user_read_db),
+):
+    try:
+        notes, next_cursor = await notes_repository.get_user_notes_page(
+            user_id,
+            db,
+            limit,
+            cursor,
+            sort_by,
+            order,
+            include_versions,
+            versions_limit,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return NotePage(items=notes, next_cursor=next_cursor)
+
+
+@router.get("/user/{user_id}/export")
+async def export_notes(
+    user_id: int,
+    include_versions: bool = False,
+    router: ShardRouter = Depends(get_read_shard_router),
+):
+    return StreamingResponse(
+        export_user_notes(user_id, router.for_user(user_id), include_versions),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="notes-{user_id}.ndjson"'
+        },
+    )
 
 
 @router.put("/{note_id}", response_model=Note)
 async def update_note(
-    note_id: int, note_update: NoteUpdate, db: Session = Depends(get_db)
+    note_id: int, note_update: NoteUpdate, db: AsyncSession = Depends(get_note_db)
 ):
-    updated_note = await notes_repository.update_note(note_id, note_update, db)
-    if updated_note is None:
+    # Look the note up first so a missing one never costs a summary call.
+    if not await notes_repository.note_exists(note_id, db):
         raise HTTPException(status_code=404, detail="Note not found")
-
+    summary = None
     if note_update.content:
         summary = await ai_service.generate_summary(note_update.content, model=gemini_model)
-        if summary:
-            updated_note.ai_summary = summary
-            db.commit()
 
+    updated_note = await notes_repository.update_note(note_id, note_update, db, summary)
+    if updated_note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
     return updated_note
 
 
 @router.delete("/{note_id}")
-async def delete_note(note_id: int, db: Session = Depends(get_db)):
+async def delete_note(note_id: int, db: AsyncSession = Depends(get_note_db)):
     if not await notes_repository.delete_note(note_id, db):
         raise HTTPException(status_code=404, detail="Note not found")
     return {"message": "Note deleted successfully"}
 
 
-@router.get("/{note_id}/versions", response_model=List[NoteVersion])
-async def get_note_versions(note_id: int, db: Session = Depends(get_db)):
-    note = await notes_repository.get_note(note_id, db)
-    if not note:
+@router.get("/{note_id}/versions", response_model=NoteVersionPage)
+async def get_note_versions(
+    note_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_note_read_db),
+):
+    if not await notes_repository.note_exists(note_id, db):
         raise HTTPException(status_code=404, detail="Note not found")
-    return await notes_repository.get_note_versions(note_id, db)
+    try:
+        versions, next_cursor = await notes_repository.get_note_versions_page(
+            note_id, db, limit, cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return NoteVersionPage(items=versions, next_cursor=next_cursor)
+
+
+@router.get(
+    "/{note_id}/versions/{from_version}/diff/{to_version}",
+    response_model=VersionDiff,
+    response_model_exclude_none=True,
+)
+async def diff_note_versions(
+    note_id: int,
+    from_version: int,
+    to_version: int,
+    format: Literal["unified", "structured"] = "unified",
+    db: AsyncSession = Depends(get_note_read_db),
+):
+    if not await notes_repository.note_exists(note_id, db):
+        raise HTTPException(status_code=404, detail="Note not found")
+    diff = await diff_versions(note_id, from_version, to_version, db, format)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return diff
 
 
 @router.get("/analytics/stats", response_model=NoteAnalytics)
-def get_notes_analytics(db: Session = Depends(get_db)):
-    analytics_service = AnalyticsService(db)
-    return analytics_service.get_notes_analytics()
+async def get_notes_analytics(
+    full_notes: bool = False,
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    distributions: bool = False,
+    router: ShardRouter = Depends(get_read_shard_router),
+):
+    cache_key = await analytics_cache.key_for(
+        user_id, since, until, full_notes, distributions
+    )
+    cached = await analytics_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    def compute_analytics():
+        # A user's notes are on one shard; global analytics merge all of them.
+        shards = [
+            session_factory() for session_factory in sync_sessions_for(router, user_id)
+        ]
+        try:
+            return AnalyticsService(shards[0], shards=shards).get_notes_analytics(
+                full_notes=full_notes,
+                user_id=user_id,
+                since=since,
+                until=until,
+                distributions=distributions,
+            )
+        finally:
+            for db in shards:
+                db.close()
+
+    analytics = await run_in_threadpool(compute_analytics)
+    await analytics_cache.set(cache_key, analytics)
+    return analytics
+
+
+@router.post(
+    "/analytics/jobs",
+    response_model=AnalyticsJob,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_analytics_job(
+    background_tasks: BackgroundTasks,
+    full_notes: bool = False,
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+    session_factory: sessionmaker = Depends(get_session_factory),
+    router: ShardRouter = Depends(get_read_shard_router),
+):
+    job = await analytics_jobs_repository.get_active_job(
+        user_id, since, until, full_notes, db
+    )
+    if job is None:
+        job = await analytics_jobs_repository.create_job(
+            user_id, since, until, full_notes, db
+        )
+        background_tasks.add_task(
+            run_analytics_job,
+            job.id,
+            session_factory,
+            sync_sessions_for(router, user_id),
+        )
+    return job
+
+
+@router.get("/analytics/jobs/{job_id}", response_model=AnalyticsJob)
+async def get_analytics_job(
+    job_id: str, db: AsyncSession = Depends(get_async_db)
+):
+    job = await analytics_jobs_repository.get_job(job_id, db)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analytics job not found")
+    return job
@@ -1,5 +1,5 @@
-from typing import List, Optional
-from pydantic import BaseModel, EmailStr, ConfigDict
+from typing import List, Optional, Union
+from pydantic import BaseModel, EmailStr, ConfigDict, field_validator
 from datetime import datetime
 
 
@@ -50,12 +50,126 @@ class Note(NoteBase):
     versions: List[NoteVersion] = []
 
 
+class NotePage(BaseModel):
+    items: List[Note]
+    next_cursor: Optional[str] = None
+
+
+class SearchResult(BaseModel):
+    model_config = ConfigDict(extra="ignore", from_attributes=True)
+    id: int
+    title: str
+    snippet: str
+    rank: float
+    updated_at: datetime
+
+
+class SearchPage(BaseModel):
+    items: List[SearchResult]
+    next_cursor: Optional[str] = None
+
+
+class NoteVersionPage(BaseModel):
+    items: List[NoteVersion]
+    next_cursor: Optional[str] = None
+
+
+class DiffChange(BaseModel):
+    op: str
+    old_start: int
+    old_end: int
+    new_start: int
+    new_end: int
+    old_lines: List[str]
+    new_lines: List[str]
+
+
+class VersionDiff(BaseModel):
+    note_id: int
+    from_version: int
+    to_version: int
+    format: str
+    unified: Optional[str] = None
+    changes: Optional[List[DiffChange]] = None
+
+
+class BulkImportItem(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkImportResult(BaseModel):
+    created: int
+    failed: int
+    items: List[BulkImportItem]
+
+
+class NoteSummary(BaseModel):
+    model_config = ConfigDict(extra="ignore", from_attributes=True)
+    id: int
+    title: str
+    word_count: int
+    updated_at: datetime
+
+
+class HistogramBucket(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+
+class Distribution(BaseModel):
+    count: int
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+    max: int
+    histogram: List[HistogramBucket]
+
+
 class NoteAnalytics(BaseModel):
     total_word_count: int
     average_note_length: float
     most_common_words: list[tuple[str, int]]
-    longest_notes: List[Note]
-    shortest_notes: List[Note]
+    longest_notes: Union[List[NoteSummary], List[Note]]
+    shortest_notes: Union[List[NoteSummary], List[Note]]
+    word_count_distribution: Optional[Distribution] = None
+    note_bytes_distribution: Optional[Distribution] = None
+    version_bytes_distribution: Optional[Distribution] = None
+
+
+class AnalyticsJob(BaseModel):
+    model_config = ConfigDict(extra="ignore", from_attributes=True)
+    id: str
+    status: str
+    processed_notes: int
+    total_notes: Optional[int] = None
+    result: Optional[NoteAnalytics] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    @field_validator("result", mode="before")
+    @classmethod
+    def parse_result(cls, value):
+        if isinstance(value, str):
+            return NoteAnalytics.model_validate_json(value)
+        return value
+
+
+class PoolStats(BaseModel):
+    pool_size: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    timeouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
+    avg_hold_ms: float
+    max_hold_ms: float
 
 
 class TokenModel(BaseModel):
@@ -0,0 +1,38 @@
+import argparse
+
+from src.database.shards import get_default_router
+from src.services.version_retention import compact_history
+
+
+def main():
+    # Meant to run on a schedule, e.g. nightly from cron.
+    parser = argparse.ArgumentParser(
+        description="Delete note versions dropped by the retention policy."
+    )
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument(
+        "--pause", type=float, default=0.1, help="Seconds to wait between batches"
+    )
+    args = parser.parse_args()
+
+    stats = {}
+    for session_factory in get_default_router().sync_sessions:
+        db = session_factory()
+        try:
+            shard_stats = compact_history(
+                db, batch_size=args.batch_size, pause=args.pause
+            )
+        finally:
+            db.close()
+        for key, value in shard_stats.items():
+            stats[key] = stats.get(key, 0) + value
+
+    print(
+        f"Compacted {stats['compacted']} of {stats['notes']} notes: deleted "
+        f"{stats['deleted']} versions, re-encoded {stats['rewritten']}"
+    )
+    print(f"Reclaimed {stats['bytes_reclaimed']} bytes of version content")
+
+
+if __name__ == "__main__":
+    main()
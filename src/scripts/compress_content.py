@@ -0,0 +1,44 @@
+import argparse
+
+from src.database.shards import get_default_router
+from src.services.content_compression import recompress_content
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recompress the stored content of notes and note versions."
+    )
+    parser.add_argument(
+        "--codec",
+        choices=["none", "zlib", "zstd"],
+        help="Codec to store content with (default: CONTENT_COMPRESSION)",
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--pause", type=float, default=0.1, help="Seconds to wait between batches"
+    )
+    args = parser.parse_args()
+
+    stats = {}
+    for session_factory in get_default_router().sync_sessions:
+        db = session_factory()
+        try:
+            shard_stats = recompress_content(
+                db, args.codec, args.batch_size, args.pause
+            )
+        finally:
+            db.close()
+        for key, value in shard_stats.items():
+            stats[key] = stats.get(key, 0) + value
+
+    saved = stats["bytes_before"] - stats["bytes_after"]
+    ratio = saved / stats["bytes_before"] if stats["bytes_before"] else 0
+    print(f"Rewrote {stats['rewritten']} of {stats['rows']} rows")
+    print(
+        f"Stored content: {stats['bytes_before']} -> {stats['bytes_after']} bytes "
+        f"({saved} bytes saved, {ratio:.1%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
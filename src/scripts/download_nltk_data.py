@@ -0,0 +1,15 @@
+import nltk
+
+from src.conf.config import settings
+from src.services.tokenizers import NLTK_RESOURCES
+
+
+def main():
+    for resource in NLTK_RESOURCES:
+        if not nltk.download(resource, download_dir=settings.nltk_data_dir):
+            raise SystemExit(f"Failed to download NLTK resource {resource!r}")
+    print(f"NLTK data is available in {settings.nltk_data_dir}")
+
+
+if __name__ == "__main__":
+    main()
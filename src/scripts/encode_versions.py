@@ -0,0 +1,47 @@
+import argparse
+
+from src.database.shards import get_default_router
+from src.services.version_storage import convert_history
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-encode stored note versions as snapshots and deltas."
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["full", "delta"],
+        help="Storage mode to convert to (default: VERSION_STORAGE)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        help="Versions per snapshot (default: VERSION_SNAPSHOT_INTERVAL)",
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    stats = {}
+    for session_factory in get_default_router().sync_sessions:
+        db = session_factory()
+        try:
+            shard_stats = convert_history(db, args.mode, args.interval, args.batch_size)
+        finally:
+            db.close()
+        for key, value in shard_stats.items():
+            stats[key] = stats.get(key, 0) + value
+
+    saved = stats["bytes_before"] - stats["bytes_after"]
+    ratio = saved / stats["bytes_before"] if stats["bytes_before"] else 0
+    print(
+        f"Converted {stats['versions']} versions of {stats['notes']} notes, "
+        f"rewrote {stats['rewritten']}"
+    )
+    print(
+        f"Stored content: {stats['bytes_before']} -> {stats['bytes_after']} bytes "
+        f"({saved} bytes saved, {ratio:.1%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+from src.database.shards import prepare_shard, sync_shard_engines
+
+
+def main():
+    # Run after migrating every shard (`alembic -x url=<shard url> upgrade head`).
+    for shard, shard_engine in enumerate(sync_shard_engines):
+        with shard_engine.begin() as connection:
+            prepare_shard(connection, shard)
+        print(f"Prepared shard {shard}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import argparse
+import asyncio
+
+from src.conf.config import settings
+from src.database.shards import get_default_router
+from src.services.note_purge import purge_deleted_notes
+
+
+async def purge_forever(once: bool = False):
+    router = get_default_router()
+    while True:
+        for shard, session_factory in enumerate(router.sessions):
+            versions, notes = await purge_deleted_notes(session_factory)
+            if versions or notes:
+                print(f"Purged {notes} notes and {versions} versions on shard {shard}")
+        if once:
+            return
+        await asyncio.sleep(settings.purge_idle_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Remove soft-deleted notes and their version history."
+    )
+    parser.add_argument(
+        "--once", action="store_true", help="Exit when nothing is left to purge"
+    )
+    args = parser.parse_args()
+    asyncio.run(purge_forever(args.once))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+from src.database.shards import get_default_router
+from src.services.analytics import AnalyticsService
+
+
+def main():
+    # Every shard keeps the aggregates of its own notes. Run with writes
+    # stopped; see AnalyticsService.rebuild_aggregates.
+    for shard, session_factory in enumerate(get_default_router().sync_sessions):
+        db = session_factory()
+        try:
+            processed = AnalyticsService(db).rebuild_aggregates()
+            print(f"Rebuilt analytics aggregates for {processed} notes on shard {shard}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
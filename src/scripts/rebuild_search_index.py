@@ -0,0 +1,46 @@
+import asyncio
+
+from sqlalchemy import select
+
+from src.database.models import Note
+from src.database.shards import get_default_router
+from src.repository import search as search_repository
+
+
+async def rebuild_search_index(batch_size: int = 1000) -> int:
+    """Write every note of every shard to the full-text index."""
+    indexed = 0
+    for session_factory in get_default_router().sessions:
+        indexed += await rebuild_shard_search_index(session_factory, batch_size)
+    return indexed
+
+
+async def rebuild_shard_search_index(session_factory, batch_size: int) -> int:
+    """Index one shard's notes, one transaction per batch."""
+    indexed = 0
+    last_note_id = 0
+    async with session_factory() as db:
+        while True:
+            documents = (
+                await db.execute(
+                    select(Note.id, Note.user_id, Note.title, Note.content)
+                    .where(Note.id > last_note_id, Note.deleted_at.is_(None))
+                    .order_by(Note.id)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not documents:
+                return indexed
+            await search_repository.index_notes(documents, db)
+            await db.commit()
+            indexed += len(documents)
+            last_note_id = documents[-1].id
+
+
+def main():
+    indexed = asyncio.run(rebuild_search_index())
+    print(f"Indexed {indexed} notes for search")
+
+
+if __name__ == "__main__":
+    main()
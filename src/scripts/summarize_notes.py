@@ -0,0 +1,35 @@
+import asyncio
+
+from src.database.models import Note
+from src.database.shards import get_default_router
+from src.services import ai as ai_service
+from src.services.summary_queue import summary_queue
+
+
+async def summarize_queued_notes():
+    model = ai_service.setup_gemini()
+    router = get_default_router()
+    while True:
+        note_id = await summary_queue.dequeue()
+        if note_id is None:
+            continue
+        session_factory = router.for_note(note_id)
+        if session_factory is None:
+            continue
+        async with session_factory() as db:
+            note = await db.get(Note, note_id)
+            if note is None or note.deleted_at or note.ai_summary:
+                continue
+            summary = await ai_service.generate_summary(note.content, model=model)
+            if summary:
+                note.ai_summary = summary
+                await db.commit()
+                print(f"Summarized note {note_id}")
+
+
+def main():
+    asyncio.run(summarize_queued_notes())
+
+
+if __name__ == "__main__":
+    main()
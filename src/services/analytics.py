@@ -1,67 +1,542 @@
-from collections import Counter
-from typing import List, Tuple
+import heapq
+import multiprocessing
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from sqlalchemy.orm import Session
+import numpy as np
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session, load_only, selectinload
 
+from src.conf.config import settings
 from src.database import models
-from src.schemas import NoteAnalytics
+from src.database.functions import octet_length
+from src.repository.analytics import STATISTICS_ROW_ID
+from src.schemas import (
+    Distribution,
+    HistogramBucket,
+    Note,
+    NoteAnalytics,
+    NoteSummary,
+)
+from src.services.tokenizers import get_stop_words, tokenize_and_clean
+from src.services.version_storage import decode_versions
 
-nltk.download("punkt")
-nltk.download("stopwords")
-nltk.download("punkt_tab")
+
+def tokenize_shard(
+    shard: Sequence[Tuple[int, str]], tokenizer: Optional[str] = None
+) -> Tuple[Counter, List[Tuple[int, int]]]:
+    """Tokenize a shard of `(note_id, content)` rows.
+
+    Returns the shard's word counter and the word count of every note in it.
+    Lives at module level so it can be shipped to worker processes.
+    """
+    word_counts = Counter()
+    lengths = []
+    for note_id, content in shard:
+        words = tokenize_and_clean(content, tokenizer)
+        word_counts.update(words)
+        lengths.append((note_id, len(words)))
+    return word_counts, lengths
+
+
+# Worker pools by size, shared across requests and shut down with the app.
+_executors: Dict[int, ProcessPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    with _executors_lock:
+        if workers in _executors:
+            return _executors[workers]
+        # The pool is first used from a threadpool worker of a running server;
+        # forking a multi-threaded process can deadlock the children, so they
+        # are spawned fresh instead.
+        executor = _executors[workers] = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        return executor
+
+
+def shutdown_executors() -> None:
+    """Stop the tokenizer worker processes; called on application shutdown."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(cancel_futures=True)
+
+
+def describe_distribution(
+    values: np.ndarray, bins: Optional[int] = None
+) -> Optional[Distribution]:
+    """Percentiles and a histogram of a 1-D array, computed in NumPy."""
+    if not values.size:
+        return None
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    counts, edges = np.histogram(
+        values, bins=bins or settings.analytics_histogram_bins
+    )
+    return Distribution(
+        count=values.size,
+        mean=float(values.mean()),
+        p50=float(p50),
+        p90=float(p90),
+        p99=float(p99),
+        max=int(values.max()),
+        histogram=[
+            HistogramBucket(lower=float(lower), upper=float(upper), count=int(count))
+            for lower, upper, count in zip(edges[:-1], edges[1:], counts)
+        ],
+    )
+
+
+def _push_top(heap: list, key: tuple, size: int = 3) -> None:
+    """Keep the `size` largest keys seen so far in a min-heap."""
+    if len(heap) < size:
+        heapq.heappush(heap, key)
+    elif key > heap[0]:
+        heapq.heapreplace(heap, key)
 
 
 class AnalyticsService:
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        chunk_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        tokenizer: Optional[str] = None,
+        shards: Optional[Sequence[Session]] = None,
+    ):
         self.db = db
-        self.stop_words = set(stopwords.words("english"))
-
-    def get_notes_analytics(self):
-        notes = self.db.query(models.Note).all()
-
-        if not notes:
-            return NoteAnalytics(
-                total_word_count=0,
-                average_note_length=0.0,
-                most_common_words=[],
-                longest_notes=[],
-                shortest_notes=[],
+        # Sessions on every database holding notes; reads fan out over them.
+        self.shards = list(shards) if shards else [db]
+        self.stop_words = get_stop_words()
+        self.chunk_size = chunk_size or settings.analytics_scan_chunk_size
+        self.workers = workers or settings.analytics_workers
+        self.tokenizer = tokenizer or settings.analytics_tokenizer
+
+    def get_notes_analytics(
+        self,
+        full_notes: bool = False,
+        user_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        progress: Optional[Callable[[int], None]] = None,
+        distributions: bool = False,
+    ):
+        """Read the aggregates maintained by the notes repository on write.
+
+        Longest/shortest notes are compact summaries unless `full_notes` is
+        set, in which case whole notes are returned with their versions.
+        Analytics for a single user or for notes last updated inside a time
+        window are not pre-aggregated and fall back to a filtered scan.
+        With `distributions`, percentiles and histograms of note lengths and
+        of note/version sizes in bytes are added to the result.
+        """
+        if user_id is not None or since is not None or until is not None:
+            return self.scan_notes_analytics(
+                full_notes, user_id, since, until, progress, distributions
             )
 
-        note_lengths = []
-        all_words = []
+        note_count = 0
+        word_count = 0
+        for db in self.shards:
+            statistics = db.get(models.NoteStatistics, STATISTICS_ROW_ID)
+            if statistics is not None:
+                note_count += statistics.note_count
+                word_count += statistics.word_count
 
-        for note in notes:
-            words = self._tokenize_and_clean(note.content)
-            note_lengths.append((len(words), note))
-            all_words.extend(words)
+        if not note_count:
+            return self._empty_analytics()
 
-        note_lengths.sort(key=lambda x: x[0])
+        # Every shard's top 3 goes into the merge, ordered as on one database.
+        longest_notes = sorted(
+            (
+                note
+                for db in self.shards
+                for note in self._ranked_notes_query(full_notes, db)
+                .filter(models.Note.deleted_at.is_(None))
+                .order_by(models.Note.word_count.desc(), models.Note.id)
+                .limit(3)
+            ),
+            key=lambda note: (-note.word_count, note.id),
+        )[:3]
+        shortest_notes = sorted(
+            (
+                note
+                for db in self.shards
+                for note in self._ranked_notes_query(full_notes, db)
+                .filter(models.Note.deleted_at.is_(None))
+                .order_by(models.Note.word_count, models.Note.id)
+                .limit(3)
+            ),
+            key=lambda note: (note.word_count, note.id),
+        )[:3]
 
-        shortest_notes = [note for _, note in note_lengths[:3]]
-        longest_notes = [note for _, note in reversed(note_lengths[-3:])]
+        analytics = NoteAnalytics(
+            total_word_count=word_count,
+            average_note_length=word_count / note_count,
+            most_common_words=self._most_common_terms(),
+            longest_notes=self._serialize_notes(longest_notes, full_notes),
+            shortest_notes=self._serialize_notes(shortest_notes, full_notes),
+        )
+        if distributions:
+            word_counts = self._collect_column(
+                self._filter_notes(select(models.Note.word_count))
+            )
+            return self._with_distributions(analytics, word_counts)
+        return analytics
 
-        total_words = len(all_words)
-        avg_length = total_words / len(notes) if notes else 0.0
-        most_common = self._get_most_common_words(all_words)
+    def scan_notes_analytics(
+        self,
+        full_notes: bool = False,
+        user_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        progress: Optional[Callable[[int], None]] = None,
+        distributions: bool = False,
+    ):
+        """Recompute the analytics from scratch by tokenizing every note.
 
-        return NoteAnalytics(
+        Notes are streamed in chunks from a server-side cursor, so only the
+        running word counter and the top-3 heaps stay in memory. With more
+        than one worker configured, chunks are tokenized in a process pool.
+        `progress` is called with the number of notes processed so far after
+        every chunk.
+        """
+        word_counts = Counter()
+        longest = []
+        shortest = []
+        note_count = 0
+        length_chunks = []
+
+        chunks = self._iter_note_chunks(user_id, since, until)
+        for shard_counts, lengths in self._tokenize_chunks(chunks):
+            word_counts.update(shard_counts)
+            for note_id, length in lengths:
+                note_count += 1
+                _push_top(longest, (length, -note_id))
+                _push_top(shortest, (-length, -note_id))
+            if distributions:
+                length_chunks.append(
+                    np.fromiter(
+                        (length for _, length in lengths),
+                        dtype=np.int32,
+                        count=len(lengths),
+                    )
+                )
+            if progress is not None:
+                progress(note_count)
+
+        if not note_count:
+            return self._empty_analytics()
+
+        lengths = {-note_id: length for length, note_id in longest}
+        lengths.update({-note_id: -length for length, note_id in shortest})
+        longest_ids = [-key[1] for key in sorted(longest, reverse=True)]
+        shortest_ids = [-key[1] for key in sorted(shortest, reverse=True)]
+        notes = {
+            note.id: note
+            for db in self.shards
+            for note in self._ranked_notes_query(full_notes, db).filter(
+                models.Note.id.in_(longest_ids + shortest_ids)
+            )
+        }
+
+        total_words = sum(word_counts.values())
+        analytics = NoteAnalytics(
             total_word_count=total_words,
-            average_note_length=avg_length,
-            most_common_words=most_common,
-            longest_notes=longest_notes,
-            shortest_notes=shortest_notes,
+            average_note_length=total_words / note_count,
+            most_common_words=word_counts.most_common(10),
+            longest_notes=self._serialize_notes(
+                (notes[note_id] for note_id in longest_ids), full_notes, lengths
+            ),
+            shortest_notes=self._serialize_notes(
+                (notes[note_id] for note_id in shortest_ids), full_notes, lengths
+            ),
         )
+        if distributions:
+            return self._with_distributions(
+                analytics, np.concatenate(length_chunks), user_id, since, until
+            )
+        return analytics
 
-    def _tokenize_and_clean(self, text: str) -> List[str]:
-        tokens = word_tokenize(text.lower())
+    def count_notes(
+        self,
+        user_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> int:
+        query = self._filter_notes(
+            select(func.count()).select_from(models.Note), user_id, since, until
+        )
+        return sum(db.execute(query).scalar_one() for db in self.shards)
+
+    def rebuild_aggregates(self) -> int:
+        """Backfill per-note word counts and the global term frequencies.
+
+        Maintenance only: run it while nothing writes notes. The whole
+        backfill is one transaction, so the notes it has updated stay locked
+        until the end. It also replaces the term table at the end, which
+        drops any delta committed after its note was scanned. Returns the
+        number of notes processed.
+        """
+        word_counts = Counter()
+        note_count = 0
+
+        for shard_counts, lengths in self._tokenize_chunks(self._iter_note_pages()):
+            word_counts.update(shard_counts)
+            self.db.execute(
+                update(models.Note),
+                [
+                    {"id": note_id, "word_count": length}
+                    for note_id, length in lengths
+                ],
+            )
+            note_count += len(lengths)
+
+        self.db.execute(delete(models.TermFrequency))
+        self.db.add_all(
+            models.TermFrequency(term=term, count=count)
+            for term, count in word_counts.items()
+        )
+        self.db.merge(
+            models.NoteStatistics(
+                id=STATISTICS_ROW_ID,
+                note_count=note_count,
+                word_count=sum(word_counts.values()),
+            )
+        )
+        self.db.commit()
+        return note_count
+
+    def _with_distributions(
+        self,
+        analytics: NoteAnalytics,
+        word_counts: np.ndarray,
+        user_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> NoteAnalytics:
+        """Add length and size distributions; sizes are measured in SQL."""
+        note_bytes = self._filter_notes(
+            select(octet_length(models.Note.content)), user_id, since, until
+        )
+        version_bytes = self._filter_notes(
+            select(octet_length(models.NoteVersion.content)).join(
+                models.NoteVersion.note
+            ),
+            user_id,
+            since,
+            until,
+        )
+
+        return analytics.model_copy(
+            update={
+                "word_count_distribution": describe_distribution(word_counts),
+                "note_bytes_distribution": describe_distribution(
+                    self._collect_column(note_bytes, np.int64)
+                ),
+                "version_bytes_distribution": describe_distribution(
+                    self._collect_column(version_bytes, np.int64)
+                ),
+            }
+        )
+
+    def _collect_column(self, query, dtype=np.int32) -> np.ndarray:
+        """Stream a single integer column into a NumPy array, chunk by chunk."""
+        parts = [
+            np.fromiter((row[0] for row in chunk), dtype=dtype, count=len(chunk))
+            for db in self.shards
+            for chunk in db.execute(
+                query.execution_options(yield_per=self.chunk_size)
+            ).partitions()
+        ]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+    def _most_common_terms(self, top_n: int = 10) -> List[Tuple[str, int]]:
+        """The exact `top_n` terms over all shards' term frequencies.
+
+        With several shards this runs the three-phase TPUT algorithm: the
+        shards' own top terms give a lower bound on the `top_n`-th total, any
+        term reaching it must count at least `bound / shards` somewhere, and
+        only those candidates are summed exactly.
+        """
+        frequency = models.TermFrequency
+        ranked = select(frequency.term, frequency.count).order_by(
+            frequency.count.desc(), frequency.term
+        )
+        if len(self.shards) == 1:
+            return [tuple(row) for row in self.db.execute(ranked.limit(top_n))]
+
+        partial = Counter()
+        for db in self.shards:
+            partial.update(dict(db.execute(ranked.limit(top_n)).all()))
+        if not partial:
+            return []
+        bound = sorted(partial.values(), reverse=True)[: top_n][-1]
+        threshold = bound / len(self.shards)
+
+        partial = Counter()
+        seen_on = Counter()
+        for db in self.shards:
+            for term, count in db.execute(ranked.where(frequency.count >= threshold)):
+                partial[term] += count
+                seen_on[term] += 1
+        bound = sorted(partial.values(), reverse=True)[: top_n][-1]
+        # Elsewhere a candidate counts less than the threshold on each shard.
+        candidates = [
+            term
+            for term, count in partial.items()
+            if count + threshold * (len(self.shards) - seen_on[term]) >= bound
+        ]
+
+        totals = Counter()
+        for db in self.shards:
+            for start in range(0, len(candidates), self.chunk_size):
+                totals.update(
+                    dict(
+                        db.execute(
+                            select(frequency.term, frequency.count).where(
+                                frequency.term.in_(
+                                    candidates[start : start + self.chunk_size]
+                                )
+                            )
+                        ).all()
+                    )
+                )
+        return sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:top_n]
+
+    def _ranked_notes_query(self, full_notes: bool, db: Optional[Session] = None):
+        db = db or self.db
+        if full_notes:
+            return db.query(models.Note).options(
+                selectinload(models.Note.versions)
+            )
+        return db.query(models.Note).options(
+            load_only(
+                models.Note.id,
+                models.Note.title,
+                models.Note.word_count,
+                models.Note.updated_at,
+            )
+        )
+
+    def _serialize_notes(
+        self,
+        notes: Iterable[models.Note],
+        full_notes: bool,
+        lengths: Optional[Dict[int, int]] = None,
+    ) -> List[Union[Note, NoteSummary]]:
+        if full_notes:
+            notes = list(notes)
+            for note in notes:
+                decode_versions(note.versions)
+            return [Note.model_validate(note) for note in notes]
         return [
-            word for word in tokens if word.isalnum() and word not in self.stop_words
+            NoteSummary(
+                id=note.id,
+                title=note.title,
+                word_count=lengths[note.id] if lengths else note.word_count,
+                updated_at=note.updated_at,
+            )
+            for note in notes
         ]
 
+    def _iter_note_chunks(
+        self,
+        user_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ):
+        query = self._filter_notes(
+            select(models.Note.id, models.Note.content), user_id, since, until
+        )
+        for db in self.shards:
+            result = db.execute(
+                query.order_by(models.Note.id).execution_options(
+                    yield_per=self.chunk_size
+                )
+            )
+            for chunk in result.partitions():
+                yield [tuple(row) for row in chunk]
+
+    def _filter_notes(
+        self,
+        query,
+        user_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ):
+        """Only live notes, restricted to a user and an update window if given."""
+        query = query.where(models.Note.deleted_at.is_(None))
+        if user_id is not None:
+            query = query.where(models.Note.user_id == user_id)
+        if since is not None:
+            query = query.where(models.Note.updated_at >= since)
+        if until is not None:
+            query = query.where(models.Note.updated_at < until)
+        return query
+
+    def _iter_note_pages(self):
+        """Keyset-paginated chunks; notes written between chunks do not shift
+        the pages that follow."""
+        last_id = 0
+        while True:
+            chunk = self.db.execute(
+                select(models.Note.id, models.Note.content)
+                .where(models.Note.id > last_id, models.Note.deleted_at.is_(None))
+                .order_by(models.Note.id)
+                .limit(self.chunk_size)
+            ).all()
+            if not chunk:
+                return
+            yield [tuple(row) for row in chunk]
+            last_id = chunk[-1].id
+
+    def _tokenize_chunks(
+        self, chunks: Iterable[List[Tuple[int, str]]]
+    ) -> Iterator[Tuple[Counter, List[Tuple[int, int]]]]:
+        if self.workers <= 1:
+            for chunk in chunks:
+                yield tokenize_shard(chunk, self.tokenizer)
+            return
+
+        # Keep a bounded number of shards in flight so memory stays flat.
+        executor = _get_executor(self.workers)
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(tokenize_shard, chunk, self.tokenizer))
+            if len(pending) >= self.workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def _empty_analytics(self) -> NoteAnalytics:
+        return NoteAnalytics(
+            total_word_count=0,
+            average_note_length=0.0,
+            most_common_words=[],
+            longest_notes=[],
+            shortest_notes=[],
+        )
+
+    def _tokenize_and_clean(self, text: str) -> List[str]:
+        return tokenize_and_clean(text, self.tokenizer)
+
     def _get_most_common_words(
         self, words: List[str], top_n: int = 10
     ) -> List[Tuple[str, int]]:
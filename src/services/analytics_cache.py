@@ -0,0 +1,78 @@
+from datetime import datetime
+from typing import Optional
+
+import redis.asyncio as redis
+
+from src.conf.config import settings
+from src.database.db import redis_db
+from src.schemas import NoteAnalytics
+
+
+class AnalyticsCache:
+    """Caches NoteAnalytics in Redis, keyed by the query parameters.
+
+    Every key embeds a generation counter for its scope (all notes, or one
+    user's notes). Writing a note bumps the counters of that user and of the
+    global scope, which makes all of their cached entries unreachable at
+    once; the stale entries simply expire.
+    """
+
+    PREFIX = "analytics"
+
+    def __init__(self, redis_client, ttl: int):
+        self.redis_db = redis_client
+        self.ttl = ttl
+
+    def _generation_key(self, scope: str) -> str:
+        return f"{self.PREFIX}:generation:{scope}"
+
+    async def key_for(
+        self,
+        user_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        full_notes: bool = False,
+        distributions: bool = False,
+    ) -> Optional[str]:
+        scope = "all" if user_id is None else f"user:{user_id}"
+        try:
+            generation = await self.redis_db.get(self._generation_key(scope))
+        except redis.RedisError as e:
+            print(f"Error reading analytics cache generation: {e}")
+            return None
+
+        window = ":".join(
+            value.isoformat() if value else "" for value in (since, until)
+        )
+        return (
+            f"{self.PREFIX}:{scope}:{int(generation or 0)}:{window}"
+            f":{int(full_notes)}:{int(distributions)}"
+        )
+
+    async def get(self, key: Optional[str]) -> Optional[NoteAnalytics]:
+        if key is None:
+            return None
+        try:
+            cached = await self.redis_db.get(key)
+        except redis.RedisError as e:
+            print(f"Error reading analytics cache: {e}")
+            return None
+        return NoteAnalytics.model_validate_json(cached) if cached else None
+
+    async def set(self, key: Optional[str], analytics: NoteAnalytics) -> None:
+        if key is None:
+            return
+        try:
+            await self.redis_db.setex(key, self.ttl, analytics.model_dump_json())
+        except redis.RedisError as e:
+            print(f"Error writing analytics cache: {e}")
+
+    async def invalidate(self, user_id: int) -> None:
+        try:
+            await self.redis_db.incr(self._generation_key(f"user:{user_id}"))
+            await self.redis_db.incr(self._generation_key("all"))
+        except redis.RedisError as e:
+            print(f"Error invalidating analytics cache: {e}")
+
+
+analytics_cache = AnalyticsCache(redis_db, settings.analytics_cache_ttl)
@@ -0,0 +1,61 @@
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Optional, Sequence
+
+from sqlalchemy.orm import sessionmaker
+
+from src.database.models import AnalyticsJob
+from src.services.analytics import AnalyticsService
+
+
+def run_analytics_job(
+    job_id: str,
+    session_factory: sessionmaker,
+    read_session_factories: Optional[Sequence[sessionmaker]] = None,
+) -> None:
+    """Compute the analytics for a job and persist the result on its row.
+
+    Runs outside the request that created the job, so it opens its own
+    sessions: some stream the notes (one per `read_session_factories`, e.g.
+    shards or a replica, if given), another records progress on the primary
+    without disturbing the open cursors.
+    """
+    read_session_factories = read_session_factories or [session_factory]
+    with ExitStack() as stack, session_factory() as jobs_db:
+        job = jobs_db.get(AnalyticsJob, job_id)
+        if job is None or job.status != AnalyticsJob.PENDING:
+            return
+
+        def report_progress(processed_notes: int) -> None:
+            job.processed_notes = processed_notes
+            jobs_db.commit()
+
+        try:
+            shards = [
+                stack.enter_context(read_session_factory())
+                for read_session_factory in read_session_factories
+            ]
+            analytics_service = AnalyticsService(shards[0], shards=shards)
+            job.status = AnalyticsJob.RUNNING
+            job.total_notes = analytics_service.count_notes(
+                job.user_id, job.since, job.until
+            )
+            jobs_db.commit()
+            analytics = analytics_service.get_notes_analytics(
+                full_notes=job.full_notes,
+                user_id=job.user_id,
+                since=job.since,
+                until=job.until,
+                progress=report_progress,
+            )
+        except Exception as e:
+            print(f"Analytics job {job_id} failed: {e}")
+            jobs_db.rollback()
+            job.status = AnalyticsJob.FAILED
+            job.error = str(e)
+        else:
+            job.status = AnalyticsJob.DONE
+            job.processed_notes = job.total_notes
+            job.result = analytics.model_dump_json()
+        job.finished_at = datetime.utcnow()
+        jobs_db.commit()
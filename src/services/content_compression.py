@@ -0,0 +1,64 @@
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import Text, bindparam, select, type_coerce, update
+from sqlalchemy.orm import Session
+
+from src.database.models import Note, NoteVersion
+from src.database.types import compress_text, decompress_text
+
+TABLES = (Note.__table__, NoteVersion.__table__)
+
+
+def recompress_content(
+    db: Session,
+    codec: Optional[str] = None,
+    batch_size: int = 500,
+    pause: float = 0.0,
+) -> Dict[str, int]:
+    """Rewrite the stored content of notes and versions with `codec`.
+
+    Rows are read and updated `batch_size` at a time, by primary key, in
+    their own transactions with `pause` seconds in between, so the
+    conversion can run next to live traffic. Each batch is locked while it
+    is rewritten, so an edit committed in the meantime is waited for and
+    recompressed rather than overwritten with the old text. Rows already
+    stored in the target form are left alone. Returns the rows seen and
+    rewritten and the stored bytes before and after.
+    """
+    stats = {"rows": 0, "rewritten": 0, "bytes_before": 0, "bytes_after": 0}
+    for table in TABLES:
+        # Read and write the stored form, bypassing CompressedText.
+        stored_content = type_coerce(table.c.content, Text)
+        rewrite = (
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values(content=bindparam("stored", type_=Text))
+        )
+        last_id = 0
+        while True:
+            rows = db.execute(
+                select(table.c.id, stored_content)
+                .where(table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(batch_size)
+                .with_for_update()
+            ).all()
+            if not rows:
+                break
+            changes = []
+            for row_id, stored in rows:
+                recompressed = compress_text(decompress_text(stored), codec)
+                stats["bytes_before"] += len(stored.encode())
+                stats["bytes_after"] += len(recompressed.encode())
+                if recompressed != stored:
+                    changes.append({"row_id": row_id, "stored": recompressed})
+            if changes:
+                db.execute(rewrite, changes)
+            db.commit()
+            stats["rows"] += len(rows)
+            stats["rewritten"] += len(changes)
+            last_id = rows[-1].id
+            if pause:
+                time.sleep(pause)
+    return stats
@@ -0,0 +1,30 @@
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.conf.config import settings
+from src.repository import notes as notes_repository
+from src.schemas import Note
+
+
+async def export_user_notes(
+    user_id: int,
+    session_factory: async_sessionmaker,
+    include_versions: bool = False,
+    chunk_size: Optional[int] = None,
+) -> AsyncIterator[str]:
+    """Serialize a user's notes as NDJSON lines, one chunk of notes at a time.
+
+    The response body outlives the request's dependencies, so the export
+    opens its own sessions: one holds the server-side cursor over the notes,
+    the other loads the versions of each chunk.
+    """
+    chunk_size = chunk_size or settings.export_chunk_size
+    async with session_factory() as db, session_factory() as versions_db:
+        async for notes in notes_repository.stream_user_notes(user_id, db, chunk_size):
+            if include_versions:
+                await notes_repository.load_versions(notes, versions_db)
+            yield "".join(
+                Note.model_validate(note).model_dump_json() + "\n" for note in notes
+            )
+            versions_db.expunge_all()
@@ -0,0 +1,99 @@
+from typing import Any, AsyncIterator, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import settings
+from src.repository import notes as notes_repository
+from src.schemas import BulkImportItem, BulkImportResult, NoteCreate
+from src.services.analytics_cache import analytics_cache
+from src.services.summary_queue import summary_queue
+
+
+async def iter_json_items(items: Iterable[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
+
+async def iter_ndjson_items(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a streamed NDJSON body into lines without buffering all of it."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, detail['loc'])) or 'item'}: {detail['msg']}"
+        for detail in error.errors(include_url=False)
+    )
+
+
+def _parse_item(item: Any) -> NoteCreate:
+    if isinstance(item, bytes):
+        return NoteCreate.model_validate_json(item)
+    return NoteCreate.model_validate(item)
+
+
+async def import_notes(
+    items: AsyncIterator[Any],
+    user_id: int,
+    db: AsyncSession,
+    batch_size: Optional[int] = None,
+) -> BulkImportResult:
+    """Create notes in batches, reporting the outcome of every item.
+
+    Invalid items are reported and skipped; a batch the database rejects is
+    rolled back and all of its items are reported as failed. Summaries of the
+    created notes are queued instead of being generated inline.
+    """
+    batch_size = batch_size or settings.bulk_import_batch_size
+    results: List[BulkImportItem] = []
+    batch: List[Tuple[int, NoteCreate]] = []
+
+    async def flush():
+        try:
+            note_ids = await notes_repository.create_notes_bulk(
+                [note for _, note in batch], user_id, db
+            )
+        except SQLAlchemyError as e:
+            await db.rollback()
+            print(f"Error importing notes: {e}")
+            results.extend(
+                BulkImportItem(index=index, error="Could not store the note")
+                for index, _ in batch
+            )
+        else:
+            results.extend(
+                BulkImportItem(index=index, id=note_id)
+                for (index, _), note_id in zip(batch, note_ids)
+            )
+            await summary_queue.enqueue(note_ids)
+        batch.clear()
+
+    index = 0
+    async for item in items:
+        try:
+            batch.append((index, _parse_item(item)))
+        except ValidationError as e:
+            results.append(BulkImportItem(index=index, error=_validation_message(e)))
+        index += 1
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    results.sort(key=lambda result: result.index)
+    created = sum(result.id is not None for result in results)
+    if created:
+        await analytics_cache.invalidate(user_id)
+    return BulkImportResult(
+        created=created, failed=len(results) - created, items=results
+    )
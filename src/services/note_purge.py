@@ -0,0 +1,33 @@
+import asyncio
+from typing import Optional, Tuple
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.conf.config import settings
+from src.repository import notes as notes_repository
+
+
+async def purge_deleted_notes(
+    session_factory: async_sessionmaker,
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+) -> Tuple[int, int]:
+    """Remove soft-deleted notes and their versions from one database.
+
+    Works in small transactions of `batch_size` rows and sleeps `pause`
+    seconds between them, so the purge never competes with requests for
+    locks or I/O for long. Returns the number of versions and notes removed.
+    """
+    batch_size = batch_size or settings.purge_batch_size
+    pause = settings.purge_batch_pause if pause is None else pause
+    purged_versions = purged_notes = 0
+    async with session_factory() as db:
+        while True:
+            versions, notes = await notes_repository.purge_deleted_notes(
+                db, batch_size
+            )
+            if not versions and not notes:
+                return purged_versions, purged_notes
+            purged_versions += versions
+            purged_notes += notes
+            await asyncio.sleep(pause)
@@ -0,0 +1,33 @@
+from typing import Iterable, Optional
+
+import redis.asyncio as redis
+
+from src.database.db import redis_db
+
+
+class SummaryQueue:
+    """Redis list of note ids waiting for an AI summary.
+
+    Filled by bulk imports, drained by `python -m src.scripts.summarize_notes`.
+    """
+
+    KEY = "notes:summary_queue"
+
+    def __init__(self, redis_client):
+        self.redis_db = redis_client
+
+    async def enqueue(self, note_ids: Iterable[int]) -> None:
+        note_ids = list(note_ids)
+        if not note_ids:
+            return
+        try:
+            await self.redis_db.lpush(self.KEY, *note_ids)
+        except redis.RedisError as e:
+            print(f"Error queueing notes for summarization: {e}")
+
+    async def dequeue(self, timeout: int = 5) -> Optional[int]:
+        item = await self.redis_db.brpop([self.KEY], timeout=timeout)
+        return int(item[1]) if item else None
+
+
+summary_queue = SummaryQueue(redis_db)
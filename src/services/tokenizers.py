@@ -0,0 +1,155 @@
+import os
+import re
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+import nltk
+from nltk.tokenize import word_tokenize
+from nltk.corpus import stopwords
+
+from src.conf.config import settings
+
+NLTK_RESOURCES = ("punkt", "punkt_tab", "stopwords")
+
+
+@lru_cache(maxsize=1)
+def init_nltk_data() -> None:
+    """Point NLTK at the local data directory.
+
+    Nothing is downloaded at runtime; the directory is filled once with
+    `python -m src.scripts.download_nltk_data` (the Docker image does this at
+    build time).
+    """
+    data_dir = os.path.abspath(settings.nltk_data_dir)
+    if data_dir not in nltk.data.path:
+        nltk.data.path.insert(0, data_dir)
+
+
+@lru_cache(maxsize=1)
+def get_stop_words() -> FrozenSet[str]:
+    init_nltk_data()
+    return frozenset(stopwords.words("english"))
+
+
+@lru_cache(maxsize=1)
+def get_abbreviations() -> FrozenSet[str]:
+    """Abbreviations Punkt refuses to end a sentence on, e.g. "mr" or "etc"."""
+    init_nltk_data()
+    path = nltk.data.find("tokenizers/punkt_tab/english/abbrev_types.txt")
+    with open(path, encoding="utf-8") as file:
+        return frozenset(line.strip() for line in file if line.strip())
+
+
+def nltk_tokenize_and_clean(text: str) -> List[str]:
+    stop_words = get_stop_words()
+    tokens = word_tokenize(text.lower())
+    return [word for word in tokens if word.isalnum() and word not in stop_words]
+
+
+# Characters and runs the Treebank tokenizer always splits off: commas and
+# colons unless they sit in front of a digit ("3,50", "10:30"), and opening
+# single quotes that do not start a contraction suffix.
+_SEPARATORS = re.compile(
+    r"[;@#$%&?!*()\[\]{}<>«»“”‘’„`\"\u2012-\u2015]|''|\.{2,}|--|[:,](?!\d)"
+    r"|(?<!\w)'(?!(?:re|ve|ll|m|t|s|d|n)\b)(?=\w)"
+)
+_CLOSERS = "])}>\"'»”’"
+_ORTHO_PUNCTUATION = frozenset(";:,.!?")
+_REALIGNED_QUOTE = re.compile(r"^(?:\"|'')[\"')\]}]*$")
+_CLOSED_SENTENCE = re.compile(r"[^.]\.[\"')\]}]+$")
+_NUMBER = re.compile(r"^-?[\.,]?\d[\d,\.-]*$")
+_SHORT_SUFFIXES = ("'s", "'m", "'d")
+_LONG_SUFFIXES = ("'ll", "'re", "'ve", "n't")
+_SPLIT_WORDS = {
+    "cannot": ("can", "not"),
+    "gimme": ("gim", "me"),
+    "gonna": ("gon", "na"),
+    "gotta": ("got", "ta"),
+    "lemme": ("lem", "me"),
+    "wanna": ("wan", "na"),
+}
+
+
+def _strip_final_period(
+    chunk: str, abbreviations: FrozenSet[str], next_chunk: Optional[str]
+) -> str:
+    """Split off a sentence-final period the way Punkt + Treebank would.
+
+    Punkt never ends a sentence on a known abbreviation, and it does not end
+    one on an initial ("j.") or a number ("1.") when the next token is a
+    lowercase word or bare punctuation.
+    """
+    rest = chunk.rstrip(_CLOSERS)
+    if len(rest) < 2 or rest[-1] != "." or rest[-2] == ".":
+        return chunk
+    word = rest[:-1]
+    if word in abbreviations:
+        return chunk
+    if rest == chunk and next_chunk is not None and _REALIGNED_QUOTE.match(next_chunk):
+        # Punkt pulls the quote back into this sentence and Treebank turns it
+        # into `` which keeps the period attached.
+        return chunk
+    if (
+        next_chunk is not None
+        and (next_chunk[0].islower() or next_chunk in _ORTHO_PUNCTUATION)
+        and not _CLOSED_SENTENCE.search(next_chunk)
+        and (_NUMBER.match(word) or (len(word) == 1 and word.isalpha()))
+    ):
+        return chunk
+    return word + chunk[len(rest):]
+
+
+def _strip_contraction(piece: str) -> str:
+    if len(piece) > 1 and piece[-1] == "'" and piece[-2] != "'":
+        return piece[:-1]
+    if len(piece) > 2 and piece.endswith(_SHORT_SUFFIXES) and piece[-3] != "'":
+        piece = piece[:-2]
+    if len(piece) > 3 and piece.endswith(_LONG_SUFFIXES) and piece[-4] != "'":
+        piece = piece[:-3]
+    return piece
+
+
+def regex_tokenize_and_clean(text: str) -> List[str]:
+    """Regex re-implementation of `nltk_tokenize_and_clean`.
+
+    Instead of running Punkt and the ~20 Treebank substitutions over the
+    whole text, each whitespace-separated chunk is split with one
+    precompiled regex and only the tokens that can survive the `isalnum()`
+    filter are kept. Plain words take a fast path with no regex at all.
+    It matches the NLTK backend on ordinary prose; pathological punctuation
+    runs such as "end.(next" may tokenize differently.
+    """
+    stop_words = get_stop_words()
+    abbreviations = get_abbreviations()
+    words = []
+
+    chunks = text.lower().split()
+    next_chunks = chunks[1:] + [None]
+
+    for chunk, next_chunk in zip(chunks, next_chunks):
+        if chunk.isalnum():
+            pieces = (chunk,)
+        else:
+            chunk = _strip_final_period(chunk, abbreviations, next_chunk)
+            pieces = _SEPARATORS.split(chunk)
+
+        for piece in pieces:
+            if not piece.isalnum():
+                piece = _strip_contraction(piece)
+                if not piece.isalnum():
+                    continue
+            for word in _SPLIT_WORDS.get(piece, (piece,)):
+                if word not in stop_words:
+                    words.append(word)
+
+    return words
+
+
+TOKENIZERS: Dict[str, Callable[[str], List[str]]] = {
+    "nltk": nltk_tokenize_and_clean,
+    "regex": regex_tokenize_and_clean,
+}
+
+
+def tokenize_and_clean(text: str, tokenizer: Optional[str] = None) -> List[str]:
+    return TOKENIZERS[tokenizer or settings.analytics_tokenizer](text)
@@ -0,0 +1,81 @@
+import difflib
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.repository import notes as notes_repository
+from src.schemas import DiffChange, VersionDiff
+from src.services.version_diff_cache import version_diff_cache
+
+
+def unified_diff(old: str, new: str, from_version: int, to_version: int) -> str:
+    return "\n".join(
+        difflib.unified_diff(
+            old.splitlines(),
+            new.splitlines(),
+            fromfile=f"version {from_version}",
+            tofile=f"version {to_version}",
+            lineterm="",
+        )
+    )
+
+
+def structured_diff(old: str, new: str) -> List[DiffChange]:
+    """Changed line ranges, as 0-based half-open `[start, end)` indexes."""
+    old_lines, new_lines = old.splitlines(), new.splitlines()
+    return [
+        DiffChange(
+            op=op,
+            old_start=i1,
+            old_end=i2,
+            new_start=j1,
+            new_end=j2,
+            old_lines=old_lines[i1:i2],
+            new_lines=new_lines[j1:j2],
+        )
+        for op, i1, i2, j1, j2 in difflib.SequenceMatcher(
+            None, old_lines, new_lines
+        ).get_opcodes()
+        if op != "equal"
+    ]
+
+
+async def diff_versions(
+    note_id: int,
+    from_version: int,
+    to_version: int,
+    db: AsyncSession,
+    format: str = "unified",
+) -> Optional[VersionDiff]:
+    """Diff two versions of a note, or None if either does not exist.
+
+    Only the two versions and the deltas leading to them are read, and the
+    result is cached since versions are immutable.
+    """
+    snapshots = await notes_repository.get_version_snapshots(
+        note_id, {from_version, to_version}, db
+    )
+    if from_version not in snapshots or to_version not in snapshots:
+        return None
+
+    key = version_diff_cache.key_for(note_id, from_version, to_version, format)
+    cached = await version_diff_cache.get(key)
+    if cached is not None:
+        return cached
+
+    versions = await notes_repository.load_version_spans(
+        note_id, [(snapshot, number) for number, snapshot in snapshots.items()], db
+    )
+    old, new = versions[from_version].content, versions[to_version].content
+    diff = VersionDiff(
+        note_id=note_id,
+        from_version=from_version,
+        to_version=to_version,
+        format=format,
+    )
+    if format == "structured":
+        diff.changes = structured_diff(old, new)
+    else:
+        diff.unified = unified_diff(old, new, from_version, to_version)
+    await version_diff_cache.set(key, diff)
+    return diff
@@ -0,0 +1,43 @@
+from typing import Optional
+
+import redis.asyncio as redis
+
+from src.conf.config import settings
+from src.database.db import redis_db
+from src.schemas import VersionDiff
+
+
+class VersionDiffCache:
+    """Caches diffs between two versions of a note in Redis.
+
+    Versions never change once written, so entries are never invalidated;
+    they only expire after the TTL.
+    """
+
+    PREFIX = "version_diff"
+
+    def __init__(self, redis_client, ttl: int):
+        self.redis_db = redis_client
+        self.ttl = ttl
+
+    def key_for(
+        self, note_id: int, from_version: int, to_version: int, format: str
+    ) -> str:
+        return f"{self.PREFIX}:{note_id}:{from_version}:{to_version}:{format}"
+
+    async def get(self, key: str) -> Optional[VersionDiff]:
+        try:
+            cached = await self.redis_db.get(key)
+        except redis.RedisError as e:
+            print(f"Error reading version diff cache: {e}")
+            return None
+        return VersionDiff.model_validate_json(cached) if cached else None
+
+    async def set(self, key: str, diff: VersionDiff) -> None:
+        try:
+            await self.redis_db.setex(key, self.ttl, diff.model_dump_json())
+        except redis.RedisError as e:
+            print(f"Error writing version diff cache: {e}")
+
+
+version_diff_cache = VersionDiffCache(redis_db, settings.version_diff_cache_ttl)
@@ -0,0 +1,156 @@
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from src.conf.config import settings
+from src.database.models import Note, NoteVersion
+from src.services.version_storage import decode_versions, encode_history
+
+
+def retained_versions(
+    versions: Sequence[Tuple[int, datetime]],
+    now: datetime,
+    keep_all_days: Optional[int] = None,
+    daily_days: Optional[int] = None,
+    weekly_days: Optional[int] = None,
+    max_versions: Optional[int] = None,
+) -> Set[int]:
+    """Numbers of the `(version_number, created_at)` versions to keep.
+
+    Every version from the last `keep_all_days` is kept; up to `daily_days`
+    old, the last version of each day; up to `weekly_days` old, the last of
+    each ISO week; older ones go. The latest version always stays, and at
+    most `max_versions` of the newest survivors are kept.
+    """
+    keep_all_days = settings.version_keep_all_days if keep_all_days is None else keep_all_days
+    daily_days = settings.version_keep_daily_days if daily_days is None else daily_days
+    weekly_days = settings.version_keep_weekly_days if weekly_days is None else weekly_days
+    max_versions = max_versions or settings.version_max_per_note
+
+    kept = []
+    checkpoints = set()
+    # Newest first, so the first version seen in a day or week is its last.
+    for version_number, created_at in sorted(versions, reverse=True):
+        age = now - created_at
+        if not kept or age < timedelta(days=keep_all_days):
+            kept.append(version_number)
+            continue
+        if age < timedelta(days=daily_days):
+            checkpoint = ("day", created_at.date())
+        elif age < timedelta(days=weekly_days):
+            checkpoint = ("week", created_at.isocalendar()[:2])
+        else:
+            continue
+        if checkpoint not in checkpoints:
+            checkpoints.add(checkpoint)
+            kept.append(version_number)
+    return set(kept[:max_versions])
+
+
+def _candidate_notes(db: Session, last_note_id: int, now: datetime, batch_size: int):
+    """Live notes that may have versions to drop: with any version older than
+    the keep-all window, or more versions than the cap."""
+    cutoff = now - timedelta(days=settings.version_keep_all_days)
+    return db.scalars(
+        select(NoteVersion.note_id)
+        .join(Note, Note.id == NoteVersion.note_id)
+        .where(NoteVersion.note_id > last_note_id, Note.deleted_at.is_(None))
+        .group_by(NoteVersion.note_id)
+        .having(
+            func.count() > 1,
+            or_(
+                func.min(NoteVersion.created_at) < cutoff,
+                func.count() > settings.version_max_per_note,
+            ),
+        )
+        .order_by(NoteVersion.note_id)
+        .limit(batch_size)
+    ).all()
+
+
+def compact_history(
+    db: Session,
+    now: Optional[datetime] = None,
+    batch_size: int = 100,
+    pause: float = 0.0,
+) -> Dict[str, int]:
+    """Delete the versions the retention policy drops, note batch by batch.
+
+    The remaining versions keep their numbers, so histories stay ordered and
+    `current_version` keeps counting up; versions stored as deltas against a
+    dropped one are re-encoded against their new predecessor. Each batch of
+    `batch_size` notes is one transaction, followed by `pause` seconds.
+    Notes being edited are skipped and picked up by the next run. Returns
+    the notes looked at and compacted, the versions deleted and rewritten,
+    and the stored bytes reclaimed.
+    """
+    now = now or datetime.utcnow()
+    stats = dict(notes=0, compacted=0, deleted=0, rewritten=0, bytes_reclaimed=0)
+    last_note_id = 0
+    while True:
+        note_ids = _candidate_notes(db, last_note_id, now, batch_size)
+        if not note_ids:
+            return stats
+        last_note_id = note_ids[-1]
+
+        # Same lock as update_note, so no version is added mid-compaction.
+        note_ids = db.scalars(
+            select(Note.id)
+            .where(Note.id.in_(note_ids))
+            .with_for_update(skip_locked=True)
+        ).all()
+        histories: Dict[int, List[NoteVersion]] = {}
+        for version in db.scalars(
+            select(NoteVersion)
+            .where(NoteVersion.note_id.in_(note_ids))
+            .order_by(NoteVersion.note_id, NoteVersion.version_number)
+            .execution_options(populate_existing=True)
+        ):
+            histories.setdefault(version.note_id, []).append(version)
+
+        dropped_ids = []
+        changes = []
+        for versions in histories.values():
+            stats["notes"] += 1
+            kept_numbers = retained_versions(
+                [(v.version_number, v.created_at) for v in versions], now
+            )
+            if len(kept_numbers) == len(versions):
+                continue
+            stats["compacted"] += 1
+            stored = {v.id: (v.content, v.snapshot_version) for v in versions}
+            decode_versions(versions)
+            kept = []
+            for version in versions:
+                if version.version_number in kept_numbers:
+                    kept.append(version)
+                else:
+                    dropped_ids.append(version.id)
+                    stats["bytes_reclaimed"] += len(stored[version.id][0].encode())
+            for version, encoded in zip(kept, encode_history(kept)):
+                old_content, _ = stored[version.id]
+                if encoded != stored[version.id]:
+                    stats["bytes_reclaimed"] += len(old_content.encode()) - len(
+                        encoded[0].encode()
+                    )
+                    changes.append(
+                        {
+                            "id": version.id,
+                            "content": encoded[0],
+                            "snapshot_version": encoded[1],
+                        }
+                    )
+        if dropped_ids:
+            db.execute(delete(NoteVersion).where(NoteVersion.id.in_(dropped_ids)))
+            stats["deleted"] += len(dropped_ids)
+        if changes:
+            # The decoded objects no longer mirror the rows, so write by key.
+            db.execute(update(NoteVersion), changes)
+            stats["rewritten"] += len(changes)
+        db.commit()
+        db.expunge_all()
+        if pause:
+            time.sleep(pause)
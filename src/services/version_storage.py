@@ -0,0 +1,190 @@
+import json
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from src.conf.config import settings
+from src.database.models import Note, NoteVersion
+
+# Words with their leading whitespace; joining the tokens gives the text back.
+TOKEN_PATTERN = re.compile(r"\s*\S+|\s+")
+
+
+def _tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text)
+
+
+def encode_delta(previous: str, content: str) -> str:
+    """Describe `content` as edits of `previous`.
+
+    The delta is a JSON list of `[start, end]` ranges of tokens copied from
+    `previous` and strings inserted between them.
+    """
+    old, new = _tokenize(previous), _tokenize(content)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old, new).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append("".join(new[j1:j2]))
+    return json.dumps(ops, separators=(",", ":"), ensure_ascii=False)
+
+
+def apply_delta(previous: str, delta: str) -> str:
+    old = _tokenize(previous)
+    return "".join(
+        "".join(old[op[0]:op[1]]) if isinstance(op, list) else op
+        for op in json.loads(delta)
+    )
+
+
+def encode_version(
+    previous: Optional[str],
+    content: str,
+    version_number: int,
+    snapshot_version: Optional[int],
+    mode: Optional[str] = None,
+    interval: Optional[int] = None,
+) -> Tuple[str, Optional[int]]:
+    """Stored form of a version: `(content, snapshot_version)`.
+
+    `previous` is the content of the preceding version and `snapshot_version`
+    the snapshot its delta chain starts from. A full snapshot is stored (with
+    `snapshot_version` None) for the first version, in `full` mode, once the
+    chain holds `interval` versions, or when the delta is not smaller than
+    the content itself.
+    """
+    mode = mode or settings.version_storage
+    interval = interval or settings.version_snapshot_interval
+    if (
+        mode == "delta"
+        and previous is not None
+        and snapshot_version is not None
+        and version_number - snapshot_version < interval
+    ):
+        delta = encode_delta(previous, content)
+        if len(delta) < len(content):
+            return delta, snapshot_version
+    return content, None
+
+
+def decode_versions(versions: Sequence[NoteVersion]) -> None:
+    """Replace the deltas among one note's versions with their full content.
+
+    `versions` must be ordered by version number and start at a snapshot.
+    Decoded versions are marked as snapshots in memory (never in the
+    database), so decoding the same objects twice is harmless.
+    """
+    previous = None
+    for version in versions:
+        if version.snapshot_version is not None:
+            if previous is None:
+                raise ValueError(
+                    f"Version {version.version_number} of note {version.note_id} "
+                    "is a delta without its snapshot"
+                )
+            set_committed_value(
+                version, "content", apply_delta(previous, version.content)
+            )
+            set_committed_value(version, "snapshot_version", None)
+        previous = version.content
+
+
+def encode_history(
+    versions: Sequence[NoteVersion],
+    mode: Optional[str] = None,
+    interval: Optional[int] = None,
+) -> List[Tuple[str, Optional[int]]]:
+    """Stored form of each of one note's decoded versions, in order.
+
+    Each delta is taken against the version before it in `versions`, so
+    gaps in the numbering (e.g. after compaction) are fine.
+    """
+    encoded = []
+    previous = snapshot_version = None
+    for version in versions:
+        content, new_snapshot = encode_version(
+            previous,
+            version.content,
+            version.version_number,
+            snapshot_version,
+            mode,
+            interval,
+        )
+        encoded.append((content, new_snapshot))
+        previous = version.content
+        snapshot_version = new_snapshot or version.version_number
+    return encoded
+
+
+def convert_history(
+    db: Session,
+    mode: Optional[str] = None,
+    interval: Optional[int] = None,
+    batch_size: int = 500,
+) -> Dict[str, int]:
+    """Re-encode the stored history of every note with the given storage mode.
+
+    Notes are converted `batch_size` at a time, one transaction per batch,
+    with the batch's notes locked so no version is added mid-conversion.
+    Returns the number of notes and versions processed, the versions that
+    were rewritten, and the stored content size before and after, in bytes.
+    """
+    stats = dict(notes=0, versions=0, rewritten=0, bytes_before=0, bytes_after=0)
+    last_note_id = 0
+    while True:
+        note_ids = db.scalars(
+            select(NoteVersion.note_id)
+            .where(NoteVersion.note_id > last_note_id)
+            .group_by(NoteVersion.note_id)
+            .order_by(NoteVersion.note_id)
+            .limit(batch_size)
+        ).all()
+        if not note_ids:
+            return stats
+        last_note_id = note_ids[-1]
+
+        # Same lock as create_version takes, so no new version picks a chain
+        # start that this batch is about to turn into a delta.
+        db.execute(
+            select(Note.id).where(Note.id.in_(note_ids)).with_for_update()
+        )
+        changes = []
+        histories: Dict[int, List[NoteVersion]] = {}
+        for version in db.scalars(
+            select(NoteVersion)
+            .where(NoteVersion.note_id.in_(note_ids))
+            .order_by(NoteVersion.note_id, NoteVersion.version_number)
+            .execution_options(populate_existing=True)
+        ):
+            histories.setdefault(version.note_id, []).append(version)
+
+        for versions in histories.values():
+            stored = [(v.content, v.snapshot_version) for v in versions]
+            decode_versions(versions)
+            encoded = encode_history(versions, mode, interval)
+            for version, (old_content, old_snapshot), (content, new_snapshot) in zip(
+                versions, stored, encoded
+            ):
+                stats["bytes_before"] += len(old_content.encode())
+                stats["bytes_after"] += len(content.encode())
+                if (content, new_snapshot) != (old_content, old_snapshot):
+                    changes.append(
+                        {
+                            "id": version.id,
+                            "content": content,
+                            "snapshot_version": new_snapshot,
+                        }
+                    )
+            stats["notes"] += 1
+            stats["versions"] += len(versions)
+        if changes:
+            # The decoded objects no longer mirror the rows, so write by key.
+            db.execute(update(NoteVersion), changes)
+            stats["rewritten"] += len(changes)
+        db.commit()
+        db.expunge_all()